@@ -1,29 +1,18 @@
 import streamlit as st
 import os
+import time
 import asyncio
-import json
+import uuid
 from dotenv import load_dotenv
-from langchain_huggingface import HuggingFaceEmbeddings
-from langchain_chroma import Chroma
-from langchain.docstore.document import Document
-
-from core.rag_pipeline import RAGPipeline, validate_answer, preprocess_query
 
+from core.llm_gateway import LLMGatewayError
+from service import PipelineService
 
 
 load_dotenv()
-asyncio.set_event_loop(asyncio.new_event_loop())
-
-PROJECT_ROOT = os.path.dirname(os.path.abspath(__file__))
-DB_PATH = os.path.join(PROJECT_ROOT, "chroma_db")
-COLLECTION_NAME = "mentormate_faq"
-EMBEDDING_MODEL = "sentence-transformers/paraphrase-multilingual-MiniLM-L12-v2"
-GOOGLE_API_KEY = os.getenv("GOOGLE_API_KEY")
 
-DATA_FILES = [
-    os.path.join(PROJECT_ROOT, "data", "enriched_dataset.jsonl"),
-    os.path.join(PROJECT_ROOT, "data", "generated_data_google.jsonl")
-]
+# Doluysa pipeline bu süreçte yüklenmez; arayüz HTTP servisinin (server.py) ince istemcisi olur
+MENTORMATE_API_URL = os.getenv("MENTORMATE_API_URL", "")
 
 EXPERT_MODE = {
     "name": "Hibrit Mod",  
@@ -32,94 +21,86 @@ EXPERT_MODE = {
     "desc": "Veritabanı + Genel sorular için güvenli LLM desteği."  
 }
 
-
-def load_jsonl_data(file_path: str) -> list:
-    documents = []
-    
-    if not os.path.exists(file_path):
-        return documents
-    
-    with open(file_path, 'r', encoding='utf-8') as f:
-        for line in f:
-            try:
-                data = json.loads(line)
-                question = data.get("question", "")
-                answer = data.get("answer", "")
-                
-                if question and answer:
-                    page_content = f"Soru: {question}\nCevap: {answer}"
-                    doc = Document(
-                        page_content=page_content,
-                        metadata={"source": os.path.basename(file_path)}
-                    )
-                    documents.append(doc)
-            except:
-                continue
-    
-    return documents
+STARTUP_LABELS = {
+    "initial_build": "İlk indeks kuruluyor (~2-3 dakika)",
+    "import": "Kütüphaneler yükleniyor",
+    "llm": "LLM istemcileri hazırlanıyor",
+    "embeddings": "Embedding modeli yükleniyor",
+    "response_cache": "Önbellek açılıyor",
+    "index": "İndeks açılıyor",
+    "warmup_encode": "Model ısıtılıyor",
+    "warmup_index": "İndeks belleğe alınıyor"
+}
 
 
-def create_database_runtime():
-    
-    all_documents = []
-    for file_path in DATA_FILES:
-        docs = load_jsonl_data(file_path)
-        all_documents.extend(docs)
-    
-    if not all_documents:
-        raise Exception("Veri dosyaları yüklenemedi!")
-    
-    embeddings = HuggingFaceEmbeddings(
-        model_name=EMBEDDING_MODEL,
-        model_kwargs={'device': 'cpu'},
-        encode_kwargs={'batch_size': 32}
-    )
-    
-    vectordb = Chroma.from_documents(
-        documents=all_documents,
-        embedding=embeddings,
-        persist_directory=DB_PATH,
-        collection_name=COLLECTION_NAME
-    )
-    
-    return vectordb
+def session_event_loop() -> asyncio.AbstractEventLoop:
+    """
+    Oturum başına tek olay döngüsü. Streamlit her etkileşimde betiği yeniden
+    çalıştırır; döngü session_state'te tutulmazsa her çalıştırmada yeni bir
+    döngü açılır ve eskileri kapanmadan birikir.
+    """
+    loop = st.session_state.get("event_loop")
+    if loop is None or loop.is_closed():
+        loop = asyncio.new_event_loop()
+        st.session_state.event_loop = loop
+    return loop
 
 
-def check_and_setup_database():
-    if not os.path.exists(DB_PATH):
-        with st.spinner(" İlk kurulum yapılıyor... (~2-3 dakika)"):
+def stream_answer(pipeline, question: str, session_id: str, result: dict):
+    """
+    astream_query olaylarını st.write_stream için senkron token akışına çevirir.
+    Nihai sonuç `result` sözlüğüne yazılır; "retract" sonrası token akıtılmaz.
+    """
+    loop = session_event_loop()
+    events = pipeline.astream_query(question, session_id=session_id)
+    streaming = True
+    try:
+        while True:
             try:
-                st.info(" Veritabanı oluşturuluyor...")
-                create_database_runtime()
-                st.success(" Veritabanı başarıyla oluşturuldu!")
-                st.balloons()
-            except Exception as e:
-                st.error(f" Veritabanı oluşturulamadı: {str(e)}")
-                st.stop()
+                event = loop.run_until_complete(events.__anext__())
+            except StopAsyncIteration:
+                break
+            
+            if event["type"] == "token" and streaming:
+                yield event["content"]
+            elif event["type"] == "retract":
+                streaming = False
+            elif event["type"] == "final":
+                result.update(event["result"])
+    finally:
+        loop.run_until_complete(events.aclose())
 
 
-@st.cache_resource(show_spinner=False, hash_funcs={type: id})  
-def load_rag_pipeline(_force_reload=False): 
-    """RAG Pipeline'ı yükler - Cache fix ile"""
-    if not GOOGLE_API_KEY:
-        st.error(" Google API anahtarı bulunamadı! Lütfen Secrets'a ekleyin.")
-        st.stop()
-    
-    check_and_setup_database()
+@st.cache_resource(show_spinner=False)
+def load_service():
+    """
+    Süreç içi PipelineService veya MENTORMATE_API_URL doluysa servis istemcisi.
+    Süreç içinde kurulum ve ısınma arka planda yapılır; arayüz bu sırada
+    ilerlemeyi gösterir.
+    """
+    if MENTORMATE_API_URL:
+        from core.client import MentorMateClient
+        return MentorMateClient(MENTORMATE_API_URL)
     
     try:
-        pipeline = RAGPipeline(
-            google_api_key=GOOGLE_API_KEY,
-            db_path=DB_PATH,
-            collection_name=COLLECTION_NAME,
-            embedding_model=EMBEDDING_MODEL,
-            llm_model="gemini-2.0-flash",
-            temperature=0.01
-        )
-        return pipeline
-    except Exception as e:
-        st.error(f" RAG Pipeline yüklenemedi: {str(e)}")
+        return PipelineService().start()
+    except RuntimeError:
+        st.error(" Google API anahtarı bulunamadı! Lütfen Secrets'a ekleyin.")
+        st.stop()
+
+
+def show_startup_progress(status: dict):
+    """Pipeline hazır olana kadar ilerlemeyi gösterir ve sayfayı yeniler"""
+    st.title(f"{EXPERT_MODE['icon']} MentorMate Chatbot")
+    if status["state"] == "failed":
+        st.error(f" RAG Pipeline yüklenemedi: {status['error']}")
         st.stop()
+    
+    label = STARTUP_LABELS.get(status["current_phase"], "Hazırlanıyor")
+    st.progress(status["progress"], text=f" Sistem hazırlanıyor: {label}...")
+    st.chat_input("Sistem hazırlanıyor...", disabled=True)
+    time.sleep(1)
+    st.rerun()
 
 
 
@@ -133,10 +114,15 @@ def main():
     
     st.markdown("""<style>.stButton > button {width: 100%;}</style>""", unsafe_allow_html=True)
     
-    if "force_reload" not in st.session_state:
-        st.session_state.force_reload = False
+    service = load_service()
+    status = service.status()
+    if not status["ready"]:
+        show_startup_progress(status)
+    # İstek boyunca aynı sürüm kullanılır; sürüm değişimi sonraki isteklere yansır
+    pipeline = service.pipeline
     
-    pipeline = load_rag_pipeline(_force_reload=st.session_state.force_reload)
+    if "session_id" not in st.session_state:
+        st.session_state.session_id = uuid.uuid4().hex
     
     if "messages" not in st.session_state:
         st.session_state.messages = [{
@@ -174,21 +160,91 @@ def main():
                 "role": "assistant",
                 "content": "Merhaba! Ben MentorMate. Bootcamp hakkında sorularınızı yanıtlamak için buradayım. 🚀"
             }]
-            pipeline.clear_memory()
+            pipeline.clear_memory(st.session_state.session_id)
             st.rerun()
         
-        if st.button(" Sistemi Yenile", use_container_width=True, help="Kod güncellemelerini yükler"):
-            st.session_state.force_reload = True
-            st.cache_resource.clear()
-            st.rerun()
+        if st.button(" İndeksi Yenile", use_container_width=True, help="Yayınlanan yeni indeks sürümüne arka planda geçer"):
+            if service.refresh_index():
+                st.toast("Yeni indeks sürümü arka planda kontrol ediliyor")
         
         st.markdown("---")
         st.markdown("###  Veritabanı")
-        stats = pipeline.get_stats()
-        st.caption(f" `{os.path.basename(stats['db_path'])}/`")
-        st.caption(f"`{stats['embedding_model'].split('/')[-1][:35]}`")
+        stats = service.get_stats()
+        st.caption(f" İndeks sürümü: `{stats['index']['version']}`")
+        startup_stats = stats["startup"]
+        if startup_stats["ready_after_ms"] is not None:
+            st.caption(
+                f" Başlangıç: {startup_stats['ready_after_ms'] / 1000:.1f} s · "
+                f"tepe RSS {startup_stats['peak_rss_mb']} MB"
+            )
+        st.caption(f"`{stats['embedding_model'].split('/')[-1][:35]}` · {stats['embedding_backend']}")
+        drift = stats.get("embedding_drift")
+        if drift and not drift["compatible"]:
+            st.warning(
+                f" Sorgu embedding'i indeksten sapıyor (min kosinüs {drift['min_cosine']}); "
+                "indeksi aynı arka uçla yeniden kurun."
+            )
         st.caption(f" Mod: {stats.get('mode', 'Uzman')}")  
-        
+        st.caption(
+            f" Hızlı SSS: {stats.get('canonical_hits', 0)} isabet / "
+            f"{stats.get('canonical_misses', 0)} ıska"
+        )
+        cache_stats = stats.get("response_cache")
+        if cache_stats:
+            st.caption(
+                f" Önbellek: {cache_stats['hits']} isabet / {cache_stats['misses']} ıska "
+                f"({cache_stats['size']}/{cache_stats['max_size']})"
+            )
+        speculation_stats = stats.get("speculation")
+        if speculation_stats and speculation_stats["started"]:
+            st.caption(
+                f" Spekülatif LLM: {speculation_stats['used']} kullanıldı / "
+                f"{speculation_stats['wasted']} boşa gitti"
+            )
+
+        gateway_stats = stats.get("llm_gateway")
+        if gateway_stats and gateway_stats["calls"]:
+            st.caption(
+                f" LLM: {gateway_stats['upstream_calls']} istek / {gateway_stats['coalesced']} birleştirildi / "
+                f"{gateway_stats['retries']} tekrar · kuyruk {gateway_stats['queue_depth']}"
+            )
+
+        metrics = stats.get("metrics")
+        if metrics and metrics["requests"]:
+            with st.expander(" Performans", expanded=False):
+                st.caption(
+                    f" {metrics['requests']} sorgu · {metrics['llm_calls_per_request']} LLM çağrısı/sorgu · "
+                    f"{metrics['prompt_tokens']}+{metrics['completion_tokens']} token"
+                )
+                if metrics.get("context_tokens_saved"):
+                    st.caption(
+                        f" Bağlam paketleme: ~{metrics['context_tokens_saved']} token tasarruf "
+                        f"(%{metrics['context_saved_ratio'] * 100:.0f})"
+                    )
+                st.dataframe(
+                    {
+                        "aşama": list(metrics["stages"]),
+                        "p50 ms": [s.get("p50_ms") for s in metrics["stages"].values()],
+                        "p95 ms": [s.get("p95_ms") for s in metrics["stages"].values()],
+                        "p99 ms": [s.get("p99_ms") for s in metrics["stages"].values()]
+                    },
+                    hide_index=True,
+                    use_container_width=True
+                )
+                if metrics["last_trace"]:
+                    st.caption("Son sorgu")
+                    st.json(metrics["last_trace"], expanded=False)
+                if startup_stats["phases"]:
+                    st.caption("Başlangıç aşamaları")
+                    st.dataframe(startup_stats["phases"], hide_index=True, use_container_width=True)
+                st.download_button(
+                    "Prometheus metrikleri",
+                    data=pipeline.get_prometheus_metrics(),
+                    file_name="mentormate_metrics.prom",
+                    mime="text/plain",
+                    use_container_width=True
+                )
+
         st.markdown("---")
         st.markdown("[ GitHub Repo](https://github.com/4F71/MentorMate-SSS)")
     
@@ -205,24 +261,33 @@ def main():
             st.markdown(user_input)
         
         with st.chat_message("assistant"):
-            with st.spinner(f"{EXPERT_MODE['icon']} Düşünüyorum..."):
-                try:
-                    enriched_query = preprocess_query(user_input)
-                    result = pipeline.query(enriched_query)
-                    final_answer = result.get("answer", "Bir hata oluştu.").strip()
-                    
-                    st.markdown(final_answer)
-                    st.session_state.messages.append({
-                        "role": "assistant", 
-                        "content": final_answer
-                    })
-                except Exception as e:
-                    error_msg = f" Bir hata oluştu: {str(e)}"
-                    st.error(error_msg)
-                    st.session_state.messages.append({
-                        "role": "assistant", 
-                        "content": error_msg
-                    })
+            placeholder = st.empty()
+            try:
+                result = {}
+                with placeholder.container():
+                    st.write_stream(stream_answer(pipeline, user_input, st.session_state.session_id, result))
+                
+                # Güven kontrolü cevabı geri çektiyse akıtılan metin nihai cevapla değişir
+                final_answer = result.get("answer", "Bir hata oluştu.").strip()
+                placeholder.markdown(final_answer)
+                st.session_state.messages.append({
+                    "role": "assistant", 
+                    "content": final_answer
+                })
+            except LLMGatewayError:
+                error_msg = " Şu an çok yoğunuz, lütfen birkaç saniye sonra tekrar sorun."
+                placeholder.warning(error_msg)
+                st.session_state.messages.append({
+                    "role": "assistant",
+                    "content": error_msg
+                })
+            except Exception as e:
+                error_msg = f" Bir hata oluştu: {str(e)}"
+                placeholder.error(error_msg)
+                st.session_state.messages.append({
+                    "role": "assistant", 
+                    "content": error_msg
+                })
 
 if __name__ == "__main__":
     main()
\ No newline at end of file
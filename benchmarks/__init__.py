@@ -0,0 +1 @@
+"""MentorMate performans ölçüm scriptleri (python -m benchmarks.<ad>)"""
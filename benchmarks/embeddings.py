@@ -0,0 +1,135 @@
+"""
+Embedding arka uçlarının tutarlılık ve hız karşılaştırması
+
+data/ klasöründeki sorular her arka uçla (torch, onnx, onnx-int8) embed
+edilir. Rapor (JSON):
+
+- load_s / rss_delta_mb: modelin yüklenme süresi ve bellek artışı
+- batch: tüm soruların toplu embed süresi ve saniyedeki metin sayısı
+- query: tek sorgu embed gecikmesi (p50/p95)
+- parity: torch vektörlerine göre kosinüs (min/p01/ortalama) ve her sorunun
+  en yakın 10 komşusunun torch ile örtüşme oranı (retrieval'a etkisi)
+
+RSS ölçümü aynı süreçte yapıldığından ONNX arka uçları torch'tan önce
+ölçülür (varsayılan sıra).
+
+Kullanım:
+    python -m benchmarks.embeddings
+    python -m benchmarks.embeddings --limit 500 --threads 4 --output embeddings.json
+"""
+
+import json
+import time
+import argparse
+from typing import Dict, List
+
+import numpy as np
+
+from core.embedding_backends import create_embeddings, EMBEDDING_BACKENDS
+from core.startup import current_rss_mb
+from setup_database import DATA_FILES, EMBEDDING_MODEL, ONNX_MODEL_DIR
+
+from .pipeline import load_workload, percentiles
+
+
+def _normalize(matrix: np.ndarray) -> np.ndarray:
+    norms = np.linalg.norm(matrix, axis=1, keepdims=True)
+    return matrix / np.where(norms == 0, 1.0, norms)
+
+
+def neighbor_overlap(reference: np.ndarray, candidate: np.ndarray, k: int = 10) -> float:
+    """Her satırın referans ve aday uzaydaki en yakın k komşusunun ortalama örtüşmesi"""
+    def top_k(matrix: np.ndarray) -> np.ndarray:
+        normalized = _normalize(matrix)
+        scores = normalized @ normalized.T
+        np.fill_diagonal(scores, -np.inf)
+        return np.argsort(-scores, axis=1)[:, :k]
+
+    reference_top, candidate_top = top_k(reference), top_k(candidate)
+    return float(np.mean([len(set(a) & set(b)) / k for a, b in zip(reference_top, candidate_top)]))
+
+
+def measure(backend: str, questions: List[str], args) -> Dict:
+    rss_before = current_rss_mb()
+    start = time.perf_counter()
+    embeddings = create_embeddings(
+        backend, EMBEDDING_MODEL, onnx_dir=ONNX_MODEL_DIR, threads=args.threads, batch_size=args.batch_size
+    )
+    embeddings.embed_query("ısınma")
+    load_s = time.perf_counter() - start
+    rss_after = current_rss_mb()
+
+    start = time.perf_counter()
+    vectors = np.asarray(embeddings.embed_documents(questions), dtype=np.float32)
+    batch_s = time.perf_counter() - start
+
+    samples = []
+    for question in questions[:args.query_samples]:
+        start = time.perf_counter()
+        embeddings.embed_query(question)
+        samples.append(time.perf_counter() - start)
+
+    return {
+        "vectors": vectors,
+        "report": {
+            "load_s": round(load_s, 3),
+            "rss_delta_mb": round(rss_after - rss_before, 1) if rss_after is not None and rss_before is not None else None,
+            "batch": {
+                "texts": len(questions),
+                "seconds": round(batch_s, 3),
+                "texts_per_s": round(len(questions) / batch_s, 1) if batch_s else None
+            },
+            "query": percentiles(samples)
+        }
+    }
+
+
+def run(args) -> Dict:
+    questions = [item["question"] for item in load_workload(args.limit, args.seed)]
+    results = {backend: measure(backend, questions, args) for backend in args.backends}
+
+    report = {
+        "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        "config": {
+            "model": EMBEDDING_MODEL,
+            "data_files": DATA_FILES,
+            "questions": len(questions),
+            "threads": args.threads,
+            "batch_size": args.batch_size
+        },
+        "backends": {backend: result["report"] for backend, result in results.items()}
+    }
+
+    if "torch" in results:
+        reference = results["torch"]["vectors"]
+        for backend, result in results.items():
+            if backend == "torch":
+                continue
+            cosines = np.sum(_normalize(reference) * _normalize(result["vectors"]), axis=1)
+            report["backends"][backend]["parity"] = {
+                "min_cosine": round(float(cosines.min()), 6),
+                "p01_cosine": round(float(np.quantile(cosines, 0.01)), 6),
+                "mean_cosine": round(float(cosines.mean()), 6),
+                "max_abs_diff": round(float(np.abs(reference - result["vectors"]).max()), 6),
+                "neighbor_overlap_at_10": round(neighbor_overlap(reference, result["vectors"]), 4)
+            }
+    return report
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="torch / ONNX / int8 ONNX embedding karşılaştırması")
+    parser.add_argument("--backends", nargs="+", choices=EMBEDDING_BACKENDS, default=["onnx-int8", "onnx", "torch"])
+    parser.add_argument("--limit", type=int, default=1000, help="Kullanılacak soru sayısı (0 = hepsi)")
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--threads", type=int, default=None, help="Embedding için CPU thread sayısı")
+    parser.add_argument("--batch-size", type=int, default=32)
+    parser.add_argument("--query-samples", type=int, default=200, help="Tekil sorgu gecikmesi için örnek sayısı")
+    parser.add_argument("--output", help="JSON raporun yazılacağı dosya")
+    args = parser.parse_args()
+
+    report = run(args)
+    text = json.dumps(report, ensure_ascii=False, indent=2)
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as f:
+            f.write(text)
+    print(text)
@@ -0,0 +1,217 @@
+"""
+Gemini yerine kullanılan deterministik yerel sohbet modeli ve embedding'ler
+
+FakeChatModel, pipeline'ın gönderdiği prompt türünü (cevap, sorgu planı,
+condense, genel LLM, MultiQuery) tanıyıp her seferinde aynı cevabı
+üretir. İlk token gecikmesi ve token hızı ayarlanabilir; çağrı sayısı,
+token sayıları ve prompt türüne göre süreler kaydedilir.
+
+HashingEmbeddings, embedding modeli indirilemeyen (air-gapped) ortamlar
+için kök-hash tabanlı deterministik embedding'dir; recall değerleri
+gerçek modelle karşılaştırılabilir değildir.
+"""
+
+import re
+import json
+import time
+import asyncio
+import hashlib
+import threading
+from collections import defaultdict
+from typing import Any, AsyncIterator, Dict, Iterator, List
+
+import numpy as np
+from langchain_core.embeddings import Embeddings
+from langchain_core.language_models.chat_models import BaseChatModel
+from langchain_core.messages import AIMessage, AIMessageChunk, BaseMessage
+from langchain_core.outputs import ChatGeneration, ChatGenerationChunk, ChatResult
+
+from core.text_utils import tokenize
+
+
+_TOKEN_PATTERN = re.compile(r"\S+\s*")
+
+
+def _prompt_text(messages: List[BaseMessage]) -> str:
+    return "\n".join(str(m.content) for m in messages)
+
+
+def _section(prompt: str, start: str, end: str) -> str:
+    _, _, rest = prompt.partition(start)
+    return rest.partition(end)[0].strip()
+
+
+def prompt_kind(prompt: str) -> str:
+    """Prompt'un pipeline'daki aşamasını metin işaretlerinden bulur"""
+    if "DOKÜMANLAR:" in prompt:
+        return "answer"
+    if prompt.rstrip().endswith("JSON:"):
+        return "planner"
+    if "ANAHTAR KELİME ZENGİN SORGU" in prompt:
+        return "condense"
+    if "veritabanında yok ama genel bir soru" in prompt:
+        return "general"
+    if "different versions of the given user" in prompt:
+        return "multi_query"
+    return "other"
+
+
+def fake_response(prompt: str) -> str:
+    kind = prompt_kind(prompt)
+
+    if kind == "answer":
+        # Bağlamdaki ilk cevap: deterministik ve güven kontrolünden geçer
+        context = _section(prompt, "DOKÜMANLAR:", "\nSORU:")
+        match = re.search(r"Cevap: (.+)", context)
+        return match.group(1).strip() if match else "Bu konuda veri setimde bilgi bulunmuyor."
+
+    if kind == "planner":
+        question = _section(prompt, "YENİ SORU:", "\nJSON:").lower()
+        return json.dumps({
+            "standalone_question": question,
+            "queries": [question.rstrip("?"), f"{question} hakkında bilgi", " ".join(sorted(question.split()))],
+            "category": "bootcamp_specific"
+        }, ensure_ascii=False)
+
+    if kind == "condense":
+        return _section(prompt, "YENİ SORU:", "\n\nANAHTAR").lower()
+
+    if kind == "general":
+        question = _section(prompt, "SORU:", "\n\nCEVAP:")
+        return f"Bu genel bir soru: {question} Kısaca cevaplamaya çalışayım."
+
+    if kind == "multi_query":
+        question = _section(prompt, "Original question:", "\n")
+        return "\n".join([question, question.lower(), f"{question} hakkında bilgi"])
+
+    return "Tamam."
+
+
+class FakeChatModel(BaseChatModel):
+    """Ayarlanabilir gecikme ve token hızıyla deterministik cevap veren sohbet modeli"""
+
+    latency: float = 0.0
+    tokens_per_second: float = 0.0
+    calls: int = 0
+    prompt_tokens: int = 0
+    completion_tokens: int = 0
+    durations: Dict[str, List[float]] = {}
+
+    class Config:
+        arbitrary_types_allowed = True
+
+    def __init__(self, **kwargs: Any):
+        super().__init__(**kwargs)
+        self.durations = defaultdict(list)
+        object.__setattr__(self, "_lock", threading.Lock())
+
+    @property
+    def _llm_type(self) -> str:
+        return "fake-benchmark"
+
+    def _prepare(self, messages: List[BaseMessage]):
+        prompt = _prompt_text(messages)
+        completion = fake_response(prompt)
+        chunks = _TOKEN_PATTERN.findall(completion) or [completion]
+        with self._lock:
+            self.calls += 1
+            self.prompt_tokens += len(_TOKEN_PATTERN.findall(prompt))
+            self.completion_tokens += len(chunks)
+        return prompt_kind(prompt), completion, chunks
+
+    def _token_delay(self) -> float:
+        return 1.0 / self.tokens_per_second if self.tokens_per_second > 0 else 0.0
+
+    def _record(self, kind: str, start: float):
+        with self._lock:
+            self.durations[kind].append(time.perf_counter() - start)
+
+    def _generate(self, messages: List[BaseMessage], stop=None, run_manager=None, **kwargs: Any) -> ChatResult:
+        start = time.perf_counter()
+        kind, completion, chunks = self._prepare(messages)
+        time.sleep(self.latency + len(chunks) * self._token_delay())
+        self._record(kind, start)
+        return ChatResult(generations=[ChatGeneration(message=AIMessage(content=completion))])
+
+    async def _agenerate(self, messages: List[BaseMessage], stop=None, run_manager=None, **kwargs: Any) -> ChatResult:
+        start = time.perf_counter()
+        kind, completion, chunks = self._prepare(messages)
+        await asyncio.sleep(self.latency + len(chunks) * self._token_delay())
+        self._record(kind, start)
+        return ChatResult(generations=[ChatGeneration(message=AIMessage(content=completion))])
+
+    def _stream(self, messages: List[BaseMessage], stop=None, run_manager=None, **kwargs: Any) -> Iterator[ChatGenerationChunk]:
+        start = time.perf_counter()
+        kind, _, chunks = self._prepare(messages)
+        time.sleep(self.latency)
+        for chunk in chunks:
+            time.sleep(self._token_delay())
+            yield ChatGenerationChunk(message=AIMessageChunk(content=chunk))
+        self._record(kind, start)
+
+    async def _astream(self, messages: List[BaseMessage], stop=None, run_manager=None, **kwargs: Any) -> AsyncIterator[ChatGenerationChunk]:
+        start = time.perf_counter()
+        kind, _, chunks = self._prepare(messages)
+        await asyncio.sleep(self.latency)
+        for chunk in chunks:
+            await asyncio.sleep(self._token_delay())
+            yield ChatGenerationChunk(message=AIMessageChunk(content=chunk))
+        self._record(kind, start)
+
+    def reset_stats(self):
+        with self._lock:
+            self.calls = self.prompt_tokens = self.completion_tokens = 0
+            self.durations = defaultdict(list)
+
+
+class HashingEmbeddings(Embeddings):
+    """Kök (stem) hash'lerinden deterministik embedding; model indirmeden çalışır"""
+
+    def __init__(self, dimension: int = 384):
+        self.dimension = dimension
+
+    def embed_query(self, text: str) -> List[float]:
+        vector = np.zeros(self.dimension, dtype=np.float32)
+        for token in tokenize(text):
+            digest = hashlib.md5(token.encode("utf-8")).digest()
+            vector[int.from_bytes(digest[:4], "little") % self.dimension] += 1.0 if digest[4] & 1 else -1.0
+        norm = np.linalg.norm(vector)
+        return (vector / norm if norm else vector).tolist()
+
+    def embed_documents(self, texts: List[str]) -> List[List[float]]:
+        return [self.embed_query(text) for text in texts]
+
+
+class TimedEmbeddings(Embeddings):
+    """Embedding çağrılarının sayısını ve süresini ölçen sarmalayıcı"""
+
+    def __init__(self, embeddings: Embeddings):
+        self.embeddings = embeddings
+        self.reset_stats()
+
+    def reset_stats(self):
+        self.calls = 0
+        self.texts = 0
+        self.seconds = 0.0
+
+    def _timed(self, fn, texts_count: int, *args):
+        start = time.perf_counter()
+        try:
+            return fn(*args)
+        finally:
+            self.calls += 1
+            self.texts += texts_count
+            self.seconds += time.perf_counter() - start
+
+    def embed_documents(self, texts: List[str]) -> List[List[float]]:
+        return self._timed(self.embeddings.embed_documents, len(texts), texts)
+
+    def embed_query(self, text: str) -> List[float]:
+        return self._timed(self.embeddings.embed_query, 1, text)
+
+    def get_stats(self) -> Dict:
+        return {
+            "calls": self.calls,
+            "texts": self.texts,
+            "total_s": round(self.seconds, 4)
+        }
@@ -0,0 +1,402 @@
+"""
+Eşzamanlı sohbet yük testi
+
+Tek süreçteki paylaşılan RAGPipeline'a (Streamlit'teki cache_resource gibi)
+N eşzamanlı, çok turlu sohbet gönderilir. Sohbetler
+data/enriched_dataset.jsonl'deki sorulardan seed ile örneklenir; her
+sohbet kendi session_id'siyle çalışır, bu yüzden geçmiş okuma/yazma ve
+sorgu planlama da yükün parçasıdır. Gemini yerine gecikmesi ayarlanabilir
+FakeChatModel kullanılır.
+
+- Varış: sohbetler --arrival-rate (sohbet/s, Poisson) ile başlar; aynı anda
+  en fazla --concurrency sohbet açık olur, fazlası bekler (admission_wait).
+  --arrival-rate 0 ise sohbetler boş yer açıldıkça hemen başlar.
+- Düşünme süresi: turlar arasında ortalaması --think-time olan üstel bekleme.
+- --stream: cevaplar astream_query ile akıtılır ve ilk token süresi ölçülür.
+- Sorular veri setinden geldiği için çoğu kanonik SSS kısa yolundan LLM'siz
+  cevaplanır; --canonical-threshold 1.1 ile her soru tam yoldan geçer.
+
+Rapor (JSON), her eşzamanlılık seviyesi için:
+- throughput: saniyedeki istek sayısı, hata oranı ve hata türleri
+- latency / ttft / admission_wait: yüzdelikler (ms)
+- stages: pipeline izinden aşama yüzdelikleri
+- timeline: --sample-interval aralıklarla CPU %, RSS, açık sohbet ve
+  o aralıktaki istek sayısı / p95
+Birden çok seviye verilirse (--concurrency 1 2 4 8 16) "saturation",
+throughput'un bir önceki seviyeye göre %5'ten az arttığı ilk seviyedir.
+--baseline önceki bir raporla karşılaştırır; throughput --tolerance'tan
+fazla düşer veya p95 --tolerance'tan fazla artarsa seviye "regressions"a
+yazılır ve süreç 1 koduyla çıkar.
+
+Kullanım:
+    python -m benchmarks.load --fake-embeddings --vector-backend numpy --concurrency 1 4 16 --llm-latency 0.5
+    python -m benchmarks.load --concurrency 8 --arrival-rate 2 --think-time 3 --stream --output load.json
+    python -m benchmarks.load --fake-embeddings --concurrency 1 4 16 --baseline load.json
+"""
+
+import os
+import sys
+import json
+import time
+import random
+import asyncio
+import argparse
+import tempfile
+import threading
+from collections import Counter, defaultdict
+from typing import Dict, List, Optional
+
+from core.rag_pipeline import RAGPipeline
+from core.indexer import build_index
+from core.vector_store import create_vector_store, VECTOR_BACKENDS
+from core.ingestion import iter_documents
+from core.startup import current_rss_mb
+from core.embedding_backends import create_embeddings, EMBEDDING_BACKENDS
+from setup_database import DATA_FILES, CANONICAL_DATA_FILE, COLLECTION_NAME, EMBEDDING_MODEL, ONNX_MODEL_DIR
+
+from .fake_llm import FakeChatModel, HashingEmbeddings
+from .pipeline import percentiles, _git_commit
+
+
+SATURATION_GAIN = 0.05
+
+
+def load_conversations(path: str, count: int, turns: int, seed: int) -> List[List[str]]:
+    """Veri setinden seed ile örneklenmiş `count` adet `turns` turlu sohbet"""
+    questions = []
+    with open(path, 'r', encoding='utf-8') as f:
+        for line in f:
+            try:
+                question = (json.loads(line).get("question") or "").strip()
+            except json.JSONDecodeError:
+                continue
+            if question:
+                questions.append(question)
+    rng = random.Random(seed)
+    return [rng.sample(questions, min(turns, len(questions))) for _ in range(count)]
+
+
+class ResourceSampler:
+    """Belirli aralıklarla süreç CPU'su, RSS ve istek sayılarını kaydeder"""
+
+    def __init__(self, interval: float):
+        self.interval = interval
+        self.timeline: List[Dict] = []
+        self.active = 0
+        self._latencies: List[float] = []
+        self._errors = 0
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def record(self, latency: Optional[float]):
+        with self._lock:
+            if latency is None:
+                self._errors += 1
+            else:
+                self._latencies.append(latency)
+
+    def change_active(self, delta: int):
+        with self._lock:
+            self.active += delta
+
+    def _sample(self, started: float, last_wall: float, last_cpu: float):
+        wall, cpu = time.perf_counter(), time.process_time()
+        with self._lock:
+            latencies, errors = self._latencies, self._errors
+            self._latencies, self._errors = [], 0
+            active = self.active
+        rss = current_rss_mb()
+        elapsed = wall - last_wall
+        self.timeline.append({
+            "t_s": round(wall - started, 2),
+            # Tüm çekirdeklerin toplamı: 100 = bir çekirdek tam dolu
+            "cpu_percent": round((cpu - last_cpu) / elapsed * 100, 1) if elapsed > 0 else None,
+            "rss_mb": round(rss, 1) if rss is not None else None,
+            "active_conversations": active,
+            "requests": len(latencies),
+            "errors": errors,
+            "requests_per_s": round(len(latencies) / elapsed, 2) if elapsed > 0 else None,
+            "p95_ms": percentiles(latencies).get("p95_ms")
+        })
+        return wall, cpu
+
+    def start(self):
+        def run():
+            started = last_wall = time.perf_counter()
+            last_cpu = time.process_time()
+            while not self._stop.wait(self.interval):
+                last_wall, last_cpu = self._sample(started, last_wall, last_cpu)
+            self._sample(started, last_wall, last_cpu)
+
+        self._thread = threading.Thread(target=run, name="load-sampler", daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
+
+
+def _stream_query(pipeline: RAGPipeline, question: str, session_id: str):
+    """astream_query'yi tüketir; (sonuç, ilk token süresi) döner"""
+    async def consume():
+        start = time.perf_counter()
+        first_token, result = None, None
+        async for event in pipeline.astream_query(question, session_id=session_id):
+            if event["type"] == "token" and first_token is None:
+                first_token = time.perf_counter() - start
+            elif event["type"] == "final":
+                result = event["result"]
+        return result, first_token
+
+    return asyncio.run(consume())
+
+
+def run_level(pipeline: RAGPipeline, conversations: List[List[str]], concurrency: int, args, label: str) -> Dict:
+    """Bir eşzamanlılık seviyesinde tüm sohbetleri oynatır"""
+    rng = random.Random(args.seed)
+    slots = threading.Semaphore(concurrency)
+    sampler = ResourceSampler(args.sample_interval)
+    lock = threading.Lock()
+    latencies, first_tokens, admission_waits = [], [], []
+    stage_samples: Dict[str, List[float]] = defaultdict(list)
+    errors: Counter = Counter()
+    think_times = [
+        [rng.expovariate(1 / args.think_time) if args.think_time > 0 else 0.0 for _ in conversation]
+        for conversation in conversations
+    ]
+
+    def converse(index: int, arrived: float):
+        waited = time.perf_counter() - arrived
+        sampler.change_active(1)
+        session_id = f"{label}-{index}"
+        try:
+            for turn, question in enumerate(conversations[index]):
+                if turn:
+                    time.sleep(think_times[index][turn])
+                start = time.perf_counter()
+                try:
+                    if args.stream:
+                        result, first_token = _stream_query(pipeline, question, session_id)
+                    else:
+                        result, first_token = pipeline.query(question, session_id=session_id), None
+                except Exception as e:
+                    sampler.record(None)
+                    with lock:
+                        errors[type(e).__name__] += 1
+                    continue
+                latency = time.perf_counter() - start
+                sampler.record(latency)
+                with lock:
+                    latencies.append(latency)
+                    if first_token is not None:
+                        first_tokens.append(first_token)
+                    for stage, ms in result["trace"]["stages_ms"].items():
+                        stage_samples[stage].append(ms / 1000)
+        finally:
+            sampler.change_active(-1)
+            pipeline.clear_memory(session_id)
+            slots.release()
+            with lock:
+                admission_waits.append(waited)
+
+    threads = []
+    sampler.start()
+    started = time.perf_counter()
+    for index in range(len(conversations)):
+        if args.arrival_rate > 0 and index:
+            time.sleep(rng.expovariate(args.arrival_rate))
+        arrived = time.perf_counter()
+        slots.acquire()
+        thread = threading.Thread(target=converse, args=(index, arrived), name=f"conversation-{index}", daemon=True)
+        thread.start()
+        threads.append(thread)
+    for thread in threads:
+        thread.join()
+    wall_s = time.perf_counter() - started
+    sampler.stop()
+
+    requests = len(latencies) + sum(errors.values())
+    timeline = sampler.timeline
+    cpu_samples = [s["cpu_percent"] for s in timeline if s["cpu_percent"] is not None]
+    rss_samples = [s["rss_mb"] for s in timeline if s["rss_mb"] is not None]
+    return {
+        "concurrency": concurrency,
+        "conversations": len(conversations),
+        "wall_s": round(wall_s, 3),
+        "throughput": {
+            "requests": requests,
+            "requests_per_s": round(len(latencies) / wall_s, 2) if wall_s else None,
+            "error_rate": round(sum(errors.values()) / requests, 4) if requests else 0.0,
+            "errors": dict(errors)
+        },
+        "latency": percentiles(latencies),
+        "ttft": percentiles(first_tokens) if args.stream else None,
+        "admission_wait": percentiles(admission_waits),
+        "stages": {stage: percentiles(samples) for stage, samples in stage_samples.items()},
+        "resources": {
+            "cpu_percent_mean": round(sum(cpu_samples) / len(cpu_samples), 1) if cpu_samples else None,
+            "cpu_percent_max": max(cpu_samples) if cpu_samples else None,
+            "rss_mb_max": max(rss_samples) if rss_samples else None
+        },
+        "timeline": timeline
+    }
+
+
+def find_saturation(levels: List[Dict]) -> Optional[int]:
+    """Throughput'un bir önceki seviyeye göre SATURATION_GAIN'den az arttığı ilk eşzamanlılık"""
+    for previous, level in zip(levels, levels[1:]):
+        before, after = previous["throughput"]["requests_per_s"], level["throughput"]["requests_per_s"]
+        if before and (after or 0) < before * (1 + SATURATION_GAIN):
+            return level["concurrency"]
+    return None
+
+
+def compare_baseline(levels: List[Dict], baseline: Dict, tolerance: float) -> List[Dict]:
+    """Aynı eşzamanlılık seviyelerinde throughput düşüşü veya p95 artışı"""
+    previous = {level["concurrency"]: level for level in baseline.get("levels", [])}
+    regressions = []
+    for level in levels:
+        old = previous.get(level["concurrency"])
+        if old is None:
+            continue
+        checks = (
+            ("requests_per_s", old["throughput"]["requests_per_s"], level["throughput"]["requests_per_s"], -1),
+            ("p95_ms", old["latency"].get("p95_ms"), level["latency"].get("p95_ms"), 1)
+        )
+        for metric, before, after, direction in checks:
+            if not before or after is None:
+                continue
+            change = (after - before) / before
+            if change * direction > tolerance:
+                regressions.append({
+                    "concurrency": level["concurrency"],
+                    "metric": metric,
+                    "baseline": before,
+                    "current": after,
+                    "change": round(change, 4)
+                })
+    return regressions
+
+
+def build_pipeline(args) -> RAGPipeline:
+    embeddings = HashingEmbeddings() if args.fake_embeddings else create_embeddings(
+        args.embedding_backend, EMBEDDING_MODEL, onnx_dir=ONNX_MODEL_DIR
+    )
+    db_path = args.db_path
+    if db_path is None:
+        db_path = tempfile.mkdtemp(prefix="mentormate-load-")
+        build_index(
+            vectordb=create_vector_store(args.vector_backend, db_path, embeddings, COLLECTION_NAME),
+            embeddings=embeddings,
+            db_path=db_path,
+            collection_name=COLLECTION_NAME,
+            embedding_model="hashing" if args.fake_embeddings else EMBEDDING_MODEL,
+            data_files=DATA_FILES,
+            canonical_data_file=CANONICAL_DATA_FILE,
+            load_documents=iter_documents,
+            vector_backend=args.vector_backend,
+            embedding_backend=args.embedding_backend
+        )
+
+    pipeline = RAGPipeline(
+        google_api_key="offline",
+        db_path=db_path,
+        collection_name=COLLECTION_NAME,
+        vector_backend=args.vector_backend,
+        cache_size=args.cache_size,
+        canonical_threshold=args.canonical_threshold,
+        speculative_categories=tuple(args.speculative),
+        llm=FakeChatModel(latency=args.llm_latency, tokens_per_second=args.tokens_per_second),
+        llm_general=FakeChatModel(latency=args.llm_latency, tokens_per_second=args.tokens_per_second),
+        embeddings=embeddings,
+        llm_max_concurrency=args.llm_max_concurrency
+    )
+    pipeline.warm_up()
+    return pipeline
+
+
+def run(args) -> Dict:
+    pipeline = build_pipeline(args)
+    conversations = load_conversations(CANONICAL_DATA_FILE, args.conversations, args.turns, args.seed)
+
+    levels = []
+    for concurrency in args.concurrency:
+        level = run_level(pipeline, conversations, concurrency, args, label=f"c{concurrency}")
+        levels.append(level)
+        print(
+            f"eşzamanlılık {concurrency:>4}: {level['throughput']['requests_per_s']} istek/s, "
+            f"p95 {level['latency'].get('p95_ms')} ms, hata %{level['throughput']['error_rate'] * 100:.1f}, "
+            f"CPU ort. %{level['resources']['cpu_percent_mean']}, tepe RSS {level['resources']['rss_mb_max']} MB",
+            file=sys.stderr
+        )
+
+    return {
+        "commit": _git_commit(),
+        "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        "config": {
+            "conversations": args.conversations,
+            "turns": args.turns,
+            "arrival_rate": args.arrival_rate,
+            "think_time_s": args.think_time,
+            "stream": args.stream,
+            "llm_latency_s": args.llm_latency,
+            "tokens_per_second": args.tokens_per_second,
+            "llm_max_concurrency": args.llm_max_concurrency,
+            "embeddings": "hashing" if args.fake_embeddings else f"{EMBEDDING_MODEL} ({args.embedding_backend})",
+            "vector_backend": args.vector_backend,
+            "cache_size": args.cache_size,
+            "canonical_threshold": args.canonical_threshold,
+            "speculative_categories": list(args.speculative),
+            "cpu_count": os.cpu_count(),
+            "seed": args.seed
+        },
+        "levels": levels,
+        "saturation": find_saturation(levels),
+        "pipeline": {
+            key: value for key, value in pipeline.get_stats().items()
+            if key in ("llm_gateway", "speculation", "routes", "sessions")
+        }
+    }
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Eşzamanlı çok turlu sohbet yük testi (sahte LLM)")
+    parser.add_argument("--concurrency", type=int, nargs="+", default=[1, 4, 16],
+                        help="Aynı anda açık en fazla sohbet sayısı; birden çok değer seviye taraması yapar")
+    parser.add_argument("--conversations", type=int, default=50, help="Seviye başına sohbet sayısı")
+    parser.add_argument("--turns", type=int, default=3, help="Sohbet başına soru sayısı")
+    parser.add_argument("--arrival-rate", type=float, default=0.0, help="Saniyede başlayan sohbet (0 = boş yer açıldıkça)")
+    parser.add_argument("--think-time", type=float, default=0.0, help="Turlar arası ortalama düşünme süresi (s)")
+    parser.add_argument("--stream", action="store_true", help="astream_query ile akıt ve ilk token süresini ölç")
+    parser.add_argument("--llm-latency", type=float, default=0.3, help="Sahte LLM ilk token gecikmesi (s)")
+    parser.add_argument("--tokens-per-second", type=float, default=0.0, help="Sahte LLM token hızı (0 = anında)")
+    parser.add_argument("--llm-max-concurrency", type=int, default=8, help="LLM gateway eşzamanlılık sınırı")
+    parser.add_argument("--fake-embeddings", action="store_true", help="Model indirmeden hash tabanlı embedding kullan")
+    parser.add_argument("--embedding-backend", choices=EMBEDDING_BACKENDS, default="torch")
+    parser.add_argument("--vector-backend", choices=VECTOR_BACKENDS, default="chroma")
+    parser.add_argument("--cache-size", type=int, default=0, help="Semantik önbellek boyutu (0 = kapalı)")
+    parser.add_argument("--canonical-threshold", type=float, default=0.90,
+                        help="Kanonik SSS kısa yolu eşiği (>1 = kapalı, her soru retrieval + LLM'den geçer)")
+    parser.add_argument("--speculative", nargs="*", default=["general_safe"], help="Spekülatif fallback kategorileri")
+    parser.add_argument("--sample-interval", type=float, default=1.0, help="CPU/RSS örnekleme aralığı (s)")
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--db-path", help="Var olan indeks klasörü (varsayılan: geçici klasöre kurulur)")
+    parser.add_argument("--baseline", help="Karşılaştırılacak önceki JSON rapor")
+    parser.add_argument("--tolerance", type=float, default=0.10, help="Regresyon eşiği (oran)")
+    parser.add_argument("--output", help="JSON raporun yazılacağı dosya")
+    args = parser.parse_args()
+
+    report = run(args)
+    if args.baseline:
+        with open(args.baseline, 'r', encoding='utf-8') as f:
+            report["regressions"] = compare_baseline(report["levels"], json.load(f), args.tolerance)
+
+    text = json.dumps(report, ensure_ascii=False, indent=2)
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as f:
+            f.write(text)
+    print(text)
+    if report.get("regressions"):
+        sys.exit(1)
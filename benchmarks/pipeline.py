@@ -0,0 +1,283 @@
+"""
+Çevrimdışı RAGPipeline benchmark'ı
+
+Gemini yerine deterministik FakeChatModel kullanılır; veri setlerindeki
+sorular iş yükü olarak tekrar oynatılır. Rapor (JSON):
+
+- index_build_s: geçici veritabanına indeks oluşturma süresi
+- stages: aşama bazında gecikme yüzdelikleri (ms)
+- llm: sorgu başına LLM çağrısı, prompt/completion token sayıları
+- context: bağlam paketlemenin cevap prompt'undan çıkardığı token'lar
+- embedding: sorgu sırasındaki embedding çağrıları ve süresi
+- throughput: iş yükünün toplam süresi ve saniyedeki sorgu sayısı
+- recall_at_k: ilk k dokümanda sorunun canonical_question kümesinin bulunma oranı
+
+Kullanım:
+    python -m benchmarks.pipeline --output results.json
+    python -m benchmarks.pipeline --fake-embeddings --limit 100 --llm-latency 0.3 --tokens-per-second 80
+    python -m benchmarks.pipeline --fake-embeddings --batch-concurrency 8   # query_batch ile
+"""
+
+import os
+import json
+import time
+import random
+import hashlib
+import argparse
+import tempfile
+import statistics
+import subprocess
+from collections import defaultdict
+from typing import Dict, List, Optional
+
+from core.rag_pipeline import RAGPipeline
+from core.indexer import build_index
+from core.clustering import split_qa
+from core.vector_store import create_vector_store, VECTOR_BACKENDS
+from core.ingestion import iter_documents
+from core.embedding_backends import create_embeddings, EMBEDDING_BACKENDS
+from core.context_packer import DEFAULT_CONTEXT_TOKEN_BUDGET
+from setup_database import (
+    DATA_FILES, CANONICAL_DATA_FILE, COLLECTION_NAME, EMBEDDING_MODEL, ONNX_MODEL_DIR
+)
+
+from .fake_llm import FakeChatModel, HashingEmbeddings, TimedEmbeddings
+
+
+def percentiles(samples: List[float]) -> Dict:
+    """Saniye cinsinden örneklerin ms yüzdelikleri"""
+    if not samples:
+        return {"count": 0}
+    ordered = sorted(samples)
+
+    def pick(q: float) -> float:
+        return round(ordered[min(len(ordered) - 1, int(q * len(ordered)))] * 1000, 3)
+
+    return {
+        "count": len(ordered),
+        "p50_ms": pick(0.50),
+        "p95_ms": pick(0.95),
+        "p99_ms": pick(0.99),
+        "mean_ms": round(statistics.fmean(ordered) * 1000, 3)
+    }
+
+
+def load_workload(limit: Optional[int], seed: int) -> List[Dict]:
+    """
+    İki veri dosyasındaki soruları (soru, canonical_question, canonical_answer)
+    olarak döner. generated_data_google.jsonl'de kanonik alan olmadığından
+    aynı soru metni üzerinden enriched_dataset.jsonl'den eşlenir.
+    """
+    canonical_by_question = {}
+    rows = []
+    for path in DATA_FILES:
+        if not os.path.exists(path):
+            continue
+        with open(path, 'r', encoding='utf-8') as f:
+            for line in f:
+                try:
+                    data = json.loads(line)
+                except json.JSONDecodeError:
+                    continue
+                question = (data.get("question") or "").strip()
+                if not question:
+                    continue
+                if data.get("canonical_question"):
+                    canonical_by_question[question] = (data["canonical_question"], data.get("canonical_answer") or "")
+                rows.append(question)
+
+    workload = [
+        {
+            "question": q,
+            "canonical_question": canonical_by_question.get(q, ("", ""))[0],
+            "canonical_answer": canonical_by_question.get(q, ("", ""))[1]
+        }
+        for q in rows
+    ]
+    random.Random(seed).shuffle(workload)
+    return workload[:limit] if limit else workload
+
+
+def is_relevant(doc, item: Dict) -> bool:
+    """Doküman sorunun kanonik kümesine mi ait? (metadata, küme kimliği veya cevap metni)"""
+    canonical_question = item["canonical_question"]
+    if doc.metadata.get("canonical_question") == canonical_question:
+        return True
+    if doc.metadata.get("cluster_id") == hashlib.sha1(canonical_question.encode("utf-8")).hexdigest()[:16]:
+        return True
+    return bool(item["canonical_answer"]) and split_qa(doc.page_content)[1] == item["canonical_answer"].strip()
+
+
+def run(args) -> Dict:
+    base_embeddings = HashingEmbeddings() if args.fake_embeddings else create_embeddings(
+        args.embedding_backend, EMBEDDING_MODEL, onnx_dir=ONNX_MODEL_DIR
+    )
+    embeddings = TimedEmbeddings(base_embeddings)
+    db_path = args.db_path or tempfile.mkdtemp(prefix="mentormate-bench-")
+
+    start = time.perf_counter()
+    vectordb = create_vector_store(args.vector_backend, db_path, embeddings, COLLECTION_NAME)
+    index_stats = build_index(
+        vectordb=vectordb,
+        embeddings=embeddings,
+        db_path=db_path,
+        collection_name=COLLECTION_NAME,
+        embedding_model="hashing" if args.fake_embeddings else EMBEDDING_MODEL,
+        data_files=DATA_FILES,
+        canonical_data_file=CANONICAL_DATA_FILE,
+        load_documents=iter_documents,
+        cluster=not args.no_cluster,
+        vector_backend=args.vector_backend,
+        embedding_backend=args.embedding_backend
+    )
+    index_build_s = time.perf_counter() - start
+    index_embedding = embeddings.get_stats()
+
+    llm = FakeChatModel(latency=args.llm_latency, tokens_per_second=args.tokens_per_second)
+    llm_general = FakeChatModel(latency=args.llm_latency, tokens_per_second=args.tokens_per_second)
+    pipeline = RAGPipeline(
+        google_api_key="offline",
+        db_path=db_path,
+        collection_name=COLLECTION_NAME,
+        query_planner=args.query_planner,
+        vector_backend=args.vector_backend,
+        cache_size=0,
+        speculative_categories=tuple(args.speculative),
+        context_token_budget=args.context_budget or None,
+        llm=llm,
+        llm_general=llm_general,
+        embeddings=embeddings
+    )
+
+    workload = load_workload(args.limit, args.seed)
+    embeddings.reset_stats()
+
+    # Aşama süreleri pipeline'ın istek izinden (result["trace"]) toplanır
+    stage_samples: Dict[str, List[float]] = defaultdict(list)
+    llm_calls = []
+    errors = 0
+    start = time.perf_counter()
+    if args.batch_concurrency:
+        traces = []
+        for item in pipeline.query_batch([item["question"] for item in workload], max_concurrency=args.batch_concurrency):
+            if "error" in item:
+                errors += 1
+            else:
+                traces.append(item["result"]["trace"])
+        llm_calls = [trace["llm_calls"] for trace in traces]
+    else:
+        traces = []
+        for item in workload:
+            calls_before = llm.calls + llm_general.calls
+            traces.append(pipeline.query(item["question"], chat_history=[])["trace"])
+            llm_calls.append(llm.calls + llm_general.calls - calls_before)
+    wall_s = time.perf_counter() - start
+
+    for trace in traces:
+        for stage, ms in trace["stages_ms"].items():
+            stage_samples[stage].append(ms / 1000)
+        stage_samples["total"].append(trace["total_ms"] / 1000)
+
+    query_embedding = embeddings.get_stats()
+    stages = {stage: percentiles(samples) for stage, samples in stage_samples.items()}
+    for kind, samples in list(llm.durations.items()) + [(f"general_{k}", v) for k, v in llm_general.durations.items()]:
+        stages[f"llm_{kind}"] = percentiles(samples)
+
+    # Recall@k: pipeline'ın kullandığı retriever ile, sadece orijinal soru aranarak
+    evaluated = [item for item in workload if item["canonical_question"]]
+    hits = 0
+    for item in evaluated:
+        if pipeline.batch_retriever is not None:
+            docs = pipeline.batch_retriever.retrieve([item["question"]])
+        else:
+            docs = pipeline.base_retriever.invoke(item["question"])
+        hits += any(is_relevant(doc, item) for doc in docs[:args.recall_k])
+
+    return {
+        "commit": _git_commit(),
+        "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        "config": {
+            "queries": len(workload),
+            "seed": args.seed,
+            "llm_latency_s": args.llm_latency,
+            "tokens_per_second": args.tokens_per_second,
+            "embeddings": "hashing" if args.fake_embeddings else f"{EMBEDDING_MODEL} ({args.embedding_backend})",
+            "vector_backend": args.vector_backend,
+            "query_planner": args.query_planner,
+            "cluster": not args.no_cluster,
+            "speculative_categories": list(args.speculative),
+            "context_token_budget": args.context_budget,
+            "batch_concurrency": args.batch_concurrency
+        },
+        "index_build_s": round(index_build_s, 3),
+        "index": {**index_stats, "embedding": index_embedding},
+        "throughput": {
+            "wall_s": round(wall_s, 3),
+            "queries_per_s": round(len(workload) / wall_s, 2) if wall_s else None,
+            "errors": errors
+        },
+        "stages": stages,
+        "llm": {
+            "calls_per_query": round(statistics.fmean(llm_calls), 3) if llm_calls else 0.0,
+            "calls_total": llm.calls + llm_general.calls,
+            "prompt_tokens": llm.prompt_tokens + llm_general.prompt_tokens,
+            "completion_tokens": llm.completion_tokens + llm_general.completion_tokens
+        },
+        "context": {
+            key: value for key, value in pipeline.metrics.snapshot().items()
+            if key in ("context_tokens_saved", "context_saved_ratio")
+        },
+        "embedding": {
+            **query_embedding,
+            "per_query_ms": round(query_embedding["total_s"] * 1000 / len(workload), 3) if workload else 0.0
+        },
+        "recall_at_k": {
+            "k": args.recall_k,
+            "evaluated": len(evaluated),
+            "recall": round(hits / len(evaluated), 4) if evaluated else None
+        },
+        "pipeline": {
+            key: value for key, value in pipeline.get_stats().items()
+            if key in ("canonical_hits", "canonical_misses", "routes", "speculation")
+        }
+    }
+
+
+def _git_commit() -> Optional[str]:
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"],
+            capture_output=True, text=True, check=True,
+            cwd=os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Gemini'siz, deterministik RAGPipeline benchmark'ı")
+    parser.add_argument("--limit", type=int, default=200, help="Oynatılacak soru sayısı (0 = hepsi)")
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--llm-latency", type=float, default=0.0, help="Sahte LLM ilk token gecikmesi (s)")
+    parser.add_argument("--tokens-per-second", type=float, default=0.0, help="Sahte LLM token hızı (0 = anında)")
+    parser.add_argument("--fake-embeddings", action="store_true", help="Model indirmeden hash tabanlı embedding kullan")
+    parser.add_argument("--embedding-backend", choices=EMBEDDING_BACKENDS, default="torch")
+    parser.add_argument("--vector-backend", choices=VECTOR_BACKENDS, default="chroma")
+    parser.add_argument("--query-planner", choices=["single_call", "legacy"], default="single_call")
+    parser.add_argument("--no-cluster", action="store_true")
+    parser.add_argument("--speculative", nargs="*", default=["general_safe"], help="Spekülatif fallback kategorileri")
+    parser.add_argument("--context-budget", type=int, default=DEFAULT_CONTEXT_TOKEN_BUDGET,
+                        help="Cevap bağlamı token bütçesi (0 = paketleme kapalı)")
+    parser.add_argument("--batch-concurrency", type=int, default=0,
+                        help="0'dan büyükse sorular query_batch ile bu eşzamanlılıkla işlenir")
+    parser.add_argument("--recall-k", type=int, default=5)
+    parser.add_argument("--db-path", help="Var olan/kalıcı indeks klasörü (varsayılan: geçici klasör)")
+    parser.add_argument("--output", help="JSON raporun yazılacağı dosya")
+    args = parser.parse_args()
+
+    report = run(args)
+    text = json.dumps(report, ensure_ascii=False, indent=2)
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as f:
+            f.write(text)
+    print(text)
@@ -0,0 +1,83 @@
+"""
+Soğuk başlangıç ölçümü
+
+Yeni bir süreçte importlardan ilk cevaba kadar her aşamanın süresini,
+RSS'ini ve tepe RSS'ini raporlar: import, LLM istemcileri, embedding
+modeli, indeksin açılması, ısınma (örnek encode + indeks sayfaları) ve
+ısınmış pipeline'daki ilk sorgu. Yayınlanmış indeks sürümü kullanılır;
+varsayılan olarak Gemini yerine FakeChatModel çağrılır.
+
+Kullanım:
+    python -m benchmarks.startup
+    python -m benchmarks.startup --gemini --output startup.json
+"""
+
+import os
+import json
+import argparse
+
+# Sadece standart kütüphane kullanır; ölçüm bu importtan sonra başlar
+from core.startup import StartupReport, STARTUP_PHASES
+
+
+def run(args) -> dict:
+    startup = StartupReport(expected_phases=STARTUP_PHASES + ("first_query",))
+    with startup.phase("import"):
+        from core.rag_pipeline import RAGPipeline
+        from core.artifacts import resolve_artifact
+        from setup_database import DB_PATH, COLLECTION_NAME, EMBEDDING_MODEL
+
+    db_path, backend = args.db_path, args.vector_backend
+    if db_path is None:
+        resolved = resolve_artifact(DB_PATH)
+        if resolved is None:
+            raise SystemExit("Yayınlanmış indeks bulunamadı, önce: python setup_database.py")
+        db_path = resolved[1]
+        backend = resolved[2].get("index_options", {}).get("vector_backend", backend)
+
+    llm = llm_general = None
+    if not args.gemini:
+        from .fake_llm import FakeChatModel
+        llm, llm_general = FakeChatModel(), FakeChatModel()
+
+    pipeline = RAGPipeline(
+        google_api_key=os.getenv("GOOGLE_API_KEY") or "offline",
+        db_path=db_path,
+        collection_name=COLLECTION_NAME,
+        embedding_model=EMBEDDING_MODEL,
+        vector_backend=backend,
+        cache_size=0,
+        speculative_categories=(),
+        llm=llm,
+        llm_general=llm_general,
+        startup_report=startup
+    )
+    pipeline.warm_up()
+
+    with startup.phase("first_query"):
+        trace = pipeline.query(args.question, chat_history=[])["trace"]
+
+    return {
+        "db_path": db_path,
+        "vector_backend": backend,
+        "llm": "gemini" if args.gemini else "fake",
+        **startup.to_dict(),
+        "first_query": trace,
+        "table": startup.format().splitlines()
+    }
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Soğuk başlangıç süresi ve bellek raporu")
+    parser.add_argument("--db-path", help="İndeks klasörü (varsayılan: chroma_db/CURRENT sürümü)")
+    parser.add_argument("--vector-backend", default="chroma", help="--db-path verildiğinde depo arka ucu")
+    parser.add_argument("--question", default="Bootcamp sertifikası ne zaman verilir?")
+    parser.add_argument("--gemini", action="store_true", help="Sahte model yerine gerçek Gemini çağrısı yap")
+    parser.add_argument("--output", help="JSON raporun yazılacağı dosya")
+    args = parser.parse_args()
+
+    report = run(args)
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as f:
+            json.dump(report, f, ensure_ascii=False, indent=2)
+    print("\n".join(report["table"]))
@@ -0,0 +1,101 @@
+"""
+Vektör deposu karşılaştırması: ChromaDB vs süreç içi NumPy deposu
+
+Aynı dokümanlar iki depoya da yazılır, ardından tekil ve toplu (batch)
+MMR aramalarının gecikmesi ölçülür. Sorgu embedding'leri önceden
+hesaplanır; yalnızca depo araması ölçülür.
+
+Kullanım:
+    python -m benchmarks.vector_store
+    python -m benchmarks.vector_store --queries 200 --batch 4
+"""
+
+import os
+import time
+import json
+import argparse
+import tempfile
+import statistics
+
+from langchain_huggingface import HuggingFaceEmbeddings
+
+from core.vector_store import create_vector_store, VECTOR_BACKENDS
+from core.indexer import document_id
+from core.ingestion import iter_documents
+from setup_database import DATA_FILES, EMBEDDING_MODEL
+
+
+def _percentile(values, q):
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(q * len(ordered)))]
+
+
+def _summary(samples_ms):
+    return {
+        "p50_ms": round(statistics.median(samples_ms), 3),
+        "p95_ms": round(_percentile(samples_ms, 0.95), 3),
+        "mean_ms": round(statistics.fmean(samples_ms), 3)
+    }
+
+
+def run(num_queries: int, batch_size: int, k: int, fetch_k: int, lambda_mult: float) -> dict:
+    embeddings = HuggingFaceEmbeddings(model_name=EMBEDDING_MODEL, model_kwargs={'device': 'cpu'})
+    documents = list(iter_documents(DATA_FILES))
+    texts = [d.page_content for d in documents]
+    unique = {document_id(d): (d.page_content, d.metadata) for d in documents}
+
+    # Dokümanlar bir kez embed edilir, iki depo da aynı vektörleri alır
+    unique_texts = [t for t, _ in unique.values()]
+    vectors = dict(zip(unique_texts, embeddings.embed_documents(unique_texts)))
+
+    class _Precomputed:
+        def embed_documents(self, batch):
+            return [vectors[t] for t in batch]
+
+        def embed_query(self, text):
+            return embeddings.embed_query(text)
+
+    questions = [t.partition("\nCevap: ")[0][len("Soru: "):] for t in texts[:num_queries]]
+    query_vectors = embeddings.embed_documents(questions)
+
+    results = {"documents": len(unique), "queries": len(questions), "batch_size": batch_size}
+    with tempfile.TemporaryDirectory() as tmp:
+        for backend in VECTOR_BACKENDS:
+            store = create_vector_store(backend, os.path.join(tmp, backend), _Precomputed(), "bench")
+            store.add_texts(
+                unique_texts,
+                metadatas=[m for _, m in unique.values()],
+                ids=list(unique)
+            )
+
+            single = []
+            for vector in query_vectors:
+                start = time.perf_counter()
+                store.max_marginal_relevance_search_by_vector(vector, k=k, fetch_k=fetch_k, lambda_mult=lambda_mult)
+                single.append((time.perf_counter() - start) * 1000)
+
+            batched = []
+            for i in range(0, len(query_vectors), batch_size):
+                chunk = query_vectors[i:i + batch_size]
+                start = time.perf_counter()
+                if hasattr(store, "max_marginal_relevance_search_batch"):
+                    store.max_marginal_relevance_search_batch(chunk, k=k, fetch_k=fetch_k, lambda_mult=lambda_mult)
+                else:
+                    for vector in chunk:
+                        store.max_marginal_relevance_search_by_vector(vector, k=k, fetch_k=fetch_k, lambda_mult=lambda_mult)
+                batched.append((time.perf_counter() - start) * 1000)
+
+            results[backend] = {"mmr_single": _summary(single), "mmr_batch": _summary(batched)}
+    return results
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="ChromaDB ve NumPy vektör deposu gecikme karşılaştırması")
+    parser.add_argument("--queries", type=int, default=100)
+    parser.add_argument("--batch", type=int, default=4, help="Toplu aramada sorgu sayısı (orijinal + varyantlar)")
+    parser.add_argument("--k", type=int, default=5)
+    parser.add_argument("--fetch-k", type=int, default=25)
+    parser.add_argument("--lambda-mult", type=float, default=0.6)
+    args = parser.parse_args()
+
+    print(json.dumps(run(args.queries, args.batch, args.k, args.fetch_k, args.lambda_mult), indent=2))
@@ -9,15 +9,22 @@ temel bileşenlerini içerir.
 Kullanım:
     from core.rag_pipeline import RAGPipeline
     from core.rag_pipeline import validate_answer, preprocess_query
+
+`import core` hafiftir; rag_pipeline (ve langchain) ilk erişimde yüklenir.
 """
 
 __version__ = "1.0.3"
 __author__ = "Onur Tilki"
 
-from .rag_pipeline import RAGPipeline, validate_answer, preprocess_query
-
 __all__ = [
     "RAGPipeline",
     "validate_answer", 
     "preprocess_query"
 ]
+
+
+def __getattr__(name):
+    if name in __all__:
+        from . import rag_pipeline
+        return getattr(rag_pipeline, name)
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
@@ -0,0 +1,288 @@
+"""
+Sürümlü, değişmez indeks artifact'leri ve kesintisiz sürüm değişimi
+
+İndeks çevrimdışı (setup_database.py) olarak kök klasör altında yeni bir
+sürüm klasörüne kurulur:
+
+    <root>/versions/<sürüm>/      vektör deposu, kanonik/niyet/BM25 indeksleri
+    <root>/versions/<sürüm>/artifact.json   manifest (model, veri hash'leri, doküman sayısı)
+    <root>/CURRENT                etkin sürümün adı
+
+Yayınlanan bir sürüm bir daha yazılmaz; uygulama onu salt okunur açar.
+Yeni sürüm tamamen kurulduktan sonra CURRENT atomik olarak (tmp +
+os.replace) değiştirilir. HotSwapIndex CURRENT'ı izler, yeni sürümü arka
+planda yükler ve tek bir referans atamasıyla devreye alır; değişimden önce
+başlamış sorgular eski nesneyle tamamlanır.
+"""
+
+import os
+import json
+import time
+import uuid
+import shutil
+import threading
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+from .indexer import load_manifest
+
+
+VERSIONS_DIRNAME = "versions"
+CURRENT_FILENAME = "CURRENT"
+ARTIFACT_MANIFEST_FILENAME = "artifact.json"
+KEEP_VERSIONS = 3
+
+
+def _versions_dir(root: str) -> str:
+    return os.path.join(root, VERSIONS_DIRNAME)
+
+
+def read_artifact_manifest(path: str) -> Dict:
+    """Sürüm klasörünün manifest'i; yayınlanmamışsa boş sözlük"""
+    try:
+        with open(os.path.join(path, ARTIFACT_MANIFEST_FILENAME), 'r', encoding='utf-8') as f:
+            return json.load(f)
+    except (OSError, json.JSONDecodeError):
+        return {}
+
+
+def current_version(root: str) -> Optional[str]:
+    """CURRENT'ın gösterdiği yayınlanmış sürüm; yoksa None"""
+    try:
+        with open(os.path.join(root, CURRENT_FILENAME), 'r', encoding='utf-8') as f:
+            version = f.read().strip()
+    except OSError:
+        return None
+    if version and read_artifact_manifest(os.path.join(_versions_dir(root), version)):
+        return version
+    return None
+
+
+def set_current(root: str, version: str):
+    """CURRENT'ı atomik olarak yeni sürüme çevirir"""
+    path = os.path.join(root, CURRENT_FILENAME)
+    tmp_path = f"{path}.{uuid.uuid4().hex}.tmp"
+    with open(tmp_path, 'w', encoding='utf-8') as f:
+        f.write(version)
+    os.replace(tmp_path, path)
+
+
+def resolve_artifact(root: str) -> Optional[Tuple[str, str, Dict]]:
+    """
+    Yüklenecek indeks: (sürüm, klasör, manifest). Sürümlü düzen yoksa
+    kökteki eski tek klasör düzeni ("legacy") kullanılır; hiçbiri yoksa None.
+    """
+    version = current_version(root)
+    if version is not None:
+        path = os.path.join(_versions_dir(root), version)
+        return version, path, read_artifact_manifest(path)
+
+    manifest = load_manifest(root)
+    if manifest:
+        return "legacy", root, manifest
+    return None
+
+
+def list_versions(root: str) -> List[str]:
+    """Yayınlanmış sürümler, eskiden yeniye"""
+    versions_dir = _versions_dir(root)
+    if not os.path.isdir(versions_dir):
+        return []
+    return sorted(
+        name for name in os.listdir(versions_dir)
+        if read_artifact_manifest(os.path.join(versions_dir, name))
+    )
+
+
+def _pending_version(root: str) -> Optional[str]:
+    """Kurulumu yarıda kalmış (manifest'i yazılmamış) en yeni sürüm klasörü"""
+    versions_dir = _versions_dir(root)
+    if not os.path.isdir(versions_dir):
+        return None
+    pending = sorted(
+        name for name in os.listdir(versions_dir)
+        if not name.startswith(".")
+        and os.path.isdir(os.path.join(versions_dir, name))
+        and not read_artifact_manifest(os.path.join(versions_dir, name))
+    )
+    return pending[-1] if pending else None
+
+
+def _new_version() -> str:
+    """İsim sırası zaman sırasıdır: 20250101-120000-1a2b3c"""
+    return f"{time.strftime('%Y%m%d-%H%M%S')}-{uuid.uuid4().hex[:6]}"
+
+
+def prune_versions(root: str, keep: int = KEEP_VERSIONS, log: Callable[[str], None] = lambda message: None):
+    """
+    En yeni `keep` sürüm ve CURRENT dışındakileri siler. Eski sürümü hâlâ
+    kullanan bir süreç varsa keep, değişim süresini karşılayacak kadar
+    büyük tutulmalıdır.
+    """
+    current = current_version(root)
+    versions = list_versions(root)
+    for version in versions[:max(0, len(versions) - keep)]:
+        if version != current:
+            shutil.rmtree(os.path.join(_versions_dir(root), version), ignore_errors=True)
+            log(f"Eski indeks sürümü silindi: {version}")
+
+
+def publish_artifact(
+    root: str,
+    build: Callable[[str], Dict],
+    incremental: bool = True,
+    keep: int = KEEP_VERSIONS,
+    log: Callable[[str], None] = lambda message: None
+) -> Dict:
+    """
+    Yeni bir sürüm klasörü kurar ve yayınlar.
+
+    build(path) indeksi verilen klasöre kurar ve build_index istatistiklerini
+    döner. incremental=True ise klasör etkin sürümün kopyasıyla başlar,
+    böylece sadece değişen dokümanlar embed edilir; veri değişmediyse yeni
+    sürüm yayınlanmaz. Yarıda kalmış bir kurulum varsa aynı klasörde
+    checkpoint'ten devam edilir.
+
+    Returns:
+        {"version": str, "path": str, "published": bool, "stats": Dict}
+    """
+    current = current_version(root)
+    version = _pending_version(root)
+    base_copied = False
+    if version is not None:
+        log(f"Yarıda kalan sürüm sürdürülüyor: {version}")
+        path = os.path.join(_versions_dir(root), version)
+    else:
+        version = _new_version()
+        path = os.path.join(_versions_dir(root), version)
+        if incremental and current is not None:
+            # Yarım kopya yarım kalmış bir kurulum sanılmasın diye gizli adla kopyalanır
+            tmp_path = os.path.join(_versions_dir(root), f".{version}.tmp")
+            shutil.copytree(os.path.join(_versions_dir(root), current), tmp_path)
+            os.remove(os.path.join(tmp_path, ARTIFACT_MANIFEST_FILENAME))
+            os.replace(tmp_path, path)
+            base_copied = True
+        else:
+            os.makedirs(path)
+
+    stats = build(path)
+
+    if base_copied and not stats["changed"]:
+        shutil.rmtree(path, ignore_errors=True)
+        log(f"Veri değişmedi, etkin sürüm korunuyor: {current}")
+        return {"version": current, "path": os.path.join(_versions_dir(root), current), "published": False, "stats": stats}
+
+    manifest = {
+        "version": version,
+        "created_at": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        "previous_version": current,
+        **load_manifest(path)
+    }
+    # Manifest en son yazılır: manifest'i olmayan klasör yayınlanmamış sayılır
+    with open(os.path.join(path, ARTIFACT_MANIFEST_FILENAME), 'w', encoding='utf-8') as f:
+        json.dump(manifest, f, ensure_ascii=False, indent=2)
+
+    set_current(root, version)
+    log(f"Yeni indeks sürümü yayınlandı: {version}")
+    prune_versions(root, keep, log)
+    return {"version": version, "path": path, "published": True, "stats": stats}
+
+
+class HotSwapIndex:
+    """
+    Etkin indeks sürümüne bağlı nesneyi (ör. RAGPipeline) tutar.
+
+    load(path, manifest, previous) yeni sürüm için nesneyi oluşturur;
+    previous o anki nesnedir (ilk yüklemede None), paylaşılabilir
+    bileşenleri (LLM, embedding, oturumlar) yeniden kullanmak içindir.
+    Çağıranlar `current`'ı istek başında bir kez okur ve istek boyunca
+    o nesneyi kullanır.
+    """
+
+    def __init__(
+        self,
+        root: str,
+        load: Callable[[str, Dict, Optional[Any]], Any],
+        poll_interval: float = 30.0,
+        log: Callable[[str], None] = lambda message: None
+    ):
+        self.root = root
+        self.load = load
+        self.poll_interval = poll_interval
+        self.log = log
+        self.swaps = 0
+        self.last_error: Optional[str] = None
+        self._current: Optional[Tuple[str, Any]] = None
+        self._load_lock = threading.Lock()
+        self._loading = False
+        self._stop = threading.Event()
+        self._poller: Optional[threading.Thread] = None
+
+    @property
+    def current(self) -> Optional[Any]:
+        current = self._current
+        return current[1] if current else None
+
+    @property
+    def version(self) -> Optional[str]:
+        current = self._current
+        return current[0] if current else None
+
+    @property
+    def loading(self) -> bool:
+        return self._loading
+
+    def refresh(self) -> bool:
+        """CURRENT farklı bir sürümü gösteriyorsa yükleyip devreye alır"""
+        with self._load_lock:
+            resolved = resolve_artifact(self.root)
+            if resolved is None or resolved[0] == self.version:
+                return False
+
+            version, path, manifest = resolved
+            self._loading = True
+            try:
+                loaded = self.load(path, manifest, self.current)
+            except Exception as e:
+                self.last_error = f"{version}: {e}"
+                self.log(f"İndeks sürümü yüklenemedi ({version}): {e}")
+                return False
+            finally:
+                self._loading = False
+
+            previous = self.version
+            self._current = (version, loaded)
+            self.last_error = None
+            if previous is not None:
+                self.swaps += 1
+            self.log(f"İndeks sürümü devrede: {version}" + (f" (önceki: {previous})" if previous else ""))
+            return True
+
+    def refresh_async(self) -> bool:
+        """refresh'i arka planda başlatır; bir yükleme sürüyorsa False"""
+        if self._loading:
+            return False
+        threading.Thread(target=self.refresh, name="index-refresh", daemon=True).start()
+        return True
+
+    def start_polling(self):
+        """CURRENT'ı poll_interval saniyede bir kontrol eden arka plan thread'i"""
+        if self._poller is not None or self.poll_interval <= 0:
+            return
+
+        def poll():
+            while not self._stop.wait(self.poll_interval):
+                self.refresh()
+
+        self._poller = threading.Thread(target=poll, name="index-poller", daemon=True)
+        self._poller.start()
+
+    def stop(self):
+        self._stop.set()
+
+    def get_stats(self) -> Dict:
+        return {
+            "version": self.version,
+            "loading": self._loading,
+            "swaps": self.swaps,
+            "last_error": self.last_error
+        }
@@ -0,0 +1,111 @@
+"""
+Toplu (batched) çoklu sorgu retrieval
+
+MultiQueryRetriever orijinal soruyu ve her varyantı sırayla retriever'dan
+geçirir; her geçiş ayrı bir embedding hesabı ve vektör araması demektir.
+Bu retriever tüm sorguları tek bir embed_documents çağrısıyla embed eder,
+MMR aramalarını tek matris araması (NumPy deposu) ya da eşzamanlı
+aramalar (Chroma) olarak yapar ve sonuçları RRF ile birleştirir.
+4 sorguluk bir plan, tek sorguya yakın sürede cevaplanır.
+"""
+
+import asyncio
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Dict, List, Optional
+
+from langchain_core.callbacks import CallbackManagerForRetrieverRun
+from langchain_core.documents import Document
+from langchain_core.embeddings import Embeddings
+from langchain_core.retrievers import BaseRetriever
+
+from .hybrid_retriever import reciprocal_rank_fusion, _doc_key
+from .lexical_index import query_terms
+
+
+def _cluster_key(doc: Document) -> str:
+    """Aynı parafraz kümesinin anahtarları tek doküman sayılır"""
+    return doc.metadata.get("cluster_id") or _doc_key(doc)
+
+
+class BatchedMultiQueryRetriever(BaseRetriever):
+    """Sorgu listesini tek embedding çağrısı ve toplu MMR ile arayan retriever"""
+
+    vectordb: Any
+    embeddings: Embeddings
+    lexical_index: Any = None
+    k: int = 10
+    per_query_k: int = 5
+    fetch_k: int = 25
+    lambda_mult: float = 0.6
+    lexical_k: int = 10
+    rrf_k: int = 60
+    synonym_weight: float = 0.3
+    max_workers: int = 8
+
+    def retrieve(self, queries: List[str], vectors: Optional[Dict[str, Any]] = None) -> List[Document]:
+        """Tüm sorguları tek seferde arar; birleştirilmiş ilk k dokümanı döner"""
+        return self.retrieve_many([queries], vectors)[0]
+
+    def retrieve_many(
+        self,
+        query_lists: List[List[str]],
+        vectors: Optional[Dict[str, Any]] = None
+    ) -> List[List[Document]]:
+        """
+        Birden çok sorunun sorgu listelerini birlikte arar: tekrarsız tüm
+        sorgular tek embed_documents çağrısı ve tek toplu MMR araması ile
+        işlenir, RRF her liste için ayrı yapılır.
+
+        vectors, embedding'i zaten hesaplanmış sorguları (ör. pipeline'ın
+        yönlendirme için embed ettiği soru) vektörlerine eşler; bunlar
+        tekrar embed edilmez.
+        """
+        query_lists = [list(dict.fromkeys(queries)) for queries in query_lists]
+        unique = list(dict.fromkeys(query for queries in query_lists for query in queries))
+        if not unique:
+            return [[] for _ in query_lists]
+
+        known = dict(vectors or {})
+        missing = [query for query in unique if query not in known]
+        if missing:
+            known.update(zip(missing, self.embeddings.embed_documents(missing)))
+        dense = dict(zip(unique, self._dense_search([known[query] for query in unique])))
+        lexical = {}
+        if self.lexical_index is not None:
+            lexical = {
+                query: [doc for doc, _ in self.lexical_index.search(
+                    query_terms(query, self.synonym_weight), k=self.lexical_k
+                )]
+                for query in unique
+            }
+
+        results = []
+        for queries in query_lists:
+            rankings = [dense[query] for query in queries] + [lexical[query] for query in queries if query in lexical]
+            results.append(reciprocal_rank_fusion(rankings, self.rrf_k, key=_cluster_key)[:self.k] if queries else [])
+        return results
+
+    async def aretrieve(self, queries: List[str], vectors: Optional[Dict[str, Any]] = None) -> List[Document]:
+        # Embedding ve arama CPU'da çalışır; olay döngüsünü bloklamamak için thread'e alınır
+        return await asyncio.get_running_loop().run_in_executor(None, self.retrieve, queries, vectors)
+
+    def _dense_search(self, vectors: List[List[float]]) -> List[List[Document]]:
+        if hasattr(self.vectordb, "max_marginal_relevance_search_batch"):
+            return self.vectordb.max_marginal_relevance_search_batch(
+                vectors, k=self.per_query_k, fetch_k=self.fetch_k, lambda_mult=self.lambda_mult
+            )
+
+        def search(vector: List[float]) -> List[Document]:
+            return self.vectordb.max_marginal_relevance_search_by_vector(
+                vector, k=self.per_query_k, fetch_k=self.fetch_k, lambda_mult=self.lambda_mult
+            )
+
+        if len(vectors) == 1:
+            return [search(vectors[0])]
+        with ThreadPoolExecutor(max_workers=min(self.max_workers, len(vectors))) as executor:
+            return list(executor.map(search, vectors))
+
+    def _get_relevant_documents(
+        self, query: str, *, run_manager: CallbackManagerForRetrieverRun
+    ) -> List[Document]:
+        return self.retrieve([query])
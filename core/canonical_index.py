@@ -0,0 +1,127 @@
+"""
+Kanonik cevap indeksi
+
+enriched_dataset.jsonl içindeki canonical_question / canonical_answer
+alanlarından önceden hesaplanmış bir indeks oluşturur. Gelen soru bir
+kanonik kümeye yeterince yakınsa cevap LLM çağrısı yapılmadan döner.
+"""
+
+import os
+import json
+from typing import Dict, List, Optional
+
+import numpy as np
+
+
+CANONICAL_INDEX_DIRNAME = "canonical_index"
+VECTORS_FILENAME = "vectors.npy"
+CLUSTERS_FILENAME = "clusters.json"
+
+
+def _normalize_rows(matrix: np.ndarray) -> np.ndarray:
+    norms = np.linalg.norm(matrix, axis=1, keepdims=True)
+    norms[norms == 0] = 1.0
+    return matrix / norms
+
+
+class CanonicalIndex:
+    """Kanonik soru kümeleri için vektör indeksi"""
+
+    def __init__(self, vectors: np.ndarray, key_clusters: List[int], clusters: List[Dict]):
+        self.vectors = vectors.astype(np.float32)
+        self.key_clusters = np.asarray(key_clusters, dtype=np.int32)
+        self.clusters = clusters
+
+    def __len__(self) -> int:
+        return len(self.clusters)
+
+    @classmethod
+    def build(cls, file_path: str, embeddings) -> "CanonicalIndex":
+        """
+        Veri dosyasındaki soruları canonical_question alanına göre gruplar.
+        Her küme için kanonik soru ve tüm soru varyasyonları arama anahtarı olur.
+        """
+        clusters: List[Dict] = []
+        cluster_by_question: Dict[str, int] = {}
+        keys: List[str] = []
+        key_clusters: List[int] = []
+        seen_keys = set()
+
+        with open(file_path, 'r', encoding='utf-8') as f:
+            for line in f:
+                try:
+                    data = json.loads(line)
+                except json.JSONDecodeError:
+                    continue
+
+                canonical_question = (data.get("canonical_question") or "").strip()
+                canonical_answer = (data.get("canonical_answer") or "").strip()
+                if not canonical_question or not canonical_answer:
+                    continue
+
+                if canonical_question not in cluster_by_question:
+                    cluster_by_question[canonical_question] = len(clusters)
+                    clusters.append({
+                        "canonical_question": canonical_question,
+                        "canonical_answer": canonical_answer,
+                        "category": data.get("category") or ""
+                    })
+
+                cluster_id = cluster_by_question[canonical_question]
+                for key in (canonical_question, (data.get("question") or "").strip()):
+                    if key and (key, cluster_id) not in seen_keys:
+                        seen_keys.add((key, cluster_id))
+                        keys.append(key)
+                        key_clusters.append(cluster_id)
+
+        if not keys:
+            raise ValueError(f"Kanonik soru bulunamadı: {file_path}")
+
+        vectors = _normalize_rows(np.asarray(embeddings.embed_documents(keys), dtype=np.float32))
+        return cls(vectors, key_clusters, clusters)
+
+    def save(self, directory: str):
+        os.makedirs(directory, exist_ok=True)
+        np.save(os.path.join(directory, VECTORS_FILENAME), self.vectors)
+        with open(os.path.join(directory, CLUSTERS_FILENAME), 'w', encoding='utf-8') as f:
+            json.dump({
+                "key_clusters": self.key_clusters.tolist(),
+                "clusters": self.clusters
+            }, f, ensure_ascii=False)
+
+    @classmethod
+    def load(cls, directory: str) -> Optional["CanonicalIndex"]:
+        """İndeks yoksa None döner"""
+        vectors_path = os.path.join(directory, VECTORS_FILENAME)
+        clusters_path = os.path.join(directory, CLUSTERS_FILENAME)
+        if not (os.path.exists(vectors_path) and os.path.exists(clusters_path)):
+            return None
+
+        with open(clusters_path, 'r', encoding='utf-8') as f:
+            data = json.load(f)
+        return cls(np.load(vectors_path), data["key_clusters"], data["clusters"])
+
+    def match(self, query_vector, threshold: float) -> Optional[Dict]:
+        """
+        Sorgu vektörüne en yakın kanonik kümeyi bulur.
+        Benzerlik eşiğin altındaysa None döner.
+        """
+        query = np.asarray(query_vector, dtype=np.float32)
+        norm = np.linalg.norm(query)
+        if norm == 0:
+            return None
+
+        scores = self.vectors @ (query / norm)
+        best = int(np.argmax(scores))
+        score = float(scores[best])
+        if score < threshold:
+            return None
+
+        return dict(self.clusters[int(self.key_clusters[best])], score=score)
+
+
+def build_canonical_index(file_path: str, embeddings, db_path: str) -> CanonicalIndex:
+    """Kanonik indeksi oluşturur ve veritabanı klasörüne kaydeder"""
+    index = CanonicalIndex.build(file_path, embeddings)
+    index.save(os.path.join(db_path, CANONICAL_INDEX_DIRNAME))
+    return index
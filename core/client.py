@@ -0,0 +1,101 @@
+"""
+MentorMate HTTP servisinin (server.py) istemcisi
+
+Streamlit arayüzünün ince istemci modunda ve bot entegrasyonlarında
+kullanılır. Arayüzün kullandığı yüzey PipelineService ile aynıdır
+(status, get_stats, refresh_index, pipeline.astream_query, ...); böylece
+arayüz pipeline'ın süreç içinde mi uzakta mı olduğunu bilmez.
+"""
+
+import json
+from typing import AsyncIterator, Dict, List, Optional
+
+import httpx
+
+from .llm_gateway import LLMGatewayError
+
+
+class ServiceError(Exception):
+    """Servis isteği başarısız oldu"""
+
+
+def _raise_for_status(response: httpx.Response):
+    if response.status_code < 400:
+        return
+    try:
+        body = response.json()
+    except ValueError:
+        body = {"detail": response.text}
+    detail = body.get("detail") or f"HTTP {response.status_code}"
+    if response.status_code == 503 and body.get("busy"):
+        raise LLMGatewayError(detail)
+    raise ServiceError(f"{detail} (HTTP {response.status_code})")
+
+
+class MentorMateClient:
+    """Senkron uçlar için httpx.Client, akış için istek başına httpx.AsyncClient"""
+
+    def __init__(self, base_url: str, timeout: float = 120.0):
+        self.base_url = base_url.rstrip("/")
+        self.timeout = timeout
+        self.http = httpx.Client(base_url=self.base_url, timeout=timeout)
+
+    @property
+    def pipeline(self) -> "MentorMateClient":
+        """PipelineService ile aynı arayüz: sorgu metotları istemcinin kendisindedir"""
+        return self
+
+    def status(self) -> Dict:
+        """/health; servise ulaşılamazsa "starting" döner"""
+        try:
+            response = self.http.get("/health")
+        except httpx.HTTPError as e:
+            return {"ready": False, "state": "starting", "current_phase": None, "progress": 0.0,
+                    "error": None, "index_version": None, "unreachable": str(e)}
+        return response.json()
+
+    def get_stats(self) -> Dict:
+        response = self.http.get("/stats")
+        _raise_for_status(response)
+        return response.json()
+
+    def get_prometheus_metrics(self) -> str:
+        response = self.http.get("/metrics")
+        _raise_for_status(response)
+        return response.text
+
+    def refresh_index(self) -> bool:
+        response = self.http.post("/index/refresh")
+        _raise_for_status(response)
+        return response.json()["started"]
+
+    def clear_memory(self, session_id: str):
+        _raise_for_status(self.http.delete(f"/sessions/{session_id}"))
+
+    def query(self, question: str, session_id: Optional[str] = None) -> Dict:
+        response = self.http.post("/query", json={"question": question, "session_id": session_id})
+        _raise_for_status(response)
+        return response.json()
+
+    def query_batch(self, questions: List[str], max_concurrency: int = 4) -> List[Dict]:
+        response = self.http.post("/batch", json={"questions": list(questions), "max_concurrency": max_concurrency})
+        _raise_for_status(response)
+        return response.json()["results"]
+
+    async def astream_query(self, question: str, session_id: Optional[str] = None) -> AsyncIterator[Dict]:
+        """RAGPipeline.astream_query ile aynı olaylar (SSE üzerinden)"""
+        payload = {"question": question, "session_id": session_id, "stream": True}
+        async with httpx.AsyncClient(base_url=self.base_url, timeout=self.timeout) as http:
+            async with http.stream("POST", "/query", json=payload, headers={"Accept": "text/event-stream"}) as response:
+                if response.status_code >= 400:
+                    await response.aread()
+                    _raise_for_status(response)
+                async for line in response.aiter_lines():
+                    if not line.startswith("data:"):
+                        continue
+                    event = json.loads(line[len("data:"):])
+                    if event["type"] == "error":
+                        if event.get("busy"):
+                            raise LLMGatewayError(event["detail"])
+                        raise ServiceError(event["detail"])
+                    yield event
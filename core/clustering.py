@@ -0,0 +1,194 @@
+"""
+İndeksleme zamanında tekrar temizleme ve parafraz kümeleme
+
+generated_data_google.jsonl, enriched_dataset.jsonl'deki soruların
+Gemini parafrazlarından oluştuğu için indeksteki dokümanların çoğu
+birbirinin neredeyse aynısıdır. Bu modül dokümanları önce
+canonical_question alanına, sonra soru embedding benzerliğine göre
+kümeler. Küme tek bir ortak cevap taşır; kümedeki her farklı soru metni
+bu cevapla ayrı bir anahtar (vektör ve BM25 dokümanı) olarak indekslenir,
+böylece hiçbir parafraz aranabilirliğini kaybetmez. Anahtarların hepsi
+cluster_id ile aynı cevaba işaret eder; aynı cevabın tekrarları retrieval
+ve bağlam paketlemede cluster_id üzerinden tek dokümana indirilir.
+
+Kümeleme dokümanları belleğe almaz; kaynak üç kez akış halinde okunur:
+1. kanonik sorusu olan dokümanlar kümeleri açar,
+2. diğer dokümanlar eşlenen ya da en yakın kümeye eklenir (yoksa yeni küme),
+3. dokümanlar kümenin ortak cevabıyla üretilir.
+Bellekte sadece küme merkezleri, cevap sayaçları ve soru metni → küme
+eşlemesi tutulur; sorular batch_size'lık gruplarla embed edilir.
+"""
+
+import hashlib
+from collections import Counter
+from typing import Callable, Dict, Iterable, Iterator, List, Optional, Tuple
+
+import numpy as np
+from langchain_core.documents import Document
+
+from .ingestion import batched
+
+
+def split_qa(page_content: str) -> Tuple[str, str]:
+    """"Soru: ...\\nCevap: ..." biçimindeki içeriği (soru, cevap) olarak ayırır"""
+    question, _, answer = page_content.partition("\nCevap: ")
+    if question.startswith("Soru: "):
+        question = question[len("Soru: "):]
+    return question.strip(), answer.strip()
+
+
+def _normalize_rows(matrix: np.ndarray) -> np.ndarray:
+    norms = np.linalg.norm(matrix, axis=1, keepdims=True)
+    norms[norms == 0] = 1.0
+    return matrix / norms
+
+
+def iter_clustered_documents(
+    load_documents: Callable[[], Iterable[Document]],
+    embeddings,
+    similarity_threshold: float = 0.92,
+    batch_size: int = 256,
+    log: Callable[[str], None] = lambda message: None
+) -> Iterator[Document]:
+    """
+    Soru/Cevap dokümanlarını kümeler; kümedeki her farklı soru için
+    kümenin ortak cevabını ve cluster_id / canonical_question
+    metadata'sını taşıyan bir doküman üretir.
+
+    load_documents her çağrıda dokümanları baştan üreten bir fonksiyondur.
+    Kanonik sorusu olmayan dokümanlar en yakın küme merkezine eşik
+    üstündeyse eklenir, değilse yeni küme açar.
+    """
+    clusters = _ClusterPlan(embeddings, similarity_threshold)
+    canonical_by_question: Dict[str, str] = {}
+    documents = 0
+
+    for batch in batched(load_documents(), batch_size):
+        documents += len(batch)
+        keyed = []
+        for doc in batch:
+            key = doc.metadata.get("canonical_question")
+            if key:
+                question, answer = split_qa(doc.page_content)
+                canonical_by_question.setdefault(question, key)
+                keyed.append((question, answer, key, doc.metadata.get("canonical_answer")))
+        clusters.add(keyed)
+
+    for batch in batched(load_documents(), batch_size):
+        rest = []
+        for doc in batch:
+            if doc.metadata.get("canonical_question"):
+                continue
+            question, answer = split_qa(doc.page_content)
+            # Parafraz dosyalarında canonical_question yok; aynı soru metni üzerinden eşle
+            rest.append((question, answer, canonical_by_question.get(question), doc.metadata.get("canonical_answer")))
+        clusters.add(rest)
+
+    log(f"{documents} doküman {len(clusters)} kümede {len(clusters.assignment)} parafraz anahtarına indirildi")
+
+    emitted = set()
+    for doc in load_documents():
+        question, _ = split_qa(doc.page_content)
+        # Aynı soru metninin kopyaları aynı anahtardır; ilki tutulur
+        if question in emitted or question not in clusters.assignment:
+            continue
+        emitted.add(question)
+        answer, cluster_metadata = clusters.resolve(question)
+        yield Document(
+            page_content=f"Soru: {question}\nCevap: {answer}",
+            metadata={**doc.metadata, **cluster_metadata}
+        )
+
+
+def cluster_documents(
+    documents: List[Document],
+    embeddings,
+    similarity_threshold: float = 0.92
+) -> List[Document]:
+    """Bellekteki doküman listesi için iter_clustered_documents"""
+    return list(iter_clustered_documents(lambda: documents, embeddings, similarity_threshold))
+
+
+class _ClusterPlan:
+    """Küme merkezleri, cevap sayaçları ve soru → küme eşlemesi"""
+
+    def __init__(self, embeddings, similarity_threshold: float):
+        self.embeddings = embeddings
+        self.similarity_threshold = similarity_threshold
+        self.assignment: Dict[str, int] = {}
+        self.clusters: List[Dict] = []
+        self.cluster_by_key: Dict[str, int] = {}
+        self.centroids: Optional[np.ndarray] = None
+
+    def __len__(self) -> int:
+        return len(self.clusters)
+
+    def add(self, rows: List[Tuple[str, str, Optional[str], Optional[str]]]):
+        """(soru, cevap, kanonik soru, kanonik cevap) satırlarını kümelere ekler"""
+        new_questions = list(dict.fromkeys(q for q, _, _, _ in rows if q not in self.assignment))
+        vectors = {}
+        if new_questions:
+            matrix = _normalize_rows(np.asarray(self.embeddings.embed_documents(new_questions), dtype=np.float32))
+            vectors = dict(zip(new_questions, matrix))
+
+        for question, answer, key, canonical_answer in rows:
+            index = self.assignment.get(question)
+            if index is None:
+                index = self._place(question, key, vectors[question])
+            cluster = self.clusters[index]
+            if canonical_answer and not cluster["canonical_answer"]:
+                cluster["canonical_answer"] = canonical_answer
+            cluster["answers"][answer] += 1
+
+    def _place(self, question: str, key: Optional[str], vector: np.ndarray) -> int:
+        if key is not None:
+            index = self.cluster_by_key.get(key)
+            if index is None:
+                index = self._open(key, question)
+                self.cluster_by_key[key] = index
+        else:
+            index, score = self._nearest(vector)
+            if index is None or score < self.similarity_threshold:
+                index = self._open(None, question)
+
+        cluster = self.clusters[index]
+        cluster["sum"] = vector if cluster["sum"] is None else cluster["sum"] + vector
+        self._set_centroid(index, cluster["sum"])
+        self.assignment[question] = index
+        return index
+
+    def _open(self, key: Optional[str], question: str) -> int:
+        cluster_key = key or question
+        self.clusters.append({
+            "cluster_id": hashlib.sha1(cluster_key.encode("utf-8")).hexdigest()[:16],
+            "canonical_question": key,
+            "canonical_answer": None,
+            "answers": Counter(),
+            "sum": None
+        })
+        return len(self.clusters) - 1
+
+    def _set_centroid(self, index: int, total: np.ndarray):
+        if self.centroids is None or index >= len(self.centroids):
+            # Merkez matrisinin kapasitesi katlanarak büyür
+            grown = np.zeros((max(64, 2 * index), len(total)), dtype=np.float32)
+            if self.centroids is not None:
+                grown[:len(self.centroids)] = self.centroids
+            self.centroids = grown
+        self.centroids[index] = total / (np.linalg.norm(total) or 1.0)
+
+    def _nearest(self, vector: np.ndarray) -> Tuple[Optional[int], float]:
+        if not self.clusters:
+            return None, -1.0
+        scores = self.centroids[:len(self.clusters)] @ vector
+        best = int(np.argmax(scores))
+        return best, float(scores[best])
+
+    def resolve(self, question: str) -> Tuple[str, Dict]:
+        """Sorunun kümesinin ortak cevabı ve anahtarlara yazılacak metadata"""
+        cluster = self.clusters[self.assignment[question]]
+        answer = cluster["canonical_answer"] or cluster["answers"].most_common(1)[0][0]
+        metadata = {"cluster_id": cluster["cluster_id"]}
+        if cluster["canonical_question"]:
+            metadata["canonical_question"] = cluster["canonical_question"]
+        return answer, metadata
@@ -0,0 +1,86 @@
+"""
+Cevap güven kontrolü
+
+Cevabın kaynak dokümanlara dayanıp dayanmadığı, cevaptaki kelime
+köklerinin dokümanların kök kümeleriyle kesişimiyle ölçülür. Doküman
+kök kümeleri indeksleme sırasında hesaplanıp metadata'daki "tokens"
+alanına yazılır; eski indekslerdeki dokümanlar için bir kez hesaplanıp
+önbelleğe alınır. _check_confidence ve validate_answer aynı
+implementasyonu kullanır.
+"""
+
+from functools import lru_cache
+from typing import FrozenSet, List, Optional
+
+from langchain_core.documents import Document
+
+from .text_utils import token_set
+
+
+TOKENS_METADATA_KEY = "tokens"
+NO_INFO_KEYWORDS = ["veri setimde", "bilgi bulunmuyor", "bilgim yok"]
+MIN_OVERLAP_RATIO = 0.20
+
+
+def document_tokens_field(text: str) -> str:
+    """İndekslemede metadata'ya yazılacak kök kümesi (Chroma metadata'sı düz metin olmalı)"""
+    return " ".join(sorted(token_set(text)))
+
+
+@lru_cache(maxsize=4096)
+def _parsed_tokens(field: str) -> FrozenSet[str]:
+    return frozenset(field.split())
+
+
+@lru_cache(maxsize=4096)
+def _computed_tokens(text: str) -> FrozenSet[str]:
+    return frozenset(token_set(text))
+
+
+def document_tokens(doc: Document) -> FrozenSet[str]:
+    field = doc.metadata.get(TOKENS_METADATA_KEY)
+    if field is not None:
+        return _parsed_tokens(field)
+    return _computed_tokens(doc.page_content)
+
+
+def has_no_info(answer: str) -> bool:
+    answer_lower = answer.lower()
+    return any(kw in answer_lower for kw in NO_INFO_KEYWORDS)
+
+
+def overlap_ratio(answer: str, source_docs: List[Document]) -> float:
+    """Cevap köklerinden dokümanlarda geçenlerin oranı (cevapta kelime yoksa 1.0)"""
+    answer_tokens = token_set(answer)
+    if not answer_tokens:
+        return 1.0
+
+    unmatched = answer_tokens
+    for doc in source_docs:
+        unmatched = unmatched - document_tokens(doc)
+        if not unmatched:
+            break
+    return 1 - len(unmatched) / len(answer_tokens)
+
+
+def retrieval_confident(source_docs: List[Document], min_score: Optional[float]) -> bool:
+    """
+    Retrieval sırasında hesaplanmış benzerlik skorlarına göre karar verir.
+    Skorları sadece SCORING_BACKENDS'teki depolar yazar; RAGPipeline
+    min_score'u diğer depolarla kabul etmez. Skor taşımayan dokümanlar
+    eleme yapmaz.
+    """
+    if not source_docs:
+        return False
+    if min_score is None:
+        return True
+
+    scores = [doc.metadata["retrieval_score"] for doc in source_docs if "retrieval_score" in doc.metadata]
+    return not scores or max(scores) >= min_score
+
+
+def is_grounded(answer: str, source_docs: List[Document], min_ratio: float = MIN_OVERLAP_RATIO) -> bool:
+    """Cevap "bilgi yok" demiyor ve dokümanlarla yeterince örtüşüyor mu?"""
+    if has_no_info(answer) or not source_docs:
+        return False
+    return overlap_ratio(answer, source_docs) >= min_ratio
@@ -0,0 +1,118 @@
+"""
+Token bütçeli bağlam paketleme
+
+Çoklu sorgu retrieval'ı aynı cevabı taşıyan parafrazları (özellikle
+generated_data_google.jsonl'deki Gemini varyasyonlarını) birden çok kez
+döndürebilir; hepsi prompt'a girerse token, gecikme ve maliyet boşuna
+artar. Retrieval ile üretim arasında:
+
+1. Aynı cevabı taşıyan, aynı parafraz kümesinden gelen veya kök kümeleri
+   çok benzeyen (Jaccard) dokümanlar tek dokümana indirilir; temsilci en
+   alakalı olandır.
+2. Kalanlar birleşik alaka skoruna göre sıralanır: RRF skoru
+   (fusion_score, yoksa sıradan hesaplanır) ve indirilen kopyaların
+   skorları temsilciye eklenir (birden çok sorgunun bulduğu cevap öne çıkar).
+3. Dokümanlar token bütçesi dolana kadar eklenir; ilk doküman her zaman girer.
+
+Token sayıları ~4 karakter/token tahminidir (bkz. metrics).
+"""
+
+import re
+from typing import Dict, List, Optional, Tuple
+
+from langchain_core.documents import Document
+
+from .clustering import split_qa
+from .confidence import document_tokens
+from .metrics import _estimate_tokens
+from .text_utils import normalize_turkish
+
+
+DEFAULT_CONTEXT_TOKEN_BUDGET = 600
+DEFAULT_CONTEXT_SIMILARITY = 0.80
+RRF_K = 60
+# "Evet." gibi kısa cevaplar farklı soruları birleştirmesin diye
+MIN_ANSWER_KEY_WORDS = 4
+
+_WHITESPACE = re.compile(r"\s+")
+
+
+def _answer_key(doc: Document) -> Optional[str]:
+    answer = _WHITESPACE.sub(" ", normalize_turkish(split_qa(doc.page_content)[1])).strip()
+    return answer if len(answer.split()) >= MIN_ANSWER_KEY_WORDS else None
+
+
+def _jaccard(a: frozenset, b: frozenset) -> float:
+    if not a or not b:
+        return 0.0
+    return len(a & b) / len(a | b)
+
+
+class ContextPacker:
+    """Yinelenenleri indirip alaka sırasıyla token bütçesine kadar doküman seçer"""
+
+    def __init__(
+        self,
+        token_budget: int = DEFAULT_CONTEXT_TOKEN_BUDGET,
+        similarity_threshold: float = DEFAULT_CONTEXT_SIMILARITY
+    ):
+        self.token_budget = token_budget
+        self.similarity_threshold = similarity_threshold
+
+    def _collapse(self, documents: List[Document]) -> List[Tuple[Document, float, int]]:
+        """(temsilci, birleşik skor, indirilen kopya sayısı) listesi, girdi sırasıyla"""
+        groups: List[List] = []
+        by_key: Dict[str, int] = {}
+        for rank, doc in enumerate(documents):
+            score = doc.metadata.get("fusion_score", 1.0 / (RRF_K + rank + 1))
+            keys = [k for k in (doc.metadata.get("cluster_id"), _answer_key(doc)) if k]
+            tokens = document_tokens(doc)
+
+            group = next((by_key[k] for k in keys if k in by_key), None)
+            if group is None and self.similarity_threshold < 1.0:
+                group = next(
+                    (i for i, g in enumerate(groups) if _jaccard(tokens, g[3]) >= self.similarity_threshold),
+                    None
+                )
+
+            if group is None:
+                group = len(groups)
+                groups.append([doc, 0.0, -1, tokens])
+            groups[group][1] += score
+            groups[group][2] += 1
+            for k in keys:
+                by_key.setdefault(k, group)
+        return [(doc, score, duplicates) for doc, score, duplicates, _ in groups]
+
+    def pack(self, documents: List[Document]) -> Tuple[List[Document], Dict]:
+        """
+        Paketlenmiş dokümanlar ve istatistikler:
+            {"documents_in", "documents_out", "collapsed", "dropped",
+             "tokens_in", "tokens_out", "tokens_saved", "token_budget"}
+        """
+        tokens_in = sum(_estimate_tokens(doc.page_content) for doc in documents)
+        groups = self._collapse(documents)
+        # sorted kararlıdır: eşit skorda retrieval sırası korunur
+        ranked = sorted(groups, key=lambda group: group[1], reverse=True)
+
+        packed, tokens_out = [], 0
+        for doc, score, duplicates in ranked:
+            tokens = _estimate_tokens(doc.page_content)
+            if packed and tokens_out + tokens > self.token_budget:
+                break
+            packed.append(Document(
+                page_content=doc.page_content,
+                metadata={**doc.metadata, "context_score": score, "collapsed_duplicates": duplicates}
+            ))
+            tokens_out += tokens
+
+        return packed, {
+            "documents_in": len(documents),
+            "documents_out": len(packed),
+            "collapsed": len(documents) - len(groups),
+            "dropped": len(groups) - len(packed),
+            "tokens_in": tokens_in,
+            "tokens_out": tokens_out,
+            "tokens_saved": tokens_in - tokens_out,
+            "token_budget": self.token_budget
+        }
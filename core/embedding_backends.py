@@ -0,0 +1,110 @@
+"""
+Embedding arka ucu seçimi
+
+"torch":     HuggingFaceEmbeddings (sentence-transformers, tam hassasiyet)
+"onnx":      aynı modelin ONNX Runtime ile fp32 çalıştırılması
+"onnx-int8": int8 dinamik kuantize ONNX modeli (en hızlı, en az bellek)
+
+fp32 ONNX çıktısı torch ile sayısal olarak aynıdır ve mevcut indeksle
+kullanılabilir. int8 vektörleri hafifçe saptığı için embedding önbelleğinde
+ayrı bir model adıyla tutulur ve indeks seçeneklerine yazılır.
+
+Her indeks sürümüne sabit birkaç örnek cümlenin vektörleri (prob) kaydedilir;
+sorgu tarafındaki arka uç bu cümleleri tekrar embed ederek kosinüs
+sapmasını ölçer, böylece farklı arka uçla kurulmuş bir indeks fark edilir.
+"""
+
+import os
+from typing import Dict, Optional
+
+import numpy as np
+from langchain_core.embeddings import Embeddings
+
+
+EMBEDDING_BACKENDS = ("torch", "onnx", "onnx-int8")
+DEFAULT_EMBEDDING_BACKEND = "torch"
+# Vektörleri tam hassasiyetli modelden sapan arka uçlar
+QUANTIZED_BACKENDS = ("onnx-int8",)
+PROBE_FILENAME = "embedding_probe.npy"
+PROBE_TEXTS = (
+    "Bootcamp sertifikası ne zaman verilir?",
+    "Proje teslim tarihi uzatılabilir mi?",
+    "Mentor görüşmeleri hangi gün yapılıyor?",
+    "Yapay zeka modelleri nasıl eğitilir?",
+    "Merhaba, nasılsın?"
+)
+DRIFT_WARNING_THRESHOLD = 0.995
+
+
+def cache_model_name(model_name: str, backend: str) -> str:
+    """Embedding önbelleği anahtarı: sadece vektörü değiştiren arka uçlar ayrışır"""
+    return f"{model_name}@int8" if backend in QUANTIZED_BACKENDS else model_name
+
+
+def ensure_onnx_model(model_name: str, backend: str, onnx_dir: Optional[str] = None) -> str:
+    """ONNX modelinin klasörü; yoksa bir kez dışa aktarılır (torch gerektirir)"""
+    from .onnx_embeddings import export_onnx_model, onnx_model_dir, FP32_FILENAME, INT8_FILENAME
+
+    quantized = backend == "onnx-int8"
+    model_dir = onnx_model_dir(onnx_dir or os.path.join("cache", "onnx"), model_name)
+    if not os.path.exists(os.path.join(model_dir, INT8_FILENAME if quantized else FP32_FILENAME)):
+        export_onnx_model(model_name, model_dir, quantize=quantized)
+    return model_dir
+
+
+def create_embeddings(
+    backend: str,
+    model_name: str,
+    onnx_dir: Optional[str] = None,
+    threads: Optional[int] = None,
+    batch_size: int = 32
+) -> Embeddings:
+    """Seçilen arka uç için embedding modeli; ONNX modeli yoksa bir kez dışa aktarılır"""
+    if backend == "torch":
+        from langchain_huggingface import HuggingFaceEmbeddings
+
+        if threads:
+            import torch
+            torch.set_num_threads(threads)
+        return HuggingFaceEmbeddings(
+            model_name=model_name,
+            model_kwargs={'device': 'cpu'},
+            encode_kwargs={'batch_size': batch_size}
+        )
+
+    if backend in ("onnx", "onnx-int8"):
+        from .onnx_embeddings import OnnxEmbeddings
+
+        model_dir = ensure_onnx_model(model_name, backend, onnx_dir)
+        return OnnxEmbeddings(model_dir, quantized=backend == "onnx-int8", threads=threads, batch_size=batch_size)
+
+    raise ValueError(f"Bilinmeyen embedding arka ucu: {backend} (seçenekler: {', '.join(EMBEDDING_BACKENDS)})")
+
+
+def write_embedding_probe(embeddings: Embeddings, db_path: str):
+    """İndeksi kuran modelin prob vektörlerini indeks klasörüne yazar"""
+    vectors = np.asarray(embeddings.embed_documents(list(PROBE_TEXTS)), dtype=np.float32)
+    np.save(os.path.join(db_path, PROBE_FILENAME), vectors)
+
+
+def embedding_drift(embeddings: Embeddings, db_path: str) -> Optional[Dict]:
+    """
+    Sorgu modelinin indeksi kuran modele göre sapması; prob yoksa None.
+        {"min_cosine", "mean_cosine", "compatible"}
+    """
+    path = os.path.join(db_path, PROBE_FILENAME)
+    if not os.path.exists(path):
+        return None
+
+    reference = np.load(path)
+    current = np.asarray(embeddings.embed_documents(list(PROBE_TEXTS)), dtype=np.float32)
+    if current.shape != reference.shape:
+        return {"min_cosine": 0.0, "mean_cosine": 0.0, "compatible": False}
+
+    norms = np.linalg.norm(reference, axis=1) * np.linalg.norm(current, axis=1)
+    cosines = (reference * current).sum(axis=1) / np.where(norms == 0, 1.0, norms)
+    return {
+        "min_cosine": round(float(cosines.min()), 6),
+        "mean_cosine": round(float(cosines.mean()), 6),
+        "compatible": bool(cosines.min() >= DRIFT_WARNING_THRESHOLD)
+    }
@@ -0,0 +1,235 @@
+"""
+Kalıcı embedding önbelleği
+
+Herhangi bir LangChain Embeddings nesnesini sarar. Vektörler model adı
+ve normalize edilmiş metnin hash'i ile anahtarlanır; diskte sıkı bir
+float32 dizi dosyası ve satır indeksi olarak saklanır, üstünde sınırlı
+boyutlu bir bellek içi LRU bulunur. Böylece indeks yeniden oluşturmada
+sadece yeni metinler, sorgu yolunda ise sadece ilk kez görülen sorular
+transformer'dan geçer.
+
+Birden çok süreç (ör. setup_database.py ve çalışan uygulama) aynı klasöre
+yazabilir: ekleme, özel bir dosya kilidi altında diğer yazıcıların
+eklediği satırları okur, zaten kayıtlı anahtarları atlar ve satır
+numarasını vektör dosyasının boyutundan hesaplar. İndeks dosyasının her
+satırı "anahtar<TAB>satır" biçimindedir; vektörler her zaman indeksten
+önce yazıldığı için yarım kalan bir yazma yanlış eşleme üretmez.
+
+Not: Aynı metin için doküman ve sorgu embedding'i aynı kabul edilir
+(paraphrase-multilingual-MiniLM-L12-v2 için geçerlidir).
+"""
+
+import os
+import re
+import json
+import hashlib
+import threading
+import unicodedata
+from collections import OrderedDict
+from contextlib import contextmanager
+from typing import Dict, List, Optional
+
+import numpy as np
+from langchain_core.embeddings import Embeddings
+
+try:
+    import fcntl
+except ImportError:
+    # Windows: süreçler arası kilit yok, tek yazıcı varsayılır
+    fcntl = None
+
+
+def normalize_text(text: str) -> str:
+    """Unicode NFC + boşluk sadeleştirme (büyük/küçük harf korunur)"""
+    return re.sub(r"\s+", " ", unicodedata.normalize("NFC", text)).strip()
+
+
+def _model_slug(model_name: str) -> str:
+    return re.sub(r"[^A-Za-z0-9_.-]+", "_", model_name)
+
+
+class CachedEmbeddings(Embeddings):
+    """Disk + LRU önbellekli Embeddings sarmalayıcısı"""
+
+    def __init__(
+        self,
+        embeddings: Embeddings,
+        model_name: str,
+        cache_dir: str,
+        memory_size: int = 4096
+    ):
+        self.embeddings = embeddings
+        self.model_name = model_name
+        self.cache_dir = cache_dir
+        self.memory_size = memory_size
+
+        self.hits = 0
+        self.misses = 0
+
+        self._memory: "OrderedDict[str, np.ndarray]" = OrderedDict()
+        self._rows: Dict[str, int] = {}
+        self._dim: Optional[int] = None
+        self._index_position = 0
+        self._index_lines = 0
+        self._lock = threading.Lock()
+
+        slug = _model_slug(model_name)
+        os.makedirs(cache_dir, exist_ok=True)
+        self._vectors_path = os.path.join(cache_dir, f"{slug}.f32")
+        self._index_path = os.path.join(cache_dir, f"{slug}.idx")
+        self._meta_path = os.path.join(cache_dir, f"{slug}.json")
+        self._lock_path = os.path.join(cache_dir, f"{slug}.lock")
+        with self._file_lock():
+            self._load_index()
+
+    @contextmanager
+    def _file_lock(self):
+        """Aynı klasöre yazan diğer süreçlere karşı özel kilit"""
+        with open(self._lock_path, 'a') as f:
+            if fcntl is not None:
+                fcntl.flock(f, fcntl.LOCK_EX)
+            try:
+                yield
+            finally:
+                if fcntl is not None:
+                    fcntl.flock(f, fcntl.LOCK_UN)
+
+    def _load_index(self):
+        """İndeks dosyasında son okunan konumdan sonra eklenen satırları okur (kilit altında)"""
+        if self._dim is None:
+            if not os.path.exists(self._meta_path):
+                return
+            with open(self._meta_path, 'r', encoding='utf-8') as f:
+                meta = json.load(f)
+            if meta.get("model_name") != self.model_name:
+                return
+            self._dim = meta["dim"]
+
+        if not os.path.exists(self._index_path):
+            return
+
+        stored_rows = self._stored_rows()
+        with open(self._index_path, 'rb') as f:
+            f.seek(self._index_position)
+            data = f.read()
+        # Yarım kalmış son satır sonraki okumaya bırakılır
+        data = data[:data.rfind(b"\n") + 1]
+        self._index_position += len(data)
+
+        line_number = self._index_lines
+        for line in data.decode("utf-8").splitlines():
+            key, _, row = line.partition("\t")
+            # Eski biçim (sadece anahtar): satır numarası = indeks satırı
+            row = int(row) if row else line_number
+            line_number += 1
+            if row < stored_rows:
+                # Yinelenen anahtarda ilk kayıt geçerlidir
+                self._rows.setdefault(key, row)
+        self._index_lines = line_number
+
+    def _stored_rows(self) -> int:
+        """Vektör dosyasındaki tam satır sayısı"""
+        if not os.path.exists(self._vectors_path):
+            return 0
+        return os.path.getsize(self._vectors_path) // (self._dim * 4)
+
+    def _key(self, text: str) -> str:
+        payload = f"{self.model_name}\n{normalize_text(text)}"
+        return hashlib.sha1(payload.encode("utf-8")).hexdigest()
+
+    def _remember(self, key: str, vector: np.ndarray):
+        self._memory[key] = vector
+        self._memory.move_to_end(key)
+        while len(self._memory) > self.memory_size:
+            self._memory.popitem(last=False)
+
+    def _read_rows(self, rows: List[int]) -> List[np.ndarray]:
+        row_bytes = self._dim * 4
+        vectors = []
+        with open(self._vectors_path, 'rb') as f:
+            for row in rows:
+                f.seek(row * row_bytes)
+                vectors.append(np.frombuffer(f.read(row_bytes), dtype=np.float32))
+        return vectors
+
+    def _append(self, keys: List[str], vectors: np.ndarray):
+        """Yeni anahtarları diske ekler; bu arada başka bir sürecin eklediği anahtarlar atlanır"""
+        with self._file_lock():
+            self._load_index()
+            if self._dim is None:
+                self._dim = int(vectors.shape[1])
+                with open(self._meta_path, 'w', encoding='utf-8') as f:
+                    json.dump({"model_name": self.model_name, "dim": self._dim}, f)
+
+            new = [i for i, key in enumerate(keys) if key not in self._rows]
+            if not new:
+                return
+
+            # Satır numarası dosya boyutundan gelir; yarım kalmış bir
+            # yazmanın artığı varsa üzerine yazılır
+            start = self._stored_rows()
+            with open(self._vectors_path, 'r+b' if os.path.exists(self._vectors_path) else 'wb') as f:
+                f.seek(start * self._dim * 4)
+                f.write(vectors[new].astype(np.float32).tobytes())
+                f.truncate()
+
+            lines = "".join(f"{keys[i]}\t{start + offset}\n" for offset, i in enumerate(new)).encode("utf-8")
+            with open(self._index_path, 'ab') as f:
+                # Yarım kalmış son satır varsa kapatılır ve atlanır
+                if f.tell() > self._index_position:
+                    lines = b"\n" + lines
+                    self._index_position = f.tell()
+                f.write(lines)
+            self._index_position += len(lines)
+            self._index_lines += lines.count(b"\n")
+
+            for offset, i in enumerate(new):
+                self._rows[keys[i]] = start + offset
+
+    def embed_documents(self, texts: List[str]) -> List[List[float]]:
+        keys = [self._key(t) for t in texts]
+        found: Dict[str, np.ndarray] = {}
+
+        with self._lock:
+            disk_keys = []
+            for key in dict.fromkeys(keys):
+                if key in self._memory:
+                    self._memory.move_to_end(key)
+                    found[key] = self._memory[key]
+                elif key in self._rows:
+                    disk_keys.append(key)
+
+            if disk_keys:
+                for key, vector in zip(disk_keys, self._read_rows([self._rows[k] for k in disk_keys])):
+                    found[key] = vector
+                    self._remember(key, vector)
+
+        missing = {}
+        for key, text in zip(keys, texts):
+            if key not in found and key not in missing:
+                missing[key] = text
+
+        if missing:
+            computed = np.asarray(self.embeddings.embed_documents(list(missing.values())), dtype=np.float32)
+            with self._lock:
+                self._append(list(missing), computed)
+                for key, vector in zip(missing, computed):
+                    found[key] = vector
+                    self._remember(key, vector)
+
+        with self._lock:
+            self.hits += len(texts) - len(missing)
+            self.misses += len(missing)
+
+        return [found[key].tolist() for key in keys]
+
+    def embed_query(self, text: str) -> List[float]:
+        return self.embed_documents([text])[0]
+
+    def get_stats(self) -> Dict:
+        return {
+            "memory_entries": len(self._memory),
+            "disk_entries": len(self._rows),
+            "hits": self.hits,
+            "misses": self.misses
+        }
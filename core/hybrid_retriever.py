@@ -0,0 +1,70 @@
+"""
+Hibrit (BM25 + yoğun vektör) retriever
+
+Yoğun MMR sonuçlarını ve sözcüksel BM25 sonuçlarını Reciprocal Rank
+Fusion (RRF) ile birleştirir. Dokümanlar indeksleme sırasında atanan
+doc_id üzerinden eşleştirilir.
+"""
+
+from typing import Any, Callable, Dict, List
+
+from langchain_core.callbacks import CallbackManagerForRetrieverRun
+from langchain_core.documents import Document
+from langchain_core.retrievers import BaseRetriever
+
+from .lexical_index import query_terms
+
+
+def _doc_key(doc: Document) -> str:
+    return doc.metadata.get("doc_id") or doc.page_content
+
+
+def reciprocal_rank_fusion(
+    rankings: List[List[Document]],
+    rrf_k: int = 60,
+    key: Callable[[Document], str] = _doc_key
+) -> List[Document]:
+    """
+    Sıralı listeleri RRF skoruyla birleştirir; skor metadata'ya yazılır.
+    Aynı anahtar bir listede birden fazla geçerse sadece ilk sırası sayılır.
+    """
+    scores: Dict[str, float] = {}
+    documents: Dict[str, Document] = {}
+    for ranking in rankings:
+        seen = set()
+        for rank, doc in enumerate(ranking):
+            doc_key = key(doc)
+            if doc_key in seen:
+                continue
+            seen.add(doc_key)
+            scores[doc_key] = scores.get(doc_key, 0.0) + 1.0 / (rrf_k + rank + 1)
+            documents.setdefault(doc_key, doc)
+
+    fused = []
+    for doc_key in sorted(scores, key=scores.get, reverse=True):
+        doc = documents[doc_key]
+        fused.append(Document(
+            page_content=doc.page_content,
+            metadata={**doc.metadata, "fusion_score": scores[doc_key]}
+        ))
+    return fused
+
+
+class HybridRetriever(BaseRetriever):
+    """Yoğun retriever + BM25 sonuçlarını RRF ile birleştiren retriever"""
+
+    dense_retriever: BaseRetriever
+    lexical_index: Any
+    k: int = 5
+    lexical_k: int = 10
+    rrf_k: int = 60
+    synonym_weight: float = 0.3
+
+    def _get_relevant_documents(
+        self, query: str, *, run_manager: CallbackManagerForRetrieverRun
+    ) -> List[Document]:
+        dense = self.dense_retriever.invoke(query)
+        lexical = [doc for doc, _ in self.lexical_index.search(
+            query_terms(query, self.synonym_weight), k=self.lexical_k
+        )]
+        return reciprocal_rank_fusion([dense, lexical], self.rrf_k)[:self.k]
@@ -0,0 +1,316 @@
+"""
+Artımlı (incremental) indeksleme
+
+Her Soru/Cevap dokümanı içeriğinin ve kaynak / küme anahtarlarının
+hash'inden türetilen kararlı bir kimlik alır. Her çalıştırmada sadece yeni/değişen dokümanlar eklenir,
+kaldırılanlar silinir ve kaynak dosyaların hash'leri bir manifest'e
+yazılır. Veri değişmediyse yeniden oluşturma hiçbir şey yapmaz.
+
+Dokümanlar akış halinde okunur ve sabit boyutlu gruplarla yazılır;
+yarıda kalan bir indeksleme (--rebuild dahil) checkpoint'ten devam eder.
+"""
+
+import os
+import json
+import time
+import hashlib
+from typing import Callable, Dict, Iterable, Iterator, List, Optional, Set
+
+from langchain_core.documents import Document
+
+from .canonical_index import build_canonical_index, CANONICAL_INDEX_DIRNAME
+from .confidence import document_tokens_field, TOKENS_METADATA_KEY
+from .clustering import iter_clustered_documents
+from .ingestion import IngestCheckpoint, batched, INGEST_BATCH_SIZE
+from .intent_router import build_intent_router, INTENT_ROUTER_DIRNAME
+from .lexical_index import build_lexical_index, LEXICAL_INDEX_FILENAME
+from .semantic_cache import write_index_version
+from .embedding_backends import write_embedding_probe, DEFAULT_EMBEDDING_BACKEND, PROBE_FILENAME, QUANTIZED_BACKENDS
+
+
+MANIFEST_FILENAME = "index_manifest.json"
+WRITE_BATCH_SIZE = 1000
+
+# Kimliğe giren metadata alanları; küme büyüklüğü gibi başka dokümanlara
+# bağlı alanlar girmez ki yeni bir parafraz kümenin diğer kimliklerini değiştirmesin
+ID_METADATA_KEYS = ("source", "cluster_id")
+
+
+def document_id(doc: Document) -> str:
+    """Doküman içeriği ve ID_METADATA_KEYS alanlarından kararlı kimlik üretir"""
+    payload = json.dumps(
+        {
+            "page_content": doc.page_content,
+            "metadata": {key: doc.metadata[key] for key in ID_METADATA_KEYS if key in doc.metadata}
+        },
+        sort_keys=True,
+        ensure_ascii=False,
+        default=str
+    )
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+def file_hash(file_path: str) -> str:
+    digest = hashlib.sha256()
+    with open(file_path, 'rb') as f:
+        for chunk in iter(lambda: f.read(1 << 20), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def build_index_options(
+    cluster: bool,
+    cluster_threshold: float,
+    vector_backend: str,
+    embedding_backend: str = DEFAULT_EMBEDDING_BACKEND
+) -> Dict:
+    """Manifest'e yazılan, değişince indeksi geçersiz kılan seçenekler"""
+    # Arka uç değişirse manifest eşleşmez ve yeni depo baştan doldurulur
+    options = {"cluster": cluster, "vector_backend": vector_backend, "doc_tokens": True}
+    # Sadece vektörleri değiştiren (kuantize) embedding arka uçları yazılır;
+    # torch ile üretilmiş indeks fp32 ONNX ile aynen kullanılabilir
+    if embedding_backend in QUANTIZED_BACKENDS:
+        options["embedding_backend"] = embedding_backend
+    if cluster:
+        options["cluster_threshold"] = cluster_threshold
+    return options
+
+
+def load_manifest(db_path: str) -> Dict:
+    try:
+        with open(os.path.join(db_path, MANIFEST_FILENAME), 'r', encoding='utf-8') as f:
+            return json.load(f)
+    except (OSError, json.JSONDecodeError):
+        return {}
+
+
+def save_manifest(db_path: str, manifest: Dict):
+    os.makedirs(db_path, exist_ok=True)
+    path = os.path.join(db_path, MANIFEST_FILENAME)
+    tmp_path = path + ".tmp"
+    with open(tmp_path, 'w', encoding='utf-8') as f:
+        json.dump(manifest, f, ensure_ascii=False, indent=2)
+    os.replace(tmp_path, path)
+
+
+class IncrementalIndexer:
+    """Vektör veritabanını kaynak dosyalarla artımlı olarak senkronize eder"""
+
+    def __init__(
+        self,
+        vectordb,
+        db_path: str,
+        collection_name: str,
+        embedding_model: str,
+        index_options: Optional[Dict] = None
+    ):
+        self.vectordb = vectordb
+        self.db_path = db_path
+        self.collection_name = collection_name
+        self.embedding_model = embedding_model
+        self.index_options = index_options or {}
+
+    def _source_hashes(self, data_files: List[str]) -> Dict[str, str]:
+        return {
+            os.path.basename(path): file_hash(path)
+            for path in data_files if os.path.exists(path)
+        }
+
+    def _target(self, data_files: List[str]) -> Dict:
+        """İndekslemenin hedef durumu (manifest alanları)"""
+        return {
+            "embedding_model": self.embedding_model,
+            "collection_name": self.collection_name,
+            "index_options": self.index_options,
+            "files": self._source_hashes(data_files)
+        }
+
+    def is_up_to_date(self, data_files: List[str]) -> bool:
+        """Manifest kaynak dosyalar ve embedding modeliyle birebir eşleşiyor mu?"""
+        manifest = load_manifest(self.db_path)
+        return (
+            manifest.get("embedding_model") == self.embedding_model
+            and manifest.get("collection_name") == self.collection_name
+            and manifest.get("index_options", {}) == self.index_options
+            and manifest.get("files") == self._source_hashes(data_files)
+        )
+
+    def sync(
+        self,
+        data_files: List[str],
+        load_documents: Callable[[List[str]], Iterable[Document]],
+        force: bool = False,
+        batch_size: int = INGEST_BATCH_SIZE,
+        log: Callable[[str], None] = lambda message: None
+    ) -> Dict:
+        """
+        Kaynak dosyaları indeksle senkronize eder. Dokümanlar akış halinde
+        okunur, batch_size'lık gruplarla embed edilip yazılır ve her gruptan
+        sonra checkpoint güncellenir.
+
+        Returns:
+            {"changed": bool, "added": int, "deleted": int, "total": int, "resumed": bool}
+        """
+        if not force and self.is_up_to_date(data_files):
+            log("Veri değişmedi, indeks güncel")
+            return {"changed": False, "added": 0, "deleted": 0, "total": self._count(), "resumed": False}
+
+        manifest = load_manifest(self.db_path)
+        target = self._target(data_files)
+        checkpoint = IngestCheckpoint(self.db_path)
+        state = checkpoint.load()
+        existing_ids = set(self.vectordb.get(include=[])["ids"])
+
+        # Aynı hedefe yazarken kesilen bir çalıştırmanın yazdığı kayıtlar geçerlidir
+        resumed = state.get("target") == target and state.get("phase") == "add"
+        previously_added = state.get("added", 0) if resumed else 0
+        if resumed:
+            log(f"Yarıda kalan indeksleme sürdürülüyor ({previously_added} doküman zaten yazılmış)")
+            stale_ids = set()
+        elif (
+            # Embedding modeli veya indeks seçenekleri değiştiyse eski kayıtlar kullanılamaz
+            force
+            or manifest.get("embedding_model") not in (None, self.embedding_model)
+            or manifest.get("index_options") not in (None, self.index_options)
+        ):
+            stale_ids = set(existing_ids)
+        else:
+            stale_ids = set()
+
+        checkpoint.save({"target": target, "phase": "delete"})
+        self._delete(stale_ids)
+        self._flush()
+        existing_ids -= stale_ids
+        checkpoint.save({"target": target, "phase": "add", "added": previously_added})
+
+        seen: Set[str] = set()
+        added = 0
+        next_flush = batch_size
+        for batch in batched(self._new_documents(load_documents(data_files), existing_ids, seen), batch_size):
+            self.vectordb.add_documents([doc for _, doc in batch], ids=[doc_id for doc_id, _ in batch])
+            added += len(batch)
+            # Depo dosyası her kalıcılaştırmada baştan yazılır; aralık katlanarak
+            # büyütülür, böylece toplam yazım doküman sayısıyla doğrusal kalır
+            if added >= next_flush:
+                self._flush()
+                next_flush = 2 * added
+            checkpoint.save({"target": target, "phase": "add", "added": previously_added + added})
+            log(f"{previously_added + added} doküman yazıldı")
+
+        removed = existing_ids - seen
+        self._delete(removed)
+        self._flush()
+        deleted = len(stale_ids) + len(removed)
+        if deleted:
+            log(f"{deleted} doküman silindi")
+
+        save_manifest(self.db_path, {
+            **target,
+            "document_count": len(seen),
+            "updated_at": time.strftime("%Y-%m-%dT%H:%M:%S")
+        })
+        checkpoint.clear()
+
+        return {
+            # Sürdürülen çalıştırmada türetilmiş indeksler henüz oluşturulmamıştır
+            "changed": bool(added or deleted or resumed),
+            "added": added,
+            "deleted": deleted,
+            "total": len(seen),
+            "resumed": resumed
+        }
+
+    def _new_documents(self, documents: Iterable[Document], existing_ids: Set[str], seen: Set[str]):
+        """Tekrarsız ve depoda olmayan dokümanları (kimlik, doküman) olarak üretir"""
+        for doc in documents:
+            doc_id = document_id(doc)
+            if doc_id in seen:
+                continue
+            seen.add(doc_id)
+            if doc_id in existing_ids:
+                continue
+            doc.metadata["doc_id"] = doc_id
+            doc.metadata[TOKENS_METADATA_KEY] = document_tokens_field(doc.page_content)
+            yield doc_id, doc
+
+    def _flush(self):
+        """Yazmaları biriktiren depoları (NumpyVectorStore) diske yazar; Chroma kendisi yazar"""
+        flush = getattr(self.vectordb, "flush", None)
+        if flush is not None:
+            flush()
+
+    def _delete(self, ids: Set[str]):
+        for batch in batched(sorted(ids), WRITE_BATCH_SIZE):
+            self.vectordb.delete(ids=batch)
+
+    def _count(self) -> int:
+        return len(self.vectordb.get(include=[])["ids"])
+
+
+def build_index(
+    vectordb,
+    embeddings,
+    db_path: str,
+    collection_name: str,
+    embedding_model: str,
+    data_files: List[str],
+    canonical_data_file: str,
+    load_documents: Callable[[List[str]], Iterable[Document]],
+    force: bool = False,
+    batch_size: int = INGEST_BATCH_SIZE,
+    cluster: bool = True,
+    cluster_threshold: float = 0.92,
+    vector_backend: str = "chroma",
+    embedding_backend: str = DEFAULT_EMBEDDING_BACKEND,
+    log: Callable[[str], None] = lambda message: None
+) -> Dict:
+    """
+    Vektör indeksini artımlı günceller; bir değişiklik olduysa kanonik,
+    niyet ve BM25 indekslerini yeniden oluşturur ve yeni bir indeks sürümü yazar.
+    
+    cluster=True ise parafrazlar kümelenir; her parafraz kümenin ortak
+    cevabı ve cluster_id'siyle ayrı bir anahtar olarak indekslenir. Kümeleme
+    de akış halindedir: kaynak dosyalar üç kez okunur, dokümanlar belleğe
+    alınmaz (bkz. clustering).
+    """
+    index_options = build_index_options(cluster, cluster_threshold, vector_backend, embedding_backend)
+    if cluster:
+        def load_clustered(files: List[str]) -> Iterator[Document]:
+            return iter_clustered_documents(
+                lambda: load_documents(files),
+                embeddings,
+                similarity_threshold=cluster_threshold,
+                batch_size=batch_size,
+                log=log
+            )
+        
+        loader = load_clustered
+    else:
+        loader = load_documents
+    
+    indexer = IncrementalIndexer(vectordb, db_path, collection_name, embedding_model, index_options)
+    stats = indexer.sync(data_files, loader, force=force, batch_size=batch_size, log=log)
+
+    canonical_missing = not os.path.exists(os.path.join(db_path, CANONICAL_INDEX_DIRNAME))
+    if stats["changed"] or canonical_missing:
+        canonical_index = build_canonical_index(canonical_data_file, embeddings, db_path)
+        log(f"{len(canonical_index)} kanonik soru kümesi indekslendi")
+
+    router_missing = not os.path.exists(os.path.join(db_path, INTENT_ROUTER_DIRNAME))
+    if stats["changed"] or router_missing:
+        router = build_intent_router(canonical_data_file, embeddings, db_path)
+        log(f"{len(router)} prototip ile niyet yönlendiricisi oluşturuldu")
+
+    lexical_missing = not os.path.exists(os.path.join(db_path, LEXICAL_INDEX_FILENAME))
+    if stats["changed"] or lexical_missing:
+        lexical_index = build_lexical_index(vectordb, db_path)
+        log(f"{len(lexical_index)} doküman için BM25 indeksi oluşturuldu")
+    
+    probe_missing = not os.path.exists(os.path.join(db_path, PROBE_FILENAME))
+    if stats["changed"] or probe_missing:
+        write_embedding_probe(embeddings, db_path)
+
+    if stats["changed"]:
+        write_index_version(db_path)
+
+    return stats
@@ -0,0 +1,158 @@
+"""
+Akışlı (streaming) JSONL ingestion
+
+Veri dosyaları satır satır okunur ve Soru/Cevap dokümanları tek tek
+üretilir; korpusun tamamı belleğe alınmaz. İndeksleyici dokümanları
+sabit boyutlu gruplar halinde embed edip depoya yazar ve her gruptan
+sonra ilerlemeyi bir checkpoint dosyasına kaydeder, böylece yarıda
+kalan bir indeksleme kaldığı yerden devam eder.
+
+ProcessPoolEmbeddings, embedding hesabını birden çok süreçe dağıtan
+isteğe bağlı bir Embeddings sarmalayıcısıdır; her süreç modeli bir kez
+yükler.
+"""
+
+import os
+import json
+import itertools
+from concurrent.futures import ProcessPoolExecutor
+from typing import Any, Callable, Dict, Iterable, Iterator, List, Optional
+
+import numpy as np
+from langchain_core.documents import Document
+from langchain_core.embeddings import Embeddings
+
+
+INGEST_BATCH_SIZE = 256
+CHECKPOINT_FILENAME = "ingest_checkpoint.json"
+METADATA_FIELDS = ("canonical_question", "canonical_answer")
+
+
+def qa_document(data: Dict, source: str) -> Optional[Document]:
+    """JSONL kaydından "Soru: ...\\nCevap: ..." dokümanı; soru/cevap yoksa None"""
+    question = data.get("question", "")
+    answer = data.get("answer", "")
+    if not (question and answer):
+        return None
+
+    metadata = {"source": source}
+    for key in METADATA_FIELDS:
+        if data.get(key):
+            metadata[key] = data[key]
+    return Document(page_content=f"Soru: {question}\nCevap: {answer}", metadata=metadata)
+
+
+def iter_jsonl_documents(file_path: str, log: Callable[[str], None] = lambda message: None) -> Iterator[Document]:
+    """Dosyayı satır satır okuyup dokümanları tek tek üretir; bozuk satırlar atlanır"""
+    if not os.path.exists(file_path):
+        log(f"Dosya bulunamadı: {file_path}")
+        return
+
+    source = os.path.basename(file_path)
+    count = 0
+    skipped = 0
+    with open(file_path, 'r', encoding='utf-8') as f:
+        for line in f:
+            try:
+                data = json.loads(line)
+            except json.JSONDecodeError:
+                skipped += 1
+                continue
+
+            doc = qa_document(data, source) if isinstance(data, dict) else None
+            if doc is not None:
+                count += 1
+                yield doc
+
+    log(f"{source}: {count} doküman okundu" + (f", {skipped} satır atlandı (JSON hatası)" if skipped else ""))
+
+
+def iter_documents(data_files: List[str], log: Callable[[str], None] = lambda message: None) -> Iterator[Document]:
+    """Tüm veri dosyalarının dokümanlarını sırayla ve tembel olarak üretir"""
+    for file_path in data_files:
+        yield from iter_jsonl_documents(file_path, log)
+
+
+def batched(items: Iterable, size: int) -> Iterator[List]:
+    """Herhangi bir iterable'ı en fazla `size` elemanlı listelere böler"""
+    iterator = iter(items)
+    while True:
+        batch = list(itertools.islice(iterator, size))
+        if not batch:
+            return
+        yield batch
+
+
+class IngestCheckpoint:
+    """Yarıda kalan indekslemenin durumu (db_path/ingest_checkpoint.json)"""
+
+    def __init__(self, db_path: str):
+        self.path = os.path.join(db_path, CHECKPOINT_FILENAME)
+
+    def load(self) -> Dict:
+        try:
+            with open(self.path, 'r', encoding='utf-8') as f:
+                return json.load(f)
+        except (OSError, json.JSONDecodeError):
+            return {}
+
+    def save(self, state: Dict):
+        os.makedirs(os.path.dirname(self.path), exist_ok=True)
+        tmp_path = self.path + ".tmp"
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump(state, f, ensure_ascii=False)
+        os.replace(tmp_path, self.path)
+
+    def clear(self):
+        if os.path.exists(self.path):
+            os.remove(self.path)
+
+
+_worker_embeddings: Optional[Embeddings] = None
+
+
+def _init_worker(factory: Callable[[], Embeddings], threads: int):
+    global _worker_embeddings
+    try:
+        import torch
+        torch.set_num_threads(threads)
+    except ImportError:
+        pass
+    _worker_embeddings = factory()
+
+
+def _embed_chunk(texts: List[str]) -> np.ndarray:
+    return np.asarray(_worker_embeddings.embed_documents(texts), dtype=np.float32)
+
+
+class ProcessPoolEmbeddings(Embeddings):
+    """
+    embed_documents'ı `chunk_size`'lık parçalar halinde süreç havuzunda
+    hesaplar. factory, pickle'lanabilir (modül seviyesinde) bir fonksiyon
+    olmalıdır; CPU çekirdekleri süreçler arasında paylaştırılır.
+    """
+
+    def __init__(self, factory: Callable[[], Embeddings], workers: int = 2, chunk_size: int = 64):
+        self.factory = factory
+        self.workers = workers
+        self.chunk_size = chunk_size
+        threads = max(1, (os.cpu_count() or workers) // workers)
+        self._pool = ProcessPoolExecutor(max_workers=workers, initializer=_init_worker, initargs=(factory, threads))
+
+    def embed_documents(self, texts: List[str]) -> List[List[float]]:
+        if not texts:
+            return []
+        chunks = list(batched(texts, self.chunk_size))
+        return [row for matrix in self._pool.map(_embed_chunk, chunks) for row in matrix.tolist()]
+
+    def embed_query(self, text: str) -> List[float]:
+        return self.embed_documents([text])[0]
+
+    def close(self):
+        self._pool.shutdown()
+
+    def __enter__(self) -> "ProcessPoolEmbeddings":
+        return self
+
+    def __exit__(self, *exc: Any):
+        self.close()
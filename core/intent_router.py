@@ -0,0 +1,175 @@
+"""
+Embedding tabanlı niyet yönlendirici
+
+Soru, zaten hesaplanmış sorgu embedding'i ile önceden hesaplanmış
+prototip vektörlerine tek bir matris-vektör çarpımıyla sınıflandırılır:
+
+- bootcamp_specific: enriched_dataset.jsonl'deki sorular kanonik soruya
+  (yoksa category etiketine) göre gruplanır; category/intent etiketi
+  karara eklenir.
+- greeting / general_safe: veri setinde alan dışı soru olmadığından
+  aşağıdaki konu gruplarındaki örnek cümleler kullanılır.
+
+Her yönde prototip, bir grubun merkezidir. Tek örnek cümle prototipleri,
+ortalaması alınmış merkezlerden daha yüksek skor üreteceği için yönler
+arasında karşılaştırma bozulurdu.
+
+Selamlamalar ve alan dışı sorular retrieval veya LLM çağrısından önce
+yönlendirilir.
+"""
+
+import os
+import json
+from collections import Counter, defaultdict
+from typing import Dict, List, Optional
+
+import numpy as np
+
+
+INTENT_ROUTER_DIRNAME = "intent_router"
+VECTORS_FILENAME = "prototypes.npy"
+LABELS_FILENAME = "labels.json"
+
+GREETING_EXAMPLES = [
+    ["merhaba", "merhabalar", "selam", "selamlar", "hey", "hi", "hello"],
+    ["selam naber", "merhaba nasılsın", "selam, orada mısın?"],
+    ["günaydın", "iyi günler", "iyi akşamlar"]
+]
+
+GENERAL_EXAMPLES = [
+    ["Python nedir?", "Nesne yönelimli programlama nedir?", "Bir listeyi nasıl sıralarım?",
+     "SQL'de JOIN ne işe yarar?", "HTTP ve HTTPS arasındaki fark nedir?"],
+    ["Yapay zeka ne demek?", "Makine öğrenmesi nedir?"],
+    ["2 + 2 kaç eder?", "15'in yüzde 20'si kaçtır?", "Bir sayının karesi nasıl hesaplanır?"],
+    ["Sen kimsin?", "Ne yapabilirsin?", "MentorMate nedir?"],
+    ["Türkiye'nin başkenti neresi?", "Bana bir fıkra anlatır mısın?"]
+]
+
+
+def _normalize_rows(matrix: np.ndarray) -> np.ndarray:
+    norms = np.linalg.norm(matrix, axis=1, keepdims=True)
+    norms[norms == 0] = 1.0
+    return matrix / norms
+
+
+def _normalize_category(category: Optional[str]) -> str:
+    """"general" ve boş etiketler veri setindeki "Genel" ile birleştirilir"""
+    category = (category or "").strip()
+    return "Genel" if category.lower() in ("", "genel", "general") else category
+
+
+class IntentRouter:
+    """Prototip vektörlerine en yakın komşu ile soru yönlendirici"""
+
+    def __init__(self, vectors: np.ndarray, labels: List[Dict]):
+        self.vectors = vectors.astype(np.float32)
+        self.labels = labels
+        self.routes = np.asarray([label["route"] for label in labels])
+
+    def __len__(self) -> int:
+        return len(self.labels)
+
+    @classmethod
+    def build(cls, file_path: str, embeddings) -> "IntentRouter":
+        groups: Dict[str, List[Dict]] = defaultdict(list)
+        with open(file_path, 'r', encoding='utf-8') as f:
+            for line in f:
+                try:
+                    data = json.loads(line)
+                except json.JSONDecodeError:
+                    continue
+
+                question = (data.get("question") or "").strip()
+                if not question:
+                    continue
+                category = _normalize_category(data.get("category"))
+                key = (data.get("canonical_question") or "").strip() or f"category:{category}"
+                groups[key].append({"question": question, "category": category, "intent": data.get("intent") or ""})
+
+        if not groups:
+            raise ValueError(f"Soru bulunamadı: {file_path}")
+
+        labeled_groups = [
+            (
+                [row["question"] for row in rows],
+                {
+                    "route": "bootcamp_specific",
+                    "category": Counter(r["category"] for r in rows).most_common(1)[0][0],
+                    "intent": Counter(r["intent"] for r in rows).most_common(1)[0][0]
+                }
+            )
+            for rows in groups.values()
+        ]
+        for route, route_groups in (("greeting", GREETING_EXAMPLES), ("general_safe", GENERAL_EXAMPLES)):
+            labeled_groups += [(examples, {"route": route, "category": "", "intent": ""}) for examples in route_groups]
+
+        texts = [text for group_texts, _ in labeled_groups for text in group_texts]
+        vectors = _normalize_rows(np.asarray(embeddings.embed_documents(texts), dtype=np.float32))
+
+        prototypes = []
+        labels = []
+        offset = 0
+        for group_texts, label in labeled_groups:
+            prototypes.append(vectors[offset:offset + len(group_texts)].mean(axis=0))
+            offset += len(group_texts)
+            labels.append(label)
+
+        return cls(_normalize_rows(np.stack(prototypes)), labels)
+
+    def save(self, directory: str):
+        os.makedirs(directory, exist_ok=True)
+        np.save(os.path.join(directory, VECTORS_FILENAME), self.vectors)
+        with open(os.path.join(directory, LABELS_FILENAME), 'w', encoding='utf-8') as f:
+            json.dump(self.labels, f, ensure_ascii=False)
+
+    @classmethod
+    def load(cls, directory: str) -> Optional["IntentRouter"]:
+        """Yönlendirici yoksa None döner"""
+        vectors_path = os.path.join(directory, VECTORS_FILENAME)
+        labels_path = os.path.join(directory, LABELS_FILENAME)
+        if not (os.path.exists(vectors_path) and os.path.exists(labels_path)):
+            return None
+
+        with open(labels_path, 'r', encoding='utf-8') as f:
+            labels = json.load(f)
+        return cls(np.load(vectors_path), labels)
+
+    def route(self, query_vector, min_confidence: float = -1.0, min_margin: float = 0.0) -> Optional[Dict]:
+        """
+        Karar ve güven bilgisini döner:
+            {"route", "confidence", "margin", "category", "intent", "source": "router"}
+        margin: en iyi skor ile başka bir yöndeki en iyi skor arasındaki fark
+        
+        Skor min_confidence'ın ya da margin min_margin'in altındaysa karar
+        verilmez (None); çağıran anahtar kelime kurallarına döner.
+        """
+        query = np.asarray(query_vector, dtype=np.float32)
+        norm = np.linalg.norm(query)
+        if norm == 0:
+            return None
+
+        scores = self.vectors @ (query / norm)
+        best = int(np.argmax(scores))
+        route = self.labels[best]["route"]
+        others = scores[self.routes != route]
+        runner_up = float(others.max()) if len(others) else -1.0
+        confidence = float(scores[best])
+        margin = confidence - runner_up
+        if confidence < min_confidence or margin < min_margin:
+            return None
+
+        return {
+            "route": route,
+            "confidence": confidence,
+            "margin": margin,
+            "category": self.labels[best]["category"],
+            "intent": self.labels[best]["intent"],
+            "source": "router"
+        }
+
+
+def build_intent_router(file_path: str, embeddings, db_path: str) -> IntentRouter:
+    """Yönlendiriciyi oluşturur ve veritabanı klasörüne kaydeder"""
+    router = IntentRouter.build(file_path, embeddings)
+    router.save(os.path.join(db_path, INTENT_ROUTER_DIRNAME))
+    return router
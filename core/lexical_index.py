@@ -0,0 +1,144 @@
+"""
+Sözcüksel (BM25) ters indeks
+
+Chroma ile birlikte, Türkçe normalize edilmiş doküman metni üzerinde
+oluşturulur. Eş anlamlılar sorgu metnine eklenmek yerine düşük
+ağırlıklı sorgu terimleri olarak uygulanır; "zulip" veya "sertifika"
+gibi tam anahtar kelime eşleşmeleri LLM varyantına gerek kalmadan
+mikrosaniyeler içinde bulunur.
+"""
+
+import os
+import json
+import math
+from collections import Counter, defaultdict
+from typing import Dict, List, Tuple
+
+from langchain_core.documents import Document
+
+from .text_utils import normalize_turkish, tokenize
+
+
+LEXICAL_INDEX_FILENAME = "lexical_index.json"
+
+KEYWORD_MAP = {
+    "katılım": ["iştirak", "katılım oranı", "yoklama", "attendance", "devam"],
+    "canlı yayın": ["webinar", "web semineri", "youtube", "yayın", "live", "stream"],
+    "sertifika": ["certificate", "belge", "sertifikadaki", "diploma", "sertifikası"],
+    "bootcamp": ["eğitim", "kurs", "program", "kampı", "camp", "training"],
+    "süre": ["zaman", "gün", "hafta", "ne kadar", "kaç", "duration"],
+    "mentor": ["danışman", "eğitmen", "mentör", "öğretmen"],
+    "proje": ["ödev", "task", "görev", "assignment", "project", "tamamlama"],
+    "github": ["git", "repo", "repository", "kod yükleme", "arayüz"],
+    "grup": ["ekip", "takım", "team", "bireysel", "tek kişi", "iki kişi"],
+    "iş": ["staj", "kariyer", "fırsat", "employment", "job"],
+    "arşiv": ["kayıt", "video", "recording", "kaydediliyor"],
+    "duyuru": ["announcement", "bildirim", "haber", "kanal", "zulip"],
+    "takvim": ["tarih", "gün", "program", "schedule", "zamanlama"],
+    "toplantı": ["meeting", "buluşma", "görüşme", "saat", "zaman"]
+}
+
+
+def query_terms(query: str, synonym_weight: float = 0.3) -> Dict[str, float]:
+    """
+    Sorguyu ağırlıklı terimlere çevirir: sorgudaki terimler 1.0,
+    KEYWORD_MAP'ten gelen eş anlamlılar `synonym_weight` ağırlık alır.
+    Anahtar kelime geçiyorsa eş anlamlıları, bir eş anlamlı geçiyorsa
+    sadece anahtar kelimenin kendisi eklenir.
+    """
+    weights: Dict[str, float] = {t: 1.0 for t in tokenize(query)}
+    normalized = f" {normalize_turkish(query)}"
+
+    def contains(term: str) -> bool:
+        return f" {normalize_turkish(term)}" in normalized
+
+    expansions: List[str] = []
+    for keyword, synonyms in KEYWORD_MAP.items():
+        if contains(keyword):
+            expansions.extend(synonyms)
+        elif any(contains(term) for term in synonyms):
+            expansions.append(keyword)
+
+    for term in expansions:
+        for token in tokenize(term):
+            weights[token] = max(weights.get(token, 0.0), synonym_weight)
+
+    return weights
+
+
+class LexicalIndex:
+    """Türkçe normalize edilmiş metin üzerinde BM25 indeksi"""
+
+    def __init__(self, documents: List[Document], k1: float = 1.5, b: float = 0.75):
+        self.documents = documents
+        self.k1 = k1
+        self.b = b
+
+        self.postings: Dict[str, List[Tuple[int, int]]] = defaultdict(list)
+        self.doc_lengths: List[int] = []
+
+        for i, doc in enumerate(documents):
+            counts = Counter(tokenize(doc.page_content))
+            self.doc_lengths.append(sum(counts.values()))
+            for term, tf in counts.items():
+                self.postings[term].append((i, tf))
+
+        self.avg_length = (sum(self.doc_lengths) / len(self.doc_lengths)) if self.doc_lengths else 0.0
+        n = len(documents)
+        self.idf = {
+            term: math.log(1 + (n - len(p) + 0.5) / (len(p) + 0.5))
+            for term, p in self.postings.items()
+        }
+
+    def __len__(self) -> int:
+        return len(self.documents)
+
+    @classmethod
+    def from_store(cls, vectordb) -> "LexicalIndex":
+        """Vektör veritabanındaki dokümanlardan indeks oluşturur (kimlikler birebir aynı kalır)"""
+        data = vectordb.get(include=["documents", "metadatas"])
+        documents = []
+        for doc_id, text, metadata in zip(data["ids"], data["documents"], data["metadatas"]):
+            metadata = dict(metadata or {})
+            metadata.setdefault("doc_id", doc_id)
+            documents.append(Document(page_content=text, metadata=metadata))
+        return cls(documents)
+
+    def save(self, path: str):
+        tmp_path = path + ".tmp"
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump(
+                [{"page_content": d.page_content, "metadata": d.metadata} for d in self.documents],
+                f, ensure_ascii=False
+            )
+        os.replace(tmp_path, path)
+
+    @classmethod
+    def load(cls, path: str):
+        """Dosya yoksa None döner"""
+        if not os.path.exists(path):
+            return None
+        with open(path, 'r', encoding='utf-8') as f:
+            records = json.load(f)
+        return cls([Document(page_content=r["page_content"], metadata=r["metadata"]) for r in records])
+
+    def search(self, weighted_terms: Dict[str, float], k: int = 10) -> List[Tuple[Document, float]]:
+        """Ağırlıklı terimlerle BM25 araması yapar, (doküman, skor) listesi döner"""
+        scores: Dict[int, float] = defaultdict(float)
+        for term, weight in weighted_terms.items():
+            idf = self.idf.get(term)
+            if idf is None:
+                continue
+            for i, tf in self.postings[term]:
+                norm = self.k1 * (1 - self.b + self.b * self.doc_lengths[i] / self.avg_length)
+                scores[i] += weight * idf * tf * (self.k1 + 1) / (tf + norm)
+
+        ranked = sorted(scores.items(), key=lambda item: item[1], reverse=True)[:k]
+        return [(self.documents[i], score) for i, score in ranked]
+
+
+def build_lexical_index(vectordb, db_path: str) -> LexicalIndex:
+    """Sözcüksel indeksi vektör veritabanından oluşturur ve kaydeder"""
+    index = LexicalIndex.from_store(vectordb)
+    index.save(os.path.join(db_path, LEXICAL_INDEX_FILENAME))
+    return index
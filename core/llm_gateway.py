@@ -0,0 +1,431 @@
+"""
+Paylaşılan Gemini istemci katmanı
+
+Tüm LLM çağrıları (cevap, plan, condense, MultiQuery, genel LLM) tek bir
+LLMGateway'den geçer:
+
+- token bucket ile dakika başına istek sınırı (kota)
+- eşzamanlı çağrı sınırı; bekleyen çağrılar kuyrukta sayılır
+- 429 / 5xx hatalarında jitter'lı üstel geri çekilme ile yeniden deneme
+- single-flight: aynı anda uçuşta olan aynı prompt tek upstream çağrısını
+  paylaşır (ör. duyurudan hemen sonra yüzlerce "sertifika ne zaman?").
+  Bekleyenlere sadece upstream sonucu veya hatası iletilir; lider iptal
+  edilirse (spekülatif fallback'in atılması, SSE bağlantısının kopması)
+  bekleyenlerden biri liderliği devralıp çağrıyı kendisi yapar.
+
+GatewayChatModel herhangi bir sohbet modelini sarar ve LangChain
+Runnable olarak aynen kullanılır. Akış (stream) çağrıları paylaşılmaz;
+ilk parça gelmeden oluşan hatalarda yeniden denenir.
+"""
+
+import copy
+import json
+import time
+import random
+import asyncio
+import hashlib
+import threading
+from collections import Counter
+from concurrent.futures import Future
+from contextlib import asynccontextmanager, contextmanager
+from typing import Any, AsyncIterator, Awaitable, Callable, Dict, Iterator, List, Optional, Tuple
+
+from langchain_core.language_models.chat_models import BaseChatModel
+from langchain_core.messages import AIMessageChunk, BaseMessage
+from langchain_core.outputs import ChatGenerationChunk, ChatResult
+
+from .metrics import LatencyHistogram
+from .rate_limit import RateLimiter
+
+
+RETRYABLE_STATUS_CODES = {429, 500, 502, 503, 504}
+RETRYABLE_ERROR_NAMES = {
+    "ResourceExhausted", "TooManyRequests", "ServiceUnavailable", "InternalServerError",
+    "BadGateway", "GatewayTimeout", "DeadlineExceeded"
+}
+
+_SLOT_POLL_SECONDS = 0.01
+
+# Lider upstream sonucu almadan iptal edildi; bekleyenler yeniden katılır
+_LEADER_GONE = object()
+
+
+class LLMGatewayError(Exception):
+    """Kota veya kapasite nedeniyle LLM çağrısı yapılamadı"""
+
+
+def is_retryable(error: BaseException) -> bool:
+    """429 / 5xx (google.api_core veya HTTP istemcisi hataları) yeniden denenir"""
+    for attr in ("code", "status_code"):
+        value = getattr(error, attr, None)
+        if isinstance(value, int) and value in RETRYABLE_STATUS_CODES:
+            return True
+    return type(error).__name__ in RETRYABLE_ERROR_NAMES
+
+
+class LLMGateway:
+    """Hız sınırı, eşzamanlılık sınırı, yeniden deneme ve single-flight"""
+
+    def __init__(
+        self,
+        requests_per_minute: Optional[float] = None,
+        max_concurrency: int = 8,
+        max_retries: int = 3,
+        base_delay: float = 1.0,
+        max_delay: float = 20.0,
+        acquire_timeout: float = 60.0,
+        window: int = 1000
+    ):
+        self.limiter = RateLimiter(requests_per_minute, burst=max_concurrency)
+        self.max_concurrency = max_concurrency
+        self.max_retries = max_retries
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        self.acquire_timeout = acquire_timeout
+
+        self._slots = threading.BoundedSemaphore(max_concurrency)
+        self._inflight: Dict[str, Future] = {}
+        self._lock = threading.Lock()
+        self.queue_depth = 0
+        self.active = 0
+        self.wait_times = LatencyHistogram(window)
+        self.counters = Counter()
+
+    def _count(self, name: str, value: int = 1):
+        with self._lock:
+            self.counters[name] += value
+
+    # --- kabul: eşzamanlılık slotu + hız sınırı ---
+
+    def _enter_queue(self) -> float:
+        with self._lock:
+            self.queue_depth += 1
+        return time.monotonic()
+
+    def _leave_queue(self, queued_at: float, admitted: bool):
+        with self._lock:
+            self.queue_depth -= 1
+            if admitted:
+                self.active += 1
+                self.wait_times.observe(time.monotonic() - queued_at)
+            else:
+                self.counters["timeouts"] += 1
+
+    def _admit(self):
+        queued_at = self._enter_queue()
+        admitted = False
+        try:
+            if not self._slots.acquire(timeout=self.acquire_timeout):
+                raise LLMGatewayError("LLM kuyruğu dolu, lütfen birazdan tekrar deneyin")
+            remaining = self.acquire_timeout - (time.monotonic() - queued_at)
+            if not self.limiter.acquire(timeout=max(0.0, remaining)):
+                self._slots.release()
+                raise LLMGatewayError("LLM istek kotası dolu, lütfen birazdan tekrar deneyin")
+            admitted = True
+        finally:
+            self._leave_queue(queued_at, admitted)
+
+    async def _aadmit(self):
+        # Semafor thread'ler ve olay döngüleri arasında paylaşıldığı için yoklanır
+        queued_at = self._enter_queue()
+        admitted = False
+        try:
+            while not self._slots.acquire(blocking=False):
+                if time.monotonic() - queued_at >= self.acquire_timeout:
+                    raise LLMGatewayError("LLM kuyruğu dolu, lütfen birazdan tekrar deneyin")
+                await asyncio.sleep(_SLOT_POLL_SECONDS)
+            remaining = self.acquire_timeout - (time.monotonic() - queued_at)
+            if not await self.limiter.aacquire(timeout=max(0.0, remaining)):
+                self._slots.release()
+                raise LLMGatewayError("LLM istek kotası dolu, lütfen birazdan tekrar deneyin")
+            admitted = True
+        finally:
+            self._leave_queue(queued_at, admitted)
+
+    def _release(self):
+        with self._lock:
+            self.active -= 1
+        self._slots.release()
+
+    @contextmanager
+    def slot(self):
+        """Tek bir upstream denemesi için kabul (akış çağrıları)"""
+        self._admit()
+        try:
+            yield
+        finally:
+            self._release()
+
+    @asynccontextmanager
+    async def aslot(self):
+        await self._aadmit()
+        try:
+            yield
+        finally:
+            self._release()
+
+    # --- yeniden deneme ---
+
+    def retry_delay(self, error: BaseException, attempt: int) -> Optional[float]:
+        """Yeniden denenecekse bekleme süresi (full jitter), denenmeyecekse None"""
+        if attempt >= self.max_retries or not is_retryable(error):
+            return None
+        self._count("retries")
+        return random.uniform(0, min(self.max_delay, self.base_delay * 2 ** attempt))
+
+    def _final_error(self, error: BaseException) -> BaseException:
+        """Yeniden deneme bittiğinde fırlatılacak hata; kota/5xx hataları LLMGatewayError olur"""
+        self._count("failures")
+        if not is_retryable(error):
+            return error
+        wrapped = LLMGatewayError(f"LLM servisi şu an yanıt veremiyor: {error}")
+        wrapped.__cause__ = error
+        return wrapped
+
+    def _with_retry(self, fn: Callable[[], Any]) -> Any:
+        attempt = 0
+        while True:
+            with self.slot():
+                self._count("upstream_calls")
+                try:
+                    return fn()
+                except Exception as e:
+                    delay = self.retry_delay(e, attempt)
+                    if delay is None:
+                        raise self._final_error(e)
+            time.sleep(delay)
+            attempt += 1
+
+    async def _awith_retry(self, coro_fn: Callable[[], Awaitable[Any]]) -> Any:
+        attempt = 0
+        while True:
+            async with self.aslot():
+                self._count("upstream_calls")
+                try:
+                    return await coro_fn()
+                except Exception as e:
+                    delay = self.retry_delay(e, attempt)
+                    if delay is None:
+                        raise self._final_error(e)
+            await asyncio.sleep(delay)
+            attempt += 1
+
+    # --- single-flight ---
+
+    def _join(self, key: Optional[str], rejoin: bool = False) -> Tuple[bool, Optional[Future]]:
+        """(lider mi, paylaşılan Future) döner; key None ise paylaşım yapılmaz"""
+        with self._lock:
+            if not rejoin:
+                self.counters["calls"] += 1
+            if key is None:
+                return True, None
+            future = self._inflight.get(key)
+            if future is not None:
+                self.counters["coalesced"] += 1
+                return False, future
+            future = Future()
+            self._inflight[key] = future
+            return True, future
+
+    def _settle(self, key: Optional[str], future: Optional[Future], result: Any = None, error: BaseException = None):
+        if future is None:
+            return
+        with self._lock:
+            # Liderliği devralan yeni çağrının kaydı silinmesin
+            if self._inflight.get(key) is future:
+                del self._inflight[key]
+        if error is not None:
+            future.set_exception(error)
+        else:
+            future.set_result(result)
+
+    def call(self, key: Optional[str], fn: Callable[[], Any]) -> Any:
+        """fn'i kabul + yeniden deneme ile çalıştırır; aynı key uçuştaysa sonucunu bekler"""
+        leader, future = self._join(key)
+        while not leader:
+            result = future.result()
+            if result is not _LEADER_GONE:
+                return copy.deepcopy(result)
+            leader, future = self._join(key, rejoin=True)
+
+        try:
+            result = self._with_retry(fn)
+        except Exception as e:
+            self._settle(key, future, error=e)
+            raise
+        except BaseException:
+            self._settle(key, future, result=_LEADER_GONE)
+            raise
+        self._settle(key, future, result=result)
+        return result
+
+    async def acall(self, key: Optional[str], coro_fn: Callable[[], Awaitable[Any]]) -> Any:
+        leader, future = self._join(key)
+        while not leader:
+            # shield: bekleyenin iptali paylaşılan Future'ı iptal etmez
+            result = await asyncio.shield(asyncio.wrap_future(future))
+            if result is not _LEADER_GONE:
+                return copy.deepcopy(result)
+            leader, future = self._join(key, rejoin=True)
+
+        try:
+            result = await self._awith_retry(coro_fn)
+        except Exception as e:
+            self._settle(key, future, error=e)
+            raise
+        except BaseException:
+            # İptal (CancelledError) bekleyenlere iletilmez; biri liderliği devralır
+            self._settle(key, future, result=_LEADER_GONE)
+            raise
+        self._settle(key, future, result=result)
+        return result
+
+    # --- metrikler ---
+
+    def get_stats(self) -> Dict:
+        with self._lock:
+            quantiles = self.wait_times.quantiles()
+            return {
+                "requests_per_minute": self.limiter.requests_per_minute,
+                "max_concurrency": self.max_concurrency,
+                "queue_depth": self.queue_depth,
+                "active": self.active,
+                "in_flight_prompts": len(self._inflight),
+                "calls": self.counters["calls"],
+                "upstream_calls": self.counters["upstream_calls"],
+                "coalesced": self.counters["coalesced"],
+                "retries": self.counters["retries"],
+                "failures": self.counters["failures"],
+                "timeouts": self.counters["timeouts"],
+                "wait_ms": {f"p{int(q * 100)}": round(v * 1000, 2) for q, v in quantiles.items()}
+            }
+
+    def prometheus(self, prefix: str = "mentormate") -> str:
+        """Prometheus metin formatında dışa aktarım"""
+        with self._lock:
+            lines = [
+                f"# HELP {prefix}_llm_queue_depth Kabul bekleyen LLM çağrısı sayısı",
+                f"# TYPE {prefix}_llm_queue_depth gauge",
+                f"{prefix}_llm_queue_depth {self.queue_depth}",
+                f"# HELP {prefix}_llm_active Devam eden upstream LLM çağrısı sayısı",
+                f"# TYPE {prefix}_llm_active gauge",
+                f"{prefix}_llm_active {self.active}",
+                f"# HELP {prefix}_llm_wait_seconds LLM çağrılarının kuyrukta bekleme süresi",
+                f"# TYPE {prefix}_llm_wait_seconds summary"
+            ]
+            for q, value in self.wait_times.quantiles().items():
+                lines.append(f'{prefix}_llm_wait_seconds{{quantile="{q}"}} {value:.6f}')
+            lines.append(f"{prefix}_llm_wait_seconds_sum {self.wait_times.sum:.6f}")
+            lines.append(f"{prefix}_llm_wait_seconds_count {self.wait_times.count}")
+
+            for counter, help_text in (
+                ("calls", "Gateway'e gelen LLM çağrısı sayısı"),
+                ("upstream_calls", "Gemini'ye yapılan istek sayısı (yeniden denemeler dahil)"),
+                ("coalesced", "Uçuştaki aynı prompt'a bağlanan çağrı sayısı"),
+                ("retries", "Yeniden deneme sayısı"),
+                ("failures", "Hata ile biten çağrı sayısı"),
+                ("timeouts", "Kuyruk zaman aşımı sayısı")
+            ):
+                lines.append(f"# HELP {prefix}_llm_{counter}_total {help_text}")
+                lines.append(f"# TYPE {prefix}_llm_{counter}_total counter")
+                lines.append(f"{prefix}_llm_{counter}_total {self.counters[counter]}")
+
+        return "\n".join(lines) + "\n"
+
+
+class GatewayChatModel(BaseChatModel):
+    """Bir sohbet modelinin tüm çağrılarını LLMGateway üzerinden yapan sarmalayıcı"""
+
+    llm: BaseChatModel
+    gateway: Any
+
+    class Config:
+        arbitrary_types_allowed = True
+
+    @property
+    def _llm_type(self) -> str:
+        return f"gateway-{self.llm._llm_type}"
+
+    @property
+    def _identifying_params(self) -> Dict[str, Any]:
+        return self.llm._identifying_params
+
+    def _key(self, messages: List[BaseMessage], stop: Optional[List[str]], kwargs: Dict[str, Any]) -> str:
+        """Model ayarları + mesajlar + parametrelerden single-flight anahtarı"""
+        payload = json.dumps(
+            {
+                "model": [type(self.llm).__name__, self.llm._identifying_params],
+                "messages": [(m.type, m.content) for m in messages],
+                "stop": stop,
+                "kwargs": kwargs
+            },
+            default=str, sort_keys=True, ensure_ascii=False
+        )
+        return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+    def _generate(self, messages: List[BaseMessage], stop=None, run_manager=None, **kwargs: Any) -> ChatResult:
+        return self.gateway.call(
+            self._key(messages, stop, kwargs),
+            lambda: self.llm._generate(messages, stop=stop, **kwargs)
+        )
+
+    async def _agenerate(self, messages: List[BaseMessage], stop=None, run_manager=None, **kwargs: Any) -> ChatResult:
+        return await self.gateway.acall(
+            self._key(messages, stop, kwargs),
+            lambda: self.llm._agenerate(messages, stop=stop, **kwargs)
+        )
+
+    def _inner_streams(self) -> bool:
+        return not (
+            type(self.llm)._stream is BaseChatModel._stream
+            and type(self.llm)._astream is BaseChatModel._astream
+        )
+
+    def _single_chunk(self, result: ChatResult) -> ChatGenerationChunk:
+        return ChatGenerationChunk(message=AIMessageChunk(content=result.generations[0].message.content))
+
+    def _stream(self, messages: List[BaseMessage], stop=None, run_manager=None, **kwargs: Any) -> Iterator[ChatGenerationChunk]:
+        if not self._inner_streams():
+            yield self._single_chunk(self._generate(messages, stop=stop, **kwargs))
+            return
+
+        self.gateway._count("calls")
+        attempt = 0
+        while True:
+            started = False
+            with self.gateway.slot():
+                self.gateway._count("upstream_calls")
+                try:
+                    for chunk in self.llm._stream(messages, stop=stop, **kwargs):
+                        started = True
+                        yield chunk
+                    return
+                except Exception as e:
+                    delay = None if started else self.gateway.retry_delay(e, attempt)
+                    if delay is None:
+                        raise self.gateway._final_error(e)
+            time.sleep(delay)
+            attempt += 1
+
+    async def _astream(self, messages: List[BaseMessage], stop=None, run_manager=None, **kwargs: Any) -> AsyncIterator[ChatGenerationChunk]:
+        if not self._inner_streams():
+            yield self._single_chunk(await self._agenerate(messages, stop=stop, **kwargs))
+            return
+
+        self.gateway._count("calls")
+        attempt = 0
+        while True:
+            started = False
+            async with self.gateway.aslot():
+                self.gateway._count("upstream_calls")
+                try:
+                    async for chunk in self.llm._astream(messages, stop=stop, **kwargs):
+                        started = True
+                        yield chunk
+                    return
+                except Exception as e:
+                    delay = None if started else self.gateway.retry_delay(e, attempt)
+                    if delay is None:
+                        raise self.gateway._final_error(e)
+            await asyncio.sleep(delay)
+            attempt += 1
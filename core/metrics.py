@@ -0,0 +1,263 @@
+"""
+İstek bazında izleme (trace) ve kayan pencereli gecikme metrikleri
+
+Her sorgu bir RequestTrace ile izlenir: aşama süreleri (embedding,
+yönlendirme, kısa yol, plan, retrieval, üretim, genel LLM), LLM çağrı
+sayısı, prompt/completion token sayıları, bağlam paketlemenin kazandırdığı
+token'lar ve önbellek isabetleri. LLM
+çağrıları LangChain callback'i ile sayılır; callback her çağrıya
+config üzerinden verildiği için eşzamanlı istekler birbirine karışmaz.
+
+Biten izler PipelineMetrics'te toplanır: aşama başına son N örnek
+üzerinden p50/p95/p99 ve toplam sayaçlar; Prometheus metin formatında
+da dışa aktarılabilir.
+"""
+
+import time
+import threading
+from collections import Counter, deque
+from contextlib import contextmanager
+from typing import Any, Dict, List, Optional
+from uuid import UUID
+
+from langchain_core.callbacks import BaseCallbackHandler
+from langchain_core.outputs import LLMResult
+
+
+QUANTILES = (0.5, 0.95, 0.99)
+
+
+def _estimate_tokens(text: str) -> int:
+    """Sağlayıcı kullanım bilgisi vermezse kaba tahmin (~4 karakter/token)"""
+    return max(1, len(text) // 4) if text else 0
+
+
+def _usage(response: LLMResult) -> Optional[Dict[str, int]]:
+    """Gemini / LangChain kullanım alanlarından token sayılarını okur"""
+    for generations in response.generations:
+        for generation in generations:
+            message = getattr(generation, "message", None)
+            usage = getattr(message, "usage_metadata", None)
+            if usage:
+                return {"prompt": usage.get("input_tokens", 0), "completion": usage.get("output_tokens", 0)}
+            metadata = getattr(message, "response_metadata", None) or {}
+            usage = metadata.get("usage_metadata")
+            if usage:
+                return {"prompt": usage.get("prompt_token_count", 0), "completion": usage.get("candidates_token_count", 0)}
+
+    usage = (response.llm_output or {}).get("token_usage")
+    if usage:
+        return {"prompt": usage.get("prompt_tokens", 0), "completion": usage.get("completion_tokens", 0)}
+    return None
+
+
+class TraceCallbackHandler(BaseCallbackHandler):
+    """LLM çağrılarını ve token sayılarını tek bir RequestTrace'e yazar"""
+
+    run_inline = True
+
+    def __init__(self, trace: "RequestTrace"):
+        self.trace = trace
+        self._prompt_chars: Dict[UUID, int] = {}
+
+    def on_chat_model_start(self, serialized: Dict[str, Any], messages: List[List[Any]], *, run_id: UUID, **kwargs: Any):
+        self._prompt_chars[run_id] = sum(len(str(m.content)) for batch in messages for m in batch)
+
+    def on_llm_start(self, serialized: Dict[str, Any], prompts: List[str], *, run_id: UUID, **kwargs: Any):
+        self._prompt_chars[run_id] = sum(len(p) for p in prompts)
+
+    def on_llm_end(self, response: LLMResult, *, run_id: UUID, **kwargs: Any):
+        prompt_chars = self._prompt_chars.pop(run_id, 0)
+        usage = _usage(response)
+        if usage is None:
+            completion = "".join(g.text for generations in response.generations for g in generations)
+            self.trace.add_llm_call(prompt_chars // 4, _estimate_tokens(completion), estimated=True)
+        else:
+            self.trace.add_llm_call(usage["prompt"], usage["completion"])
+
+    def on_llm_error(self, error: BaseException, *, run_id: UUID, **kwargs: Any):
+        self._prompt_chars.pop(run_id, None)
+        self.trace.add_llm_call(0, 0, failed=True)
+
+
+class RequestTrace:
+    """Tek bir sorgunun aşama süreleri, LLM kullanımı ve önbellek isabetleri"""
+
+    def __init__(self):
+        self.started = time.perf_counter()
+        self.total: Optional[float] = None
+        self.stages: Dict[str, float] = {}
+        self.llm_calls = 0
+        self.llm_errors = 0
+        self.prompt_tokens = 0
+        self.completion_tokens = 0
+        self.tokens_estimated = False
+        self.cache_hits: List[str] = []
+        self.context: Optional[Dict] = None
+        self._lock = threading.Lock()
+        self.config = {"callbacks": [TraceCallbackHandler(self)]}
+
+    @contextmanager
+    def stage(self, name: str):
+        """Aşama süresini ölçer; aynı aşama birden fazla çalışırsa süreler toplanır"""
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.add_stage(name, time.perf_counter() - start)
+
+    def add_stage(self, name: str, seconds: float):
+        """Dışarıda ölçülen süreyi ekler (ör. toplu işlemde öğe başına pay)"""
+        with self._lock:
+            self.stages[name] = self.stages.get(name, 0.0) + seconds
+
+    def add_llm_call(self, prompt_tokens: int, completion_tokens: int, estimated: bool = False, failed: bool = False):
+        with self._lock:
+            self.llm_calls += 1
+            self.llm_errors += int(failed)
+            self.prompt_tokens += prompt_tokens
+            self.completion_tokens += completion_tokens
+            self.tokens_estimated = self.tokens_estimated or estimated
+
+    def set_context(self, stats: Dict):
+        """Bağlam paketleme istatistikleri (bkz. context_packer)"""
+        with self._lock:
+            self.context = dict(stats)
+
+    def cache_hit(self, kind: str):
+        with self._lock:
+            self.cache_hits.append(kind)
+
+    def finish(self):
+        if self.total is None:
+            self.total = time.perf_counter() - self.started
+
+    def to_dict(self) -> Dict:
+        with self._lock:
+            return {
+                "total_ms": round((self.total or 0.0) * 1000, 2),
+                "stages_ms": {name: round(seconds * 1000, 2) for name, seconds in self.stages.items()},
+                "llm_calls": self.llm_calls,
+                "llm_errors": self.llm_errors,
+                "prompt_tokens": self.prompt_tokens,
+                "completion_tokens": self.completion_tokens,
+                "tokens_estimated": self.tokens_estimated,
+                "cache_hits": list(self.cache_hits),
+                "context": dict(self.context) if self.context else None
+            }
+
+
+class LatencyHistogram:
+    """Son `window` örnek üzerinden yüzdelikler + tüm zamanların sayısı/toplamı"""
+
+    def __init__(self, window: int = 1000):
+        self.samples = deque(maxlen=window)
+        self.count = 0
+        self.sum = 0.0
+
+    def observe(self, seconds: float):
+        self.samples.append(seconds)
+        self.count += 1
+        self.sum += seconds
+
+    def quantiles(self) -> Dict[float, float]:
+        ordered = sorted(self.samples)
+        if not ordered:
+            return {}
+        return {q: ordered[min(len(ordered) - 1, int(q * len(ordered)))] for q in QUANTILES}
+
+
+class PipelineMetrics:
+    """Biten izleri toplayan thread-safe metrik deposu"""
+
+    def __init__(self, window: int = 1000):
+        self.window = window
+        self.histograms: Dict[str, LatencyHistogram] = {}
+        self.counters = Counter()
+        self.last_trace: Optional[Dict] = None
+        self._lock = threading.Lock()
+
+    def observe(self, trace: RequestTrace):
+        trace.finish()
+        summary = trace.to_dict()
+        with self._lock:
+            for name, seconds in list(trace.stages.items()) + [("total", trace.total)]:
+                self.histograms.setdefault(name, LatencyHistogram(self.window)).observe(seconds)
+            self.counters["requests"] += 1
+            self.counters["llm_calls"] += summary["llm_calls"]
+            self.counters["llm_errors"] += summary["llm_errors"]
+            self.counters["prompt_tokens"] += summary["prompt_tokens"]
+            self.counters["completion_tokens"] += summary["completion_tokens"]
+            for kind in summary["cache_hits"]:
+                self.counters[f"cache_hit:{kind}"] += 1
+            if summary["context"]:
+                self.counters["context_tokens_in"] += summary["context"]["tokens_in"]
+                self.counters["context_tokens_saved"] += summary["context"]["tokens_saved"]
+            self.last_trace = summary
+
+    def record_error(self):
+        with self._lock:
+            self.counters["errors"] += 1
+
+    def snapshot(self) -> Dict:
+        with self._lock:
+            stages = {
+                name: {
+                    "count": histogram.count,
+                    **{f"p{int(q * 100)}_ms": round(v * 1000, 2) for q, v in histogram.quantiles().items()}
+                }
+                for name, histogram in self.histograms.items()
+            }
+            requests = self.counters["requests"]
+            return {
+                "requests": requests,
+                "errors": self.counters["errors"],
+                "llm_calls": self.counters["llm_calls"],
+                "llm_calls_per_request": round(self.counters["llm_calls"] / requests, 3) if requests else 0.0,
+                "prompt_tokens": self.counters["prompt_tokens"],
+                "completion_tokens": self.counters["completion_tokens"],
+                "context_tokens_saved": self.counters["context_tokens_saved"],
+                "context_saved_ratio": round(
+                    self.counters["context_tokens_saved"] / self.counters["context_tokens_in"], 3
+                ) if self.counters["context_tokens_in"] else 0.0,
+                "cache_hits": {
+                    key.split(":", 1)[1]: value for key, value in self.counters.items() if key.startswith("cache_hit:")
+                },
+                "stages": stages,
+                "last_trace": self.last_trace
+            }
+
+    def prometheus(self, prefix: str = "mentormate") -> str:
+        """Prometheus metin formatında dışa aktarım"""
+        lines = [
+            f"# HELP {prefix}_stage_latency_seconds Pipeline aşama gecikmesi (son {self.window} istek)",
+            f"# TYPE {prefix}_stage_latency_seconds summary"
+        ]
+        with self._lock:
+            for name, histogram in sorted(self.histograms.items()):
+                for q, value in histogram.quantiles().items():
+                    lines.append(f'{prefix}_stage_latency_seconds{{stage="{name}",quantile="{q}"}} {value:.6f}')
+                lines.append(f'{prefix}_stage_latency_seconds_sum{{stage="{name}"}} {histogram.sum:.6f}')
+                lines.append(f'{prefix}_stage_latency_seconds_count{{stage="{name}"}} {histogram.count}')
+
+            for counter, help_text in (
+                ("requests", "İşlenen sorgu sayısı"),
+                ("errors", "Hata ile biten sorgu sayısı"),
+                ("llm_calls", "LLM çağrı sayısı"),
+                ("llm_errors", "Hata ile biten LLM çağrı sayısı"),
+                ("prompt_tokens", "Prompt token sayısı"),
+                ("completion_tokens", "Completion token sayısı"),
+                ("context_tokens_in", "Paketlemeden önceki bağlam token'ları (tahmini)"),
+                ("context_tokens_saved", "Bağlam paketlemenin prompt'tan çıkardığı token'lar (tahmini)")
+            ):
+                lines.append(f"# HELP {prefix}_{counter}_total {help_text}")
+                lines.append(f"# TYPE {prefix}_{counter}_total counter")
+                lines.append(f"{prefix}_{counter}_total {self.counters[counter]}")
+
+            lines.append(f"# HELP {prefix}_cache_hits_total Önbellek / kısa yol isabetleri")
+            lines.append(f"# TYPE {prefix}_cache_hits_total counter")
+            for key, value in sorted(self.counters.items()):
+                if key.startswith("cache_hit:"):
+                    lines.append(f'{prefix}_cache_hits_total{{cache="{key.split(":", 1)[1]}"}} {value}')
+
+        return "\n".join(lines) + "\n"
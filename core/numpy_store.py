@@ -0,0 +1,328 @@
+"""
+Süreç içi NumPy vektör deposu
+
+Birkaç bin adet 384 boyutlu vektör için chromadb/SQLite katmanı
+gereksiz yüktür. Bu depo L2-normalize edilmiş vektörleri bellek
+eşlemeli (memory-mapped) bir .npy matrisinde, doküman metni ve
+metadata'yı yanındaki bir JSON dosyasında tutar. Kosinüs benzerliği
+ve MMR vektörize NumPy işlemleriyle yapılır; birden fazla sorgu
+vektörü tek bir matris çarpımıyla aranabilir.
+
+Yazmalar kapasitesi katlanarak büyüyen bellek içi bir matrise yapılır
+(ekleme sona yazar, silme son satırı boşalan satıra taşır); diske
+yazmak için flush() çağrılır. İndeksleyici bunu her grupta değil aşama
+sonlarında ve seyrekleşen aralıklarla yapar, böylece N dokümanın
+indekslenmesi O(N²) dosya yazımı gerektirmez. Yayınlanmış sürümler salt
+okunur açılır; yazma sadece indeks kurulumunda yapılır.
+"""
+
+import os
+import json
+import uuid
+import threading
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+import numpy as np
+from langchain_core.documents import Document
+from langchain_core.embeddings import Embeddings
+from langchain_core.vectorstores import VectorStore
+
+
+NUMPY_STORE_DIRNAME = "numpy_store"
+VECTORS_FILENAME = "vectors.npy"
+RECORDS_FILENAME = "records.json"
+
+
+def _normalize_rows(matrix: np.ndarray) -> np.ndarray:
+    norms = np.linalg.norm(matrix, axis=1, keepdims=True)
+    norms[norms == 0] = 1.0
+    return (matrix / norms).astype(np.float32)
+
+
+def mmr_select(
+    query: np.ndarray,
+    candidates: np.ndarray,
+    k: int,
+    lambda_mult: float
+) -> List[int]:
+    """
+    Normalize edilmiş aday vektörleri arasından MMR ile k indeks seçer.
+    Aday-aday benzerlik matrisi bir kez hesaplanır, her adım vektörizedir.
+    """
+    if len(candidates) == 0:
+        return []
+
+    relevance = candidates @ query
+    pairwise = candidates @ candidates.T
+    selected = [int(np.argmax(relevance))]
+    max_similarity = pairwise[selected[0]].copy()
+
+    while len(selected) < min(k, len(candidates)):
+        scores = lambda_mult * relevance - (1 - lambda_mult) * max_similarity
+        scores[selected] = -np.inf
+        best = int(np.argmax(scores))
+        selected.append(best)
+        np.maximum(max_similarity, pairwise[best], out=max_similarity)
+
+    return selected
+
+
+class NumpyVectorStore(VectorStore):
+    """Bellek eşlemeli .npy matrisi + JSON metadata üzerinde vektör deposu"""
+
+    def __init__(self, persist_directory: str, embedding_function: Embeddings, collection_name: str = "default"):
+        self.persist_directory = os.path.join(persist_directory, NUMPY_STORE_DIRNAME, collection_name)
+        self._embedding_function = embedding_function
+        self._lock = threading.Lock()
+
+        # (vektörler, kimlikler, metinler, metadata); okuyucular her aramada
+        # bu demetin bir anlık görüntüsünü kullanır
+        self._state: Tuple[np.ndarray, List[str], List[str], List[Dict]] = (
+            np.zeros((0, 0), dtype=np.float32), [], [], []
+        )
+        self._rows: Dict[str, int] = {}
+        self._buffer: Optional[np.ndarray] = None
+        self._dirty = False
+        self._load()
+
+    @property
+    def embeddings(self) -> Embeddings:
+        return self._embedding_function
+
+    def __len__(self) -> int:
+        return len(self._state[1])
+
+    def _load(self):
+        vectors_path = os.path.join(self.persist_directory, VECTORS_FILENAME)
+        records_path = os.path.join(self.persist_directory, RECORDS_FILENAME)
+        if not (os.path.exists(vectors_path) and os.path.exists(records_path)):
+            return
+
+        with open(records_path, 'r', encoding='utf-8') as f:
+            records = json.load(f)
+        self._state = (
+            np.load(vectors_path, mmap_mode="r"),
+            [r["id"] for r in records],
+            [r["page_content"] for r in records],
+            [r["metadata"] for r in records]
+        )
+        self._rows = {doc_id: i for i, doc_id in enumerate(self._state[1])}
+
+    def prefetch(self) -> int:
+        """Bellek eşlemeli matrisin tüm sayfalarını okuyarak belleğe alır (ısınma)"""
+        vectors = self._state[0]
+        if vectors.size:
+            float(np.add.reduce(vectors, axis=None))
+        return int(vectors.nbytes)
+
+    def _reserve(self, extra: int, dim: int) -> np.ndarray:
+        """`extra` yeni satır için yer olan yazılabilir matris (kapasite katlanarak büyür)"""
+        count = len(self._state[1])
+        if self._buffer is None or count + extra > len(self._buffer):
+            capacity = max(count + extra, 2 * (len(self._buffer) if self._buffer is not None else count), 256)
+            buffer = np.zeros((capacity, dim), dtype=np.float32)
+            if count:
+                buffer[:count] = self._state[0][:count]
+            self._buffer = buffer
+        return self._buffer
+
+    def flush(self):
+        """Bekleyen değişiklikleri geçici adla yazıp dosyaları atomik olarak değiştirir"""
+        with self._lock:
+            if not self._dirty:
+                return
+            vectors, ids, texts, metadatas = self._state
+
+            os.makedirs(self.persist_directory, exist_ok=True)
+            vectors_path = os.path.join(self.persist_directory, VECTORS_FILENAME)
+            records_path = os.path.join(self.persist_directory, RECORDS_FILENAME)
+
+            with open(vectors_path + ".tmp", 'wb') as f:
+                np.save(f, np.ascontiguousarray(vectors))
+            with open(records_path + ".tmp", 'w', encoding='utf-8') as f:
+                json.dump(
+                    [{"id": i, "page_content": t, "metadata": m} for i, t, m in zip(ids, texts, metadatas)],
+                    f, ensure_ascii=False
+                )
+            os.replace(vectors_path + ".tmp", vectors_path)
+            os.replace(records_path + ".tmp", records_path)
+            self._dirty = False
+
+    def add_texts(
+        self,
+        texts: Iterable[str],
+        metadatas: Optional[List[dict]] = None,
+        ids: Optional[List[str]] = None,
+        **kwargs: Any
+    ) -> List[str]:
+        """Kayıtları ekler (aynı kimlikli kayıt yerinde güncellenir); diske flush() ile yazılır"""
+        texts = list(texts)
+        metadatas = metadatas or [{} for _ in texts]
+        ids = ids or [uuid.uuid4().hex for _ in texts]
+        if not texts:
+            return []
+
+        new_vectors = _normalize_rows(np.asarray(self._embedding_function.embed_documents(texts), dtype=np.float32))
+
+        with self._lock:
+            _, all_ids, all_texts, all_metadatas = self._state
+            buffer = self._reserve(len(ids), new_vectors.shape[1])
+            # Aynı çağrıda tekrar eden kimliklerde son kayıt geçerlidir
+            for doc_id, text, metadata, vector in zip(ids, texts, metadatas, new_vectors):
+                row = self._rows.get(doc_id)
+                if row is None:
+                    row = len(all_ids)
+                    self._rows[doc_id] = row
+                    all_ids.append(doc_id)
+                    all_texts.append(text)
+                    all_metadatas.append(dict(metadata))
+                else:
+                    all_texts[row] = text
+                    all_metadatas[row] = dict(metadata)
+                buffer[row] = vector
+            self._state = (buffer[:len(all_ids)], all_ids, all_texts, all_metadatas)
+            self._dirty = True
+        return list(ids)
+
+    def delete(self, ids: Optional[List[str]] = None, **kwargs: Any) -> Optional[bool]:
+        if not ids:
+            return False
+
+        with self._lock:
+            vectors, all_ids, all_texts, all_metadatas = self._state
+            if not all_ids:
+                return True
+            buffer = self._reserve(0, vectors.shape[1])
+            for doc_id in ids:
+                row = self._rows.pop(doc_id, None)
+                if row is None:
+                    continue
+                # Son satır boşalan satıra taşınır; dolu satırlar bitişik kalır
+                last = len(all_ids) - 1
+                if row != last:
+                    buffer[row] = buffer[last]
+                    all_ids[row] = all_ids[last]
+                    all_texts[row] = all_texts[last]
+                    all_metadatas[row] = all_metadatas[last]
+                    self._rows[all_ids[row]] = row
+                all_ids.pop()
+                all_texts.pop()
+                all_metadatas.pop()
+            self._state = (buffer[:len(all_ids)], all_ids, all_texts, all_metadatas)
+            self._dirty = True
+        return True
+
+    def get(self, include: Optional[List[str]] = None) -> Dict:
+        """Chroma.get ile uyumlu: {"ids", "documents", "metadatas"}"""
+        include = include if include is not None else ["documents", "metadatas"]
+        _, ids, texts, metadatas = self._state
+        return {
+            "ids": list(ids),
+            "documents": list(texts) if "documents" in include else None,
+            "metadatas": list(metadatas) if "metadatas" in include else None
+        }
+
+    @staticmethod
+    def _document(state: Tuple, i: int, score: float) -> Document:
+        _, ids, texts, metadatas = state
+        metadata = dict(metadatas[i])
+        metadata.setdefault("doc_id", ids[i])
+        metadata["retrieval_score"] = score
+        return Document(page_content=texts[i], metadata=metadata)
+
+    def _query_matrix(self, embeddings: List[List[float]]) -> np.ndarray:
+        return _normalize_rows(np.atleast_2d(np.asarray(embeddings, dtype=np.float32)))
+
+    def similarity_search_batch(self, embeddings: List[List[float]], k: int = 4) -> List[List[Tuple[Document, float]]]:
+        """Birden fazla sorgu vektörünü tek matris çarpımıyla arar"""
+        state = self._state
+        vectors = state[0]
+        if len(vectors) == 0:
+            return [[] for _ in embeddings]
+
+        scores = self._query_matrix(embeddings) @ vectors.T
+        k = min(k, scores.shape[1])
+        top = np.argpartition(-scores, k - 1, axis=1)[:, :k]
+
+        results = []
+        for row, candidates in enumerate(top):
+            ordered = candidates[np.argsort(-scores[row, candidates])]
+            results.append([(self._document(state, int(i), float(scores[row, i])), float(scores[row, i])) for i in ordered])
+        return results
+
+    def max_marginal_relevance_search_batch(
+        self,
+        embeddings: List[List[float]],
+        k: int = 4,
+        fetch_k: int = 20,
+        lambda_mult: float = 0.5
+    ) -> List[List[Document]]:
+        """Birden fazla sorgu için MMR; benzerlikler tek matris çarpımıyla hesaplanır"""
+        state = self._state
+        vectors = state[0]
+        if len(vectors) == 0:
+            return [[] for _ in embeddings]
+
+        queries = self._query_matrix(embeddings)
+        scores = queries @ vectors.T
+        fetch_k = min(fetch_k, scores.shape[1])
+        top = np.argpartition(-scores, fetch_k - 1, axis=1)[:, :fetch_k]
+
+        results = []
+        for row, candidates in enumerate(top):
+            chosen = mmr_select(queries[row], np.asarray(vectors[candidates]), k, lambda_mult)
+            results.append([
+                self._document(state, int(candidates[j]), float(scores[row, candidates[j]]))
+                for j in chosen
+            ])
+        return results
+
+    def similarity_search_by_vector(self, embedding: List[float], k: int = 4, **kwargs: Any) -> List[Document]:
+        return [doc for doc, _ in self.similarity_search_batch([embedding], k)[0]]
+
+    def similarity_search_with_score(self, query: str, k: int = 4, **kwargs: Any) -> List[Tuple[Document, float]]:
+        return self.similarity_search_batch([self._embedding_function.embed_query(query)], k)[0]
+
+    def similarity_search(self, query: str, k: int = 4, **kwargs: Any) -> List[Document]:
+        return [doc for doc, _ in self.similarity_search_with_score(query, k)]
+
+    def _similarity_search_with_relevance_scores(self, query: str, k: int = 4, **kwargs: Any) -> List[Tuple[Document, float]]:
+        return [(doc, (score + 1) / 2) for doc, score in self.similarity_search_with_score(query, k)]
+
+    def max_marginal_relevance_search_by_vector(
+        self,
+        embedding: List[float],
+        k: int = 4,
+        fetch_k: int = 20,
+        lambda_mult: float = 0.5,
+        **kwargs: Any
+    ) -> List[Document]:
+        return self.max_marginal_relevance_search_batch([embedding], k, fetch_k, lambda_mult)[0]
+
+    def max_marginal_relevance_search(
+        self,
+        query: str,
+        k: int = 4,
+        fetch_k: int = 20,
+        lambda_mult: float = 0.5,
+        **kwargs: Any
+    ) -> List[Document]:
+        return self.max_marginal_relevance_search_by_vector(
+            self._embedding_function.embed_query(query), k, fetch_k, lambda_mult
+        )
+
+    @classmethod
+    def from_texts(
+        cls,
+        texts: List[str],
+        embedding: Embeddings,
+        metadatas: Optional[List[dict]] = None,
+        persist_directory: str = ".",
+        collection_name: str = "default",
+        ids: Optional[List[str]] = None,
+        **kwargs: Any
+    ) -> "NumpyVectorStore":
+        store = cls(persist_directory, embedding, collection_name)
+        store.add_texts(texts, metadatas, ids=ids)
+        store.flush()
+        return store
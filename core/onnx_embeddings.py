@@ -0,0 +1,161 @@
+"""
+ONNX Runtime ile CPU embedding
+
+paraphrase-multilingual-MiniLM-L12-v2 bir kez ONNX'e aktarılır (ortalama
+havuzlama grafiğin içindedir) ve isteğe bağlı olarak int8 dinamik
+kuantizasyonla küçültülür. Çalışma anında sadece onnxruntime ve
+tokenizers kullanılır; torch/transformers yüklenmez, bu da replika başına
+belleği düşürür.
+
+Dışa aktarma torch + transformers + onnx gerektirir:
+    pip install onnxruntime onnx
+"""
+
+import os
+import re
+import json
+from typing import List, Optional
+
+import numpy as np
+from langchain_core.embeddings import Embeddings
+
+
+FP32_FILENAME = "model.onnx"
+INT8_FILENAME = "model_int8.onnx"
+EXPORT_INFO_FILENAME = "export.json"
+MAX_SEQ_LENGTH = 128
+
+
+def onnx_model_dir(base_dir: str, model_name: str) -> str:
+    """Modelin ONNX dosyalarının klasörü: <base_dir>/<model_slug>"""
+    return os.path.join(base_dir, re.sub(r"[^A-Za-z0-9_.-]+", "_", model_name))
+
+
+def export_onnx_model(model_name: str, output_dir: str, quantize: bool = True, opset: int = 14) -> str:
+    """
+    Transformer + ortalama havuzlamayı ONNX'e aktarır, tokenizer'ı yanına
+    kaydeder; quantize=True ise int8 dinamik kuantize kopyayı da üretir.
+    Zaten aktarılmış dosyalar yeniden üretilmez.
+    """
+    import torch
+    from transformers import AutoModel, AutoTokenizer
+
+    os.makedirs(output_dir, exist_ok=True)
+    fp32_path = os.path.join(output_dir, FP32_FILENAME)
+
+    if not os.path.exists(fp32_path):
+        tokenizer = AutoTokenizer.from_pretrained(model_name)
+        model = AutoModel.from_pretrained(model_name).eval()
+
+        class MeanPooledEncoder(torch.nn.Module):
+            """sentence-transformers Pooling(mean) ile aynı çıktı"""
+
+            def __init__(self, encoder):
+                super().__init__()
+                self.encoder = encoder
+
+            def forward(self, input_ids, attention_mask):
+                hidden = self.encoder(input_ids=input_ids, attention_mask=attention_mask).last_hidden_state
+                mask = attention_mask.unsqueeze(-1).to(hidden.dtype)
+                return (hidden * mask).sum(dim=1) / mask.sum(dim=1).clamp(min=1e-9)
+
+        sample = tokenizer(["Bootcamp sertifikası ne zaman verilir?"], return_tensors="pt")
+        with torch.no_grad():
+            torch.onnx.export(
+                MeanPooledEncoder(model),
+                (sample["input_ids"], sample["attention_mask"]),
+                fp32_path,
+                input_names=["input_ids", "attention_mask"],
+                output_names=["sentence_embedding"],
+                dynamic_axes={
+                    "input_ids": {0: "batch", 1: "sequence"},
+                    "attention_mask": {0: "batch", 1: "sequence"},
+                    "sentence_embedding": {0: "batch"}
+                },
+                opset_version=opset
+            )
+        tokenizer.save_pretrained(output_dir)
+        with open(os.path.join(output_dir, EXPORT_INFO_FILENAME), 'w', encoding='utf-8') as f:
+            json.dump({"model_name": model_name, "opset": opset, "torch": torch.__version__}, f, indent=2)
+
+    int8_path = os.path.join(output_dir, INT8_FILENAME)
+    if quantize and not os.path.exists(int8_path):
+        from onnxruntime.quantization import QuantType, quantize_dynamic
+        quantize_dynamic(fp32_path, int8_path, weight_type=QuantType.QInt8)
+
+    return output_dir
+
+
+def _pad_token(model_dir: str) -> str:
+    for filename in ("special_tokens_map.json", "tokenizer_config.json"):
+        try:
+            with open(os.path.join(model_dir, filename), 'r', encoding='utf-8') as f:
+                pad = json.load(f).get("pad_token")
+        except (OSError, json.JSONDecodeError):
+            continue
+        if isinstance(pad, dict):
+            pad = pad.get("content")
+        if pad:
+            return pad
+    return "<pad>"
+
+
+class OnnxEmbeddings(Embeddings):
+    """Aktarılmış modeli onnxruntime ile çalıştıran Embeddings"""
+
+    def __init__(
+        self,
+        model_dir: str,
+        quantized: bool = False,
+        threads: Optional[int] = None,
+        batch_size: int = 32,
+        max_length: int = MAX_SEQ_LENGTH
+    ):
+        try:
+            import onnxruntime as ort
+            from tokenizers import Tokenizer
+        except ImportError as e:
+            raise ImportError("ONNX embedding arka ucu için: pip install onnxruntime tokenizers") from e
+
+        model_path = os.path.join(model_dir, INT8_FILENAME if quantized else FP32_FILENAME)
+        if not os.path.exists(model_path):
+            raise FileNotFoundError(f"ONNX modeli bulunamadı: {model_path} (export_onnx_model ile oluşturun)")
+
+        self.model_dir = model_dir
+        self.quantized = quantized
+        self.threads = threads
+        self.batch_size = batch_size
+
+        self.tokenizer = Tokenizer.from_file(os.path.join(model_dir, "tokenizer.json"))
+        pad_token = _pad_token(model_dir)
+        self.tokenizer.enable_truncation(max_length=max_length)
+        self.tokenizer.enable_padding(pad_id=self.tokenizer.token_to_id(pad_token) or 0, pad_token=pad_token)
+
+        options = ort.SessionOptions()
+        options.graph_optimization_level = ort.GraphOptimizationLevel.ORT_ENABLE_ALL
+        options.inter_op_num_threads = 1
+        if threads:
+            options.intra_op_num_threads = threads
+        self.session = ort.InferenceSession(model_path, sess_options=options, providers=["CPUExecutionProvider"])
+
+    def _encode(self, texts: List[str]) -> np.ndarray:
+        encodings = self.tokenizer.encode_batch(texts)
+        input_ids = np.asarray([e.ids for e in encodings], dtype=np.int64)
+        attention_mask = np.asarray([e.attention_mask for e in encodings], dtype=np.int64)
+        return self.session.run(
+            ["sentence_embedding"],
+            {"input_ids": input_ids, "attention_mask": attention_mask}
+        )[0]
+
+    def embed_documents(self, texts: List[str]) -> List[List[float]]:
+        # Benzer uzunluktaki metinler aynı batch'e düşsün diye sıralanır (daha az padding)
+        order = sorted(range(len(texts)), key=lambda i: len(texts[i]))
+        vectors: List[List[float]] = [[] for _ in texts]
+        for start in range(0, len(order), self.batch_size):
+            chunk = order[start:start + self.batch_size]
+            for i, vector in zip(chunk, self._encode([texts[i] for i in chunk]).tolist()):
+                vectors[i] = vector
+        return vectors
+
+    def embed_query(self, text: str) -> List[float]:
+        return self._encode([text])[0].tolist()
@@ -0,0 +1,123 @@
+"""
+Tek çağrılı sorgu planlayıcı
+
+Soru yoğunlaştırma (condense), MultiQuery varyant üretimi ve soru
+kategorisi kararını tek bir yapılandırılmış LLM çağrısında birleştirir.
+Sohbetin ilk turunda yoğunlaştırılacak geçmiş olmadığından LLM hiç
+çağrılmaz.
+"""
+
+import json
+import re
+from typing import Dict, List, Optional, Tuple
+
+from langchain_core.prompts import PromptTemplate
+
+from .text_utils import turkish_lower
+
+
+PLANNER_CATEGORIES = ("bootcamp_specific", "general_safe", "greeting")
+
+QUERY_PLANNER_PROMPT = PromptTemplate.from_template("""
+Sohbet geçmişi ve yeni soruyu kullanarak bir arama planı oluştur.
+
+ÖNEMLİ KURALLAR:
+1. "standalone_question": Geçmişe bakmadan anlaşılabilen, ANAHTAR KELİMELERİ koruyan tek bir arama sorgusu
+2. "queries": Aynı bilgiyi arayan {num_variants} farklı, anahtar kelime zengin sorgu varyantı
+3. Eş anlamlı kelimeleri kullan (örn: "iştirak" = "katılım", "web semineri" = "canlı yayın")
+4. Tüm sorgular küçük harfle yazılmalı
+5. "category": Soru bootcamp hakkındaysa "bootcamp_specific", genel bilgi sorusuysa "general_safe", selamlamaysa "greeting"
+6. SADECE JSON döndür, başka açıklama ekleme
+
+SOHBET GEÇMİŞİ:
+{chat_history}
+
+YENİ SORU:
+{question}
+
+JSON:""")
+
+
+def format_chat_history(history: List[Tuple[str, str]]) -> str:
+    return "\n".join(f"Human: {q}\nAssistant: {a}" for q, a in history)
+
+
+class QueryPlanner:
+    """Yoğunlaştırılmış soru, sorgu varyantları ve kategoriyi tek çağrıda üretir"""
+
+    def __init__(self, llm, num_variants: int = 3):
+        self.llm = llm
+        self.num_variants = num_variants
+
+    def plan(self, question: str, history: List[Tuple[str, str]], config: Optional[Dict] = None) -> Dict:
+        """
+        Dönen sözlük:
+            standalone_question: str
+            queries: List[str]         - LLM varyantları (ilk turda boş)
+            category: Optional[str]    - LLM kararı (ilk turda None)
+            llm_used: bool
+        """
+        if not history:
+            return self._first_turn_plan(question)
+
+        response = self.llm.invoke(self._format_prompt(question, history), config=config)
+        return self._parse(response.content, question)
+
+    async def aplan(self, question: str, history: List[Tuple[str, str]], config: Optional[Dict] = None) -> Dict:
+        if not history:
+            return self._first_turn_plan(question)
+
+        response = await self.llm.ainvoke(self._format_prompt(question, history), config=config)
+        return self._parse(response.content, question)
+
+    def _first_turn_plan(self, question: str) -> Dict:
+        return {
+            "standalone_question": question,
+            "queries": [],
+            "category": None,
+            "llm_used": False
+        }
+
+    def _format_prompt(self, question: str, history: List[Tuple[str, str]]) -> str:
+        return QUERY_PLANNER_PROMPT.format(
+            chat_history=format_chat_history(history),
+            question=question,
+            num_variants=self.num_variants
+        )
+
+    def _parse(self, text: str, question: str) -> Dict:
+        """LLM çıktısını ayrıştırır; bozuk JSON'da soruyu olduğu gibi kullanır"""
+        data = _extract_json(text) or {}
+
+        standalone = str(data.get("standalone_question") or "").strip() or question
+        # Tek string dönerse karakterleri sorgu olarak gezilmesin diye
+        # yalnızca liste kabul edilir
+        raw_queries = data.get("queries")
+        if not isinstance(raw_queries, list):
+            raw_queries = []
+        queries = [
+            turkish_lower(str(q).strip()) for q in raw_queries
+            if str(q).strip()
+        ][:self.num_variants]
+
+        category = data.get("category")
+        if category not in PLANNER_CATEGORIES:
+            category = None
+
+        return {
+            "standalone_question": turkish_lower(standalone),
+            "queries": queries,
+            "category": category,
+            "llm_used": True
+        }
+
+
+def _extract_json(text: str) -> Optional[Dict]:
+    match = re.search(r"\{.*\}", text, re.DOTALL)
+    if not match:
+        return None
+    try:
+        data = json.loads(match.group(0))
+    except json.JSONDecodeError:
+        return None
+    return data if isinstance(data, dict) else None
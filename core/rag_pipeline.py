@@ -1,12 +1,34 @@
 import os
-from typing import Dict, List, Optional
-from langchain_google_genai import ChatGoogleGenerativeAI
-from langchain_huggingface import HuggingFaceEmbeddings
-from langchain_chroma import Chroma
-from langchain.retrievers.multi_query import MultiQueryRetriever
-from langchain.memory import ConversationBufferWindowMemory
+import re
+import copy
+import time
+import threading
+from collections import Counter
+from contextlib import nullcontext
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from typing import AsyncIterator, Callable, ContextManager, Dict, Iterable, Iterator, List, Optional, Tuple
 from langchain_core.prompts import PromptTemplate
-from langchain.chains import ConversationalRetrievalChain
+from langchain_core.documents import Document
+
+from .canonical_index import CanonicalIndex, CANONICAL_INDEX_DIRNAME
+from .semantic_cache import SemanticCache, read_index_version
+from .session_store import SessionStore, DEFAULT_SESSION_ID
+from .query_planner import QueryPlanner, format_chat_history
+from .embedding_cache import CachedEmbeddings
+from .lexical_index import LexicalIndex, KEYWORD_MAP, LEXICAL_INDEX_FILENAME
+from .hybrid_retriever import HybridRetriever
+from .batch_retriever import BatchedMultiQueryRetriever
+from .speculation import SpeculativeFallback
+from .intent_router import IntentRouter, INTENT_ROUTER_DIRNAME
+from .text_utils import turkish_lower
+from .confidence import is_grounded, has_no_info, overlap_ratio, retrieval_confident, MIN_OVERLAP_RATIO
+from .vector_store import create_vector_store, SCORING_BACKENDS
+from .metrics import PipelineMetrics, RequestTrace
+from .rate_limit import RateLimiter
+from .llm_gateway import LLMGateway, GatewayChatModel, LLMGatewayError
+from .startup import StartupReport
+from .context_packer import ContextPacker, DEFAULT_CONTEXT_TOKEN_BUDGET, DEFAULT_CONTEXT_SIMILARITY
+from .embedding_backends import create_embeddings, cache_model_name, embedding_drift, DEFAULT_EMBEDDING_BACKEND
 
 
 
@@ -61,6 +83,27 @@ ANAHTAR KELİME ZENGİN SORGU (küçük harfle):""")
 
 
 
+def _unique_union(results: List[List[Document]]) -> List[Document]:
+    """
+    Sorgu sonuçlarını ilk görülme sırasıyla, tekrarsız birleştirir.
+    Aynı parafraz kümesinden gelen dokümanlar tek dokümana indirilir.
+    """
+    seen = set()
+    documents = []
+    for docs in results:
+        for doc in docs:
+            key = doc.metadata.get("cluster_id") or doc.page_content
+            if key not in seen:
+                seen.add(key)
+                documents.append(doc)
+    return documents
+
+
+def _known_vectors(question: str, query_vector) -> Dict:
+    """Yönlendirme için hesaplanan soru vektörünü retriever'a aktarılacak biçime getirir"""
+    return {} if query_vector is None else {question: query_vector}
+
+
 def categorize_question(question: str) -> str:
     """
     Soruyu kategorize eder ve güvenli LLM kullanımına karar verir
@@ -70,10 +113,15 @@ def categorize_question(question: str) -> str:
         "general_safe": Genel bilgi - LLM kullanılabilir
         "greeting": Selamlama - Direkt cevap
     """
-    q_lower = question.lower()
+    q_lower = turkish_lower(question)
+    words = re.findall(r"\w+", q_lower)
     
-    greetings = ["merhaba", "selam", "hey", "hi", "günaydın", "iyi günler"]
-    if any(g in q_lower for g in greetings):
+    # Sadece selamlama kelimelerinden oluşan mesajlar ("hi" kelime içinde aranmaz)
+    greeting_words = {
+        "merhaba", "merhabalar", "selam", "selamlar", "hey", "hi", "hello",
+        "günaydın", "iyi", "günler", "akşamlar", "naber", "nasılsın"
+    }
+    if words and all(w in greeting_words for w in words) and not set(words) <= {"iyi"}:
         return "greeting"
     
     bootcamp_keywords = [
@@ -86,11 +134,15 @@ def categorize_question(question: str) -> str:
     
     general_safe_patterns = [
         "nedir", "ne demek", "nasıl", "kimdir", "matematik", "hesapla",
-        "mentormate nedir", "sen kimsin", "ne yaparsın", "+", "-", "*", "/"
+        "mentormate nedir", "sen kimsin", "ne yaparsın"
     ]
     if any(pattern in q_lower for pattern in general_safe_patterns):
         return "general_safe"
     
+    # Operatörler sadece iki sayı arasındaysa işlem sayılır ("2-3 gün" değil "12 * 4")
+    if re.search(r"\d\s*[+*/x×÷]\s*\d|\d\s+-\s+\d", q_lower):
+        return "general_safe"
+    
     return "bootcamp_specific"
 
 
@@ -105,65 +157,268 @@ class RAGPipeline:
         collection_name: str = "mentormate_faq",
         embedding_model: str = "sentence-transformers/paraphrase-multilingual-MiniLM-L12-v2",
         llm_model: str = "gemini-2.0-flash",
-        temperature: float = 0.01
+        temperature: float = 0.01,
+        canonical_threshold: float = 0.90,
+        cache_threshold: float = 0.95,
+        cache_size: int = 512,
+        cache_ttl: float = 3600,
+        cache_db_path: Optional[str] = None,
+        history_window: int = 5,
+        session_idle_ttl: float = 1800,
+        max_sessions: int = 1000,
+        query_planner: str = "single_call",
+        embedding_cache_dir: Optional[str] = None,
+        vector_backend: str = "chroma",
+        speculative_categories: Tuple[str, ...] = ("general_safe",),
+        min_retrieval_score: Optional[float] = None,
+        intent_router_threshold: float = 0.60,
+        intent_router_margin: float = 0.05,
+        llm_requests_per_minute: Optional[float] = None,
+        llm_max_concurrency: int = 8,
+        embedding_backend: str = DEFAULT_EMBEDDING_BACKEND,
+        embedding_threads: Optional[int] = None,
+        onnx_model_dir: Optional[str] = None,
+        context_token_budget: Optional[int] = DEFAULT_CONTEXT_TOKEN_BUDGET,
+        context_similarity: float = DEFAULT_CONTEXT_SIMILARITY,
+        llm=None,
+        llm_general=None,
+        embeddings=None,
+        startup_report: Optional[StartupReport] = None
     ):
+        """
+        llm / llm_general / embeddings verilirse Gemini ve HuggingFace
+        modelleri yerine bunlar kullanılır (ör. çevrimdışı benchmark).
+        Her iki model de llm_requests_per_minute / llm_max_concurrency ile
+        sınırlanan ortak bir LLMGateway üzerinden çağrılır.
+        Kurulum aşamalarının süre/bellek ölçümü startup_report'a yazılır.
+        embedding_backend: "torch", "onnx" veya "onnx-int8" (bkz. embedding_backends).
+        context_token_budget: cevap prompt'una girecek dokümanların token
+        bütçesi; yinelenenler önce indirilir (bkz. context_packer). None/0 = kapalı.
+        min_retrieval_score: sadece skor üreten depolarla (SCORING_BACKENDS)
+        kabul edilir; aksi halde ValueError.
+        """
         self.google_api_key = google_api_key
         self.db_path = db_path
         self.collection_name = collection_name
         self.embedding_model_name = embedding_model
         self.llm_model_name = llm_model
         self.temperature = temperature
+        self.canonical_threshold = canonical_threshold
+        self.cache_threshold = cache_threshold
+        self.cache_size = cache_size
+        self.cache_ttl = cache_ttl
+        self.cache_db_path = cache_db_path
+        self.history_window = history_window
+        self.session_idle_ttl = session_idle_ttl
+        self.max_sessions = max_sessions
+        self.query_planner_mode = query_planner
+        self.embedding_cache_dir = embedding_cache_dir
+        self.vector_backend = vector_backend
+        self.speculative_categories = speculative_categories
+        if min_retrieval_score is not None and vector_backend not in SCORING_BACKENDS:
+            raise ValueError(
+                f"min_retrieval_score sadece benzerlik skoru üreten depolarla kullanılabilir "
+                f"({', '.join(SCORING_BACKENDS)}); seçilen depo: {vector_backend}"
+            )
+        self.min_retrieval_score = min_retrieval_score
+        self.intent_router_threshold = intent_router_threshold
+        self.intent_router_margin = intent_router_margin
+        self.llm_requests_per_minute = llm_requests_per_minute
+        self.llm_max_concurrency = llm_max_concurrency
+        self.embedding_backend = embedding_backend
+        self.embedding_threads = embedding_threads
+        self.onnx_model_dir = onnx_model_dir
+        self.context_token_budget = context_token_budget
+        self.context_similarity = context_similarity
         
-        self.llm = None
-        self.llm_general = None  
-        self.embeddings = None
+        self.llm = llm
+        self.llm_general = llm_general
+        self.embeddings = embeddings
         self.vectordb = None
+        self.base_retriever = None
         self.retriever = None
-        self.memory = None
-        self.chain = None
+        self.batch_retriever = None
+        self.planner = None
+        self.lexical_index = None
+        self.sessions = None
+        self.answer_prompt = None
+        self.general_prompt = None
+        self.canonical_index = None
+        self.intent_router = None
+        self.response_cache = None
+        self.speculation = None
+        self.context_packer = None
+        self.llm_gateway = None
+        self.index_version = ""
+        self.embedding_drift = None
+        
+        self.canonical_hits = 0
+        self.canonical_misses = 0
+        self.route_counts = Counter()
+        self._stats_lock = threading.Lock()
+        self.metrics = PipelineMetrics()
+        self.startup = startup_report or StartupReport()
         
         self._initialize()
     
     def _initialize(self):
-        self._setup_llm()
-        self._setup_embeddings()
-        self._setup_vectordb()
-        self._setup_retriever()
-        self._setup_memory()
-        self._setup_chain()
+        with self.startup.phase("llm"):
+            self._setup_llm()
+        with self.startup.phase("embeddings"):
+            self._setup_embeddings()
+        with self.startup.phase("response_cache"):
+            self._setup_response_cache()
+        with self.startup.phase("index"):
+            self._setup_index()
+        self._setup_sessions()
+        self._setup_prompts()
+        self._setup_context_packer()
+        self._setup_speculation()
     
     def _setup_llm(self):
-        self.llm = ChatGoogleGenerativeAI(
-            model=self.llm_model_name,
-            google_api_key=self.google_api_key,
-            temperature=self.temperature
-        )
+        """
+        Gemini istemcileri ortak gateway ile sarılır: kota, eşzamanlılık,
+        yeniden deneme ve aynı prompt'ların tek çağrıda birleştirilmesi.
+        Yeniden denemeyi gateway yaptığı için istemci kendi denemesini yapmaz.
+        """
+        if self.llm is None or self.llm_general is None:
+            from langchain_google_genai import ChatGoogleGenerativeAI
         
-        self.llm_general = ChatGoogleGenerativeAI(
-            model=self.llm_model_name,
-            google_api_key=self.google_api_key,
-            temperature=0.3  
+        if self.llm is None:
+            self.llm = ChatGoogleGenerativeAI(
+                model=self.llm_model_name,
+                google_api_key=self.google_api_key,
+                temperature=self.temperature,
+                max_retries=1
+            )
+        
+        if self.llm_general is None:
+            self.llm_general = ChatGoogleGenerativeAI(
+                model=self.llm_model_name,
+                google_api_key=self.google_api_key,
+                temperature=0.3,
+                max_retries=1
+            )
+        
+        self.llm_gateway = LLMGateway(
+            requests_per_minute=self.llm_requests_per_minute,
+            max_concurrency=self.llm_max_concurrency
         )
+        self.llm = GatewayChatModel(llm=self.llm, gateway=self.llm_gateway)
+        self.llm_general = GatewayChatModel(llm=self.llm_general, gateway=self.llm_gateway)
     
     def _setup_embeddings(self):
-        """Embedding modelini yükler"""
-        self.embeddings = HuggingFaceEmbeddings(
-            model_name=self.embedding_model_name,
-            model_kwargs={'device': 'cpu'},
-            encode_kwargs={'batch_size': 32}
-        )
+        """Embedding modelini yükler (embedding_cache_dir verilirse kalıcı önbellekle sarar)"""
+        if self.embeddings is None:
+            self.embeddings = create_embeddings(
+                self.embedding_backend,
+                self.embedding_model_name,
+                onnx_dir=self.onnx_model_dir,
+                threads=self.embedding_threads
+            )
+        
+        if self.embedding_cache_dir:
+            self.embeddings = CachedEmbeddings(
+                self.embeddings,
+                model_name=cache_model_name(self.embedding_model_name, self.embedding_backend),
+                cache_dir=self.embedding_cache_dir
+            )
+    
+    def _setup_index(self):
+        """db_path'e bağlı tüm bileşenler: vektör deposu, kanonik/niyet/BM25 indeksleri, retriever"""
+        self.index_version = read_index_version(self.db_path)
+        self._setup_vectordb()
+        self._setup_canonical_index()
+        self._setup_intent_router()
+        self._setup_retriever()
+        if self.response_cache is not None:
+            self.response_cache.set_index_version(self.index_version)
+    
+    def with_index(self, db_path: str, vector_backend: Optional[str] = None) -> "RAGPipeline":
+        """
+        Başka bir indeks klasörüne bağlı yeni pipeline. LLM/gateway,
+        embedding, oturumlar, önbellek ve metrikler paylaşılır; bu nesne
+        ve üzerinde süren sorgular değişmez (sıcak sürüm değişimi).
+        """
+        clone = copy.copy(self)
+        clone.db_path = db_path
+        clone.vector_backend = vector_backend or self.vector_backend
+        clone.startup = StartupReport(expected_phases=("index", "warmup_encode", "warmup_index"))
+        with clone.startup.phase("index"):
+            clone._setup_index()
+        return clone
+    
+    def warm_up(self):
+        """
+        İlk sorgunun soğuk maliyetini öne çeker: embedding modeliyle örnek
+        bir encode (önbellek atlanır), vektör deposu sayfalarının belleğe
+        alınması ve örnek bir arama, kanonik indeks ve yönlendirici araması.
+        Örnek encode indeksin prob cümleleriyle yapılır ve sorgu modelinin
+        indeksi kuran modele göre sapması embedding_drift'e yazılır.
+        """
+        model = self.embeddings.embeddings if isinstance(self.embeddings, CachedEmbeddings) else self.embeddings
+        with self.startup.phase("warmup_encode"):
+            self.embedding_drift = embedding_drift(model, self.db_path)
+            query_vector = model.embed_query("Bootcamp sertifikası ne zaman verilir?")
+        
+        with self.startup.phase("warmup_index"):
+            prefetch = getattr(self.vectordb, "prefetch", None)
+            if prefetch is not None:
+                prefetch()
+            self.vectordb.similarity_search_by_vector(query_vector, k=1)
+            if self.canonical_index is not None:
+                self.canonical_index.match(query_vector, self.canonical_threshold)
+            if self.intent_router is not None:
+                self.intent_router.route(query_vector)
+        
+        self.startup.mark_ready()
+    
+    def _cache_active(self) -> bool:
+        """Önbellek bu indeks sürümüne mi ait? (değişimden sonra eski nesne önbelleği kullanmaz)"""
+        return self.response_cache is not None and self.response_cache.index_version == self.index_version
     
     def _setup_vectordb(self):
-        """Vector database'i yükler"""
-        self.vectordb = Chroma(
-            persist_directory=self.db_path,
-            embedding_function=self.embeddings,
-            collection_name=self.collection_name
+        """Vector database'i yükler ("chroma" veya "numpy")"""
+        self.vectordb = create_vector_store(
+            self.vector_backend,
+            self.db_path,
+            self.embeddings,
+            self.collection_name
+        )
+    
+    def _setup_canonical_index(self):
+        """Kanonik cevap indeksini yükler (yoksa hızlı yol devre dışı kalır)"""
+        self.canonical_index = CanonicalIndex.load(
+            os.path.join(self.db_path, CANONICAL_INDEX_DIRNAME)
+        )
+    
+    def _setup_intent_router(self):
+        """Niyet yönlendiricisini yükler (yoksa categorize_question kullanılır)"""
+        self.intent_router = IntentRouter.load(
+            os.path.join(self.db_path, INTENT_ROUTER_DIRNAME)
+        )
+    
+    def _setup_response_cache(self):
+        """Semantik cevap önbelleğini kurar (cache_size=0 ise kapalı)"""
+        if self.cache_size <= 0:
+            return
+        
+        self.response_cache = SemanticCache(
+            threshold=self.cache_threshold,
+            max_size=self.cache_size,
+            ttl_seconds=self.cache_ttl,
+            sqlite_path=self.cache_db_path,
+            index_version=read_index_version(self.db_path)
         )
     
     def _setup_retriever(self):
-        """MultiQuery Retriever'ı kurar"""
-        base_retriever = self.vectordb.as_retriever(
+        """
+        Hibrit (MMR + BM25) retriever'ı ve MultiQuery Retriever'ı kurar.
+        Sözcüksel indeks yoksa sadece yoğun MMR retriever kullanılır.
+        """
+        from langchain.retrievers.multi_query import MultiQueryRetriever
+        
+        dense_retriever = self.vectordb.as_retriever(
             search_type="mmr",
             search_kwargs={
                 'k': 5,
@@ -172,136 +427,800 @@ class RAGPipeline:
             }
         )
         
+        self.lexical_index = LexicalIndex.load(os.path.join(self.db_path, LEXICAL_INDEX_FILENAME))
+        if self.lexical_index is not None:
+            base_retriever = HybridRetriever(
+                dense_retriever=dense_retriever,
+                lexical_index=self.lexical_index,
+                k=5
+            )
+        else:
+            base_retriever = dense_retriever
+        
+        self.base_retriever = base_retriever
         self.retriever = MultiQueryRetriever.from_llm(
             retriever=base_retriever,
             llm=self.llm,
             include_original=True
         )
+        
+        # "single_call": condense + varyant + kategori tek LLM çağrısında,
+        # tüm sorgular tek embedding çağrısı ve toplu MMR ile aranır
+        # "legacy": ayrı condense çağrısı + MultiQueryRetriever
+        if self.query_planner_mode == "single_call":
+            self.planner = QueryPlanner(self.llm)
+            self.batch_retriever = BatchedMultiQueryRetriever(
+                vectordb=self.vectordb,
+                embeddings=self.embeddings,
+                lexical_index=self.lexical_index,
+                per_query_k=5,
+                fetch_k=25,
+                lambda_mult=0.6
+            )
     
-    def _setup_memory(self):
-        """Conversation memory'yi başlatır"""
-        self.memory = ConversationBufferWindowMemory(
-            memory_key="chat_history",
-            k=5,
-            return_messages=True,
-            output_key='answer'
+    def _setup_sessions(self):
+        """
+        Oturum bazlı sohbet geçmişi deposunu başlatır.
+        LLM, embedding ve vectordb tüm oturumlar arasında paylaşılır;
+        zincir hafızasızdır ve geçmiş her çağrıda dışarıdan verilir.
+        """
+        self.sessions = SessionStore(
+            window=self.history_window,
+            idle_ttl=self.session_idle_ttl,
+            max_sessions=self.max_sessions
         )
     
-    def _setup_chain(self):
-        """Konuşma zincirini oluşturur"""
-        prompt = PromptTemplate(
+    def _setup_prompts(self):
+        """Cevap ve genel LLM promptlarını hazırlar"""
+        self.answer_prompt = PromptTemplate(
             template=EXPERT_PROMPT_TEMPLATE,
             input_variables=["context", "question"]
         )
         
-        self.chain = ConversationalRetrievalChain.from_llm(
-            llm=self.llm,
-            retriever=self.retriever,
-            memory=self.memory,
-            condense_question_prompt=CONDENSE_QUESTION_PROMPT,
-            combine_docs_chain_kwargs={"prompt": prompt},
-            return_source_documents=True,
-            verbose=False
+        self.general_prompt = PromptTemplate(
+            template=GENERAL_LLM_PROMPT,
+            input_variables=["question"]
         )
     
-    def query(self, question: str) -> Dict:
+    def _setup_context_packer(self):
+        """Retrieval ile üretim arasında yinelenen indirme + token bütçesi"""
+        if self.context_token_budget:
+            self.context_packer = ContextPacker(self.context_token_budget, self.context_similarity)
+    
+    def _setup_speculation(self):
+        """
+        Genel LLM fallback'i RAG ile paralel başlatılacak kategoriler.
+        Boş politika spekülasyonu kapatır (fallback RAG'den sonra çalışır).
+        """
+        self.speculation = SpeculativeFallback(self.speculative_categories)
+    
+    def query(
+        self,
+        question: str,
+        session_id: str = DEFAULT_SESSION_ID,
+        chat_history: Optional[List[Tuple[str, str]]] = None
+    ) -> Dict:
         """
         YENİ: Hibrit sorgu işleme
         1. Önce RAG'e sor
         2. Cevap güvensizse ve soru güvenli kategorideyse → LLM'e sor
         3. Bootcamp-spesifik sorularda → "Bilgi yok" de
+        
+        Selamlamalar ve yönlendiricinin emin olduğu alan dışı sorular
+        retrieval yapılmadan cevaplanır; karar sonuçta "route" altında döner.
+        
+        chat_history verilirse oturum deposu kullanılmaz ve güncellenmez;
+        verilmezse geçmiş session_id'ye göre okunur ve yazılır.
+        
+        Sonuçtaki "trace" aşama sürelerini, LLM çağrı/token sayılarını ve
+        önbellek isabetlerini içerir (bkz. core/metrics.py).
         """
+        trace = RequestTrace()
         try:
-            category = categorize_question(question)
+            query_vector = None
+            if self._needs_query_vector():
+                with trace.stage("embed_query"):
+                    query_vector = self.embeddings.embed_query(question)
             
-            if category == "greeting":
-                return {
-                    "answer": "Merhaba! Ben MentorMate. Size nasıl yardımcı olabilirim?",
-                    "source_documents": []
-                }
+            with trace.stage("route"):
+                route = self._route(question, query_vector)
+            if route["route"] == "greeting":
+                return self._finish(trace, self._greeting_result(), route)
             
-            result = self.chain.invoke({"question": question})
-            answer = result.get("answer", "").strip()
-            source_docs = result.get("source_documents", [])
+            history = self._load_history(session_id, chat_history)
+            result = self._answer(question, route, history, query_vector, trace)
             
-            is_confident = self._check_confidence(answer, source_docs)
+            if chat_history is None:
+                self.sessions.append(session_id, question, result["answer"])
             
-            if not is_confident and category == "general_safe":
-                return self._general_llm_fallback(question)
+            return self._finish(trace, result, route)
             
-            if not is_confident and category == "bootcamp_specific":
-                return {
-                    "answer": " Bu konuda veri setimde güvenilir bilgi bulunmuyor.",
-                    "source_documents": source_docs
-                }
+        except LLMGatewayError:
+            # Kota/kapasite hatası olduğu gibi iletilir; arayüz kullanıcıya tekrar denemesini söyler
+            self.metrics.record_error()
+            raise
+        except Exception as e:
+            self.metrics.record_error()
+            raise Exception(f"Query işleme hatası: {str(e)}")
+    
+    async def aquery(
+        self,
+        question: str,
+        session_id: str = DEFAULT_SESSION_ID,
+        chat_history: Optional[List[Tuple[str, str]]] = None
+    ) -> Dict:
+        """query'nin asenkron karşılığı (astream_query'nin son sonucunu döner)"""
+        result = None
+        async for event in self.astream_query(question, session_id, chat_history):
+            if event["type"] == "final":
+                result = event["result"]
+        return result
+    
+    def query_batch(
+        self,
+        questions: Iterable[str],
+        max_concurrency: int = 4,
+        requests_per_minute: Optional[float] = None,
+        use_response_cache: bool = False,
+        work_slot: Optional[Callable[[], ContextManager]] = None
+    ) -> Iterator[Dict]:
+        """
+        Çok sayıda soruyu durumsuz cevaplar (değerlendirme / ön hesaplama).
+        
+        Sohbet geçmişi okunmaz ve yazılmaz; her soru ilk tur gibi işlenir.
+        Tüm sorular tek embed_documents çağrısıyla embed edilir, yönlendirme
+        ve kısa yollar LLM'siz uygulanır, kalan soruların tüm plan sorguları
+        tek toplu aramada (retrieve_many) aranır. LLM çağrıları en fazla
+        max_concurrency thread'de yapılır ve requests_per_minute ile Gemini
+        kotasına göre sınırlanır. Kota boşa harcanmasın diye spekülatif
+        fallback kullanılmaz.
+        
+        use_response_cache=False iken semantik önbellek okunmaz ve yazılmaz;
+        sonuçlar önceki çalıştırmalardan etkilenmez. True iken cevaplar
+        önbelleğe yazılır (önbellek ısıtma).
+        
+        work_slot verilirse her iş parçası (toplu embedding/arama ve her
+        sorunun LLM kısmı) çalışırken bu context manager'ı tutar; servis
+        bununla toplu işi diğer isteklerle aynı worker sınırına bağlar.
+        
+        Sonuçlar tamamlandıkça döner; bir öğenin hatası diğerlerini durdurmaz:
+            {"index": int, "question": str, "result": Dict}
+            {"index": int, "question": str, "error": str}
+        """
+        questions = list(questions)
+        if not questions:
+            return
+        
+        slot = work_slot or nullcontext
+        traces = [RequestTrace() for _ in questions]
+        try:
+            with slot():
+                query_vectors = self._batch_embed(questions, traces)
+        except Exception as e:
+            for index, question in enumerate(questions):
+                yield self._batch_error(index, question, e)
+            return
+        
+        pending = []
+        for index, question in enumerate(questions):
+            trace = traces[index]
+            try:
+                with slot():
+                    with trace.stage("route"):
+                        route = self._route(question, query_vectors[index])
+                    if route["route"] == "greeting":
+                        result = self._greeting_result()
+                    else:
+                        result = self._shortcut(query_vectors[index], [], trace, use_cache=use_response_cache)
+                
+                if result is None:
+                    pending.append((index, route))
+                else:
+                    yield {"index": index, "question": question, "result": self._finish(trace, result, route)}
+            except Exception as e:
+                yield self._batch_error(index, question, e)
+        
+        retrieved = {}
+        if self.planner is not None:
+            planned = [index for index, route in pending if not self._routes_to_general(route, [])]
+            try:
+                with slot():
+                    retrieved = self._batch_plan_and_retrieve(questions, query_vectors, planned, pending, traces)
+            except Exception as e:
+                for index in planned:
+                    yield self._batch_error(index, questions[index], e)
+                failed = set(planned)
+                pending = [(index, route) for index, route in pending if index not in failed]
+        
+        def answer(*args) -> Dict:
+            with slot():
+                return self._batch_answer(*args)
+        
+        limiter = RateLimiter(requests_per_minute, burst=max_concurrency)
+        executor = ThreadPoolExecutor(max_workers=max(1, max_concurrency), thread_name_prefix="query-batch")
+        try:
+            futures = {
+                executor.submit(
+                    answer,
+                    questions[index], route, query_vectors[index], retrieved.get(index),
+                    traces[index], limiter, use_response_cache
+                ): (index, route)
+                for index, route in pending
+            }
+            for future in as_completed(futures):
+                index, route = futures[future]
+                try:
+                    result = self._finish(traces[index], future.result(), route)
+                except Exception as e:
+                    yield self._batch_error(index, questions[index], e)
+                    continue
+                yield {"index": index, "question": questions[index], "result": result}
+        finally:
+            # Tüketici erken bırakırsa başlamamış çağrılar iptal edilir
+            executor.shutdown(wait=False, cancel_futures=True)
+    
+    def _batch_embed(self, questions: List[str], traces: List[RequestTrace]) -> List:
+        """Tüm soruları tek çağrıda embed eder; süre öğelere eşit paylaştırılır"""
+        if not self._needs_query_vector():
+            return [None] * len(questions)
+        
+        start = time.perf_counter()
+        vectors = self.embeddings.embed_documents(questions)
+        share = (time.perf_counter() - start) / len(questions)
+        for trace in traces:
+            trace.add_stage("embed_query", share)
+        return vectors
+    
+    def _batch_plan_and_retrieve(
+        self,
+        questions: List[str],
+        query_vectors: List,
+        indices: List[int],
+        pending: List[Tuple[int, Dict]],
+        traces: List[RequestTrace]
+    ) -> Dict[int, Tuple[str, List[Document], str]]:
+        """İlk tur planları LLM'siz çıkarılır; tüm sorgular tek toplu aramada aranır"""
+        if not indices:
+            return {}
+        
+        routes = dict(pending)
+        plans = {}
+        for index in indices:
+            with traces[index].stage("plan"):
+                plans[index] = self.planner.plan(questions[index], [])
+        
+        start = time.perf_counter()
+        known = {}
+        for index in indices:
+            known.update(_known_vectors(questions[index], query_vectors[index]))
+        results = self.batch_retriever.retrieve_many([self._planned_queries(plans[index]) for index in indices], known)
+        share = (time.perf_counter() - start) / len(indices)
+        
+        retrieved = {}
+        for index, source_docs in zip(indices, results):
+            traces[index].add_stage("retrieve", share)
+            plan = plans[index]
+            source_docs = self._pack_context(source_docs, traces[index])
+            retrieved[index] = (plan["standalone_question"], source_docs, plan["category"] or routes[index]["route"])
+        return retrieved
+    
+    def _batch_answer(
+        self,
+        question: str,
+        route: Dict,
+        query_vector,
+        retrieved: Optional[Tuple[str, List[Document], str]],
+        trace: RequestTrace,
+        limiter: RateLimiter,
+        use_response_cache: bool
+    ) -> Dict:
+        """query_batch'in thread'de çalışan LLM kısmı; her LLM çağrısı limiter'dan izin alır"""
+        if self._routes_to_general(route, []):
+            limiter.acquire()
+            with trace.stage("general_llm"):
+                return self._general_llm_fallback(question, trace)
+        
+        if retrieved is None:
+            # Legacy modda MultiQueryRetriever varyantları bir LLM çağrısıdır
+            limiter.acquire()
+            retrieved = self._plan_and_retrieve(question, route["route"], [], trace)
+        
+        standalone, source_docs, category = retrieved
+        if category == "greeting":
+            return self._greeting_result()
+        
+        if self._retrieval_gate(source_docs):
+            limiter.acquire()
+            with trace.stage("generate"):
+                response = self.llm.invoke(self._format_answer_prompt(standalone, source_docs), config=trace.config)
+            answer = response.content.strip()
             
-            # Normal RAG cevabı
-            return result
+            if self._check_confidence(answer, source_docs):
+                if use_response_cache:
+                    return self._confident_result(query_vector, question, [], answer, source_docs)
+                return {"answer": answer, "source_documents": source_docs}
+        
+        if category == "general_safe":
+            limiter.acquire()
+        return self._unconfident_result(question, category, source_docs, None, trace)
+    
+    def _batch_error(self, index: int, question: str, error: Exception) -> Dict:
+        self.metrics.record_error()
+        return {"index": index, "question": question, "error": str(error)}
+    
+    async def astream_query(
+        self,
+        question: str,
+        session_id: str = DEFAULT_SESSION_ID,
+        chat_history: Optional[List[Tuple[str, str]]] = None
+    ) -> AsyncIterator[Dict]:
+        """
+        Cevabı Gemini ürettikçe olay olarak akıtır:
+            {"type": "token", "content": str}   - cevap parçası
+            {"type": "retract"}                 - akıtılan cevap geri çekildi
+            {"type": "final", "result": Dict}   - nihai sonuç
+        
+        Güven kontrolü iki aşamalıdır: retrieval boş dönerse üretime hiç
+        başlanmaz; üretim sonrası kontrol başarısız olursa akıtılan cevap
+        "retract" ile geri çekilir ve nihai sonuç ret/genel LLM cevabı olur.
+        
+        "generate" aşaması akış süresini ölçer; token'ları tüketen tarafın
+        bekleme süresi de buna dahildir.
+        """
+        trace = RequestTrace()
+        try:
+            query_vector = None
+            if self._needs_query_vector():
+                with trace.stage("embed_query"):
+                    query_vector = await self.embeddings.aembed_query(question)
             
+            with trace.stage("route"):
+                route = self._route(question, query_vector)
+            category = route["route"]
+            if category == "greeting":
+                result = self._finish(trace, self._greeting_result(), route)
+                yield {"type": "token", "content": result["answer"]}
+                yield {"type": "final", "result": result}
+                return
+            
+            history = self._load_history(session_id, chat_history)
+            
+            result = self._shortcut(query_vector, history, trace)
+            if result is not None:
+                yield {"type": "token", "content": result["answer"]}
+            elif self._routes_to_general(route, history):
+                with trace.stage("general_llm"):
+                    result = await self._ageneral_llm_fallback(question, trace)
+                yield {"type": "token", "content": result["answer"]}
+            else:
+                speculation = self.speculation.astart(category, self._ageneral_llm_fallback, question, trace)
+                try:
+                    standalone, source_docs, category = await self._aplan_and_retrieve(
+                        question, category, history, trace, query_vector
+                    )
+                    
+                    if category == "greeting":
+                        result = self._greeting_result()
+                        yield {"type": "token", "content": result["answer"]}
+                    elif not self._retrieval_gate(source_docs):
+                        result = await self._aunconfident_result(question, category, source_docs, speculation, trace)
+                        yield {"type": "token", "content": result["answer"]}
+                    else:
+                        parts = []
+                        prompt_text = self._format_answer_prompt(standalone, source_docs)
+                        with trace.stage("generate"):
+                            async for chunk in self.llm.astream(prompt_text, config=trace.config):
+                                if chunk.content:
+                                    parts.append(chunk.content)
+                                    yield {"type": "token", "content": chunk.content}
+                        
+                        answer = "".join(parts).strip()
+                        if self._check_confidence(answer, source_docs):
+                            result = self._confident_result(query_vector, question, history, answer, source_docs)
+                        else:
+                            yield {"type": "retract"}
+                            result = await self._aunconfident_result(question, category, source_docs, speculation, trace)
+                            result["retracted"] = True
+                finally:
+                    self.speculation.discard(speculation)
+            
+            if chat_history is None:
+                self.sessions.append(session_id, question, result["answer"])
+            
+            yield {"type": "final", "result": self._finish(trace, result, route)}
+            
+        except LLMGatewayError:
+            self.metrics.record_error()
+            raise
         except Exception as e:
+            self.metrics.record_error()
             raise Exception(f"Query işleme hatası: {str(e)}")
     
-    def _check_confidence(self, answer: str, source_docs: List) -> bool:
+    def _finish(self, trace: RequestTrace, result: Dict, route: Dict) -> Dict:
+        """İzi metriklere ekler; sonuca yönlendirme kararı ve iz eklenir"""
+        self.metrics.observe(trace)
+        return {**result, "route": route, "trace": trace.to_dict()}
+    
+    def _greeting_result(self) -> Dict:
+        return {
+            "answer": "Merhaba! Ben MentorMate. Size nasıl yardımcı olabilirim?",
+            "source_documents": []
+        }
+    
+    def _load_history(self, session_id: str, chat_history: Optional[List[Tuple[str, str]]]) -> List[Tuple[str, str]]:
+        if chat_history is None:
+            return self.sessions.get_history(session_id)
+        return list(chat_history)
+    
+    def _needs_query_vector(self) -> bool:
+        return (
+            self.canonical_index is not None
+            or self.response_cache is not None
+            or self.intent_router is not None
+        )
+    
+    def _route(self, question: str, query_vector) -> Dict:
         """
-        Cevabın güvenilir olup olmadığını kontrol eder
+        Yönlendirici eşik üstünde ve diğer yönlerden en az intent_router_margin
+        farkla karar verirse onu, aksi halde categorize_question sonucunu döner
         """
-        answer_lower = answer.lower()
+        route = None
+        if self.intent_router is not None and query_vector is not None:
+            route = self.intent_router.route(query_vector, self.intent_router_threshold, self.intent_router_margin)
         
-        no_info_keywords = ["veri setimde", "bilgi bulunmuyor", "bilgim yok"]
-        if any(kw in answer_lower for kw in no_info_keywords):
-            return False
+        if route is None:
+            route = {
+                "route": categorize_question(question),
+                "confidence": None,
+                "margin": None,
+                "category": "",
+                "intent": "",
+                "source": "heuristic"
+            }
         
-        if not source_docs:
-            return False
+        with self._stats_lock:
+            self.route_counts[f"{route['source']}:{route['route']}"] += 1
+        return route
+    
+    def _routes_to_general(self, route: Dict, history: List[Tuple[str, str]]) -> bool:
+        """
+        Yönlendirici soruyu alan dışı bulduysa RAG atlanır. Takip soruları
+        geçmişe bağlı olabileceğinden sadece ilk turda uygulanır.
+        """
+        return route["source"] == "router" and route["route"] == "general_safe" and not history
+    
+    def _answer(
+        self,
+        question: str,
+        route: Dict,
+        history: List[Tuple[str, str]],
+        query_vector=None,
+        trace: Optional[RequestTrace] = None
+    ) -> Dict:
+        """Tek bir turu paylaşılan bileşenlerle, sadece verilen geçmişi kullanarak cevaplar"""
+        trace = trace or RequestTrace()
+        category = route["route"]
+        result = self._shortcut(query_vector, history, trace)
+        if result is not None:
+            return result
         
-        answer_words = set([w for w in answer_lower.split() if len(w) > 3])
-        if not answer_words:
-            return True
+        if self._routes_to_general(route, history):
+            with trace.stage("general_llm"):
+                return self._general_llm_fallback(question, trace)
         
-        source_text = " ".join([doc.page_content.lower() for doc in source_docs])
-        matched_words = [w for w in answer_words if w in source_text]
-        overlap_ratio = len(matched_words) / len(answer_words)
+        # Politikadaki kategorilerde genel LLM, RAG ile aynı anda başlar
+        speculation = self.speculation.start(category, self._general_llm_fallback, question, trace)
+        try:
+            standalone, source_docs, category = self._plan_and_retrieve(question, category, history, trace, query_vector)
+            if category == "greeting":
+                return self._greeting_result()
+            
+            if not self._retrieval_gate(source_docs):
+                return self._unconfident_result(question, category, source_docs, speculation, trace)
+            
+            with trace.stage("generate"):
+                response = self.llm.invoke(self._format_answer_prompt(standalone, source_docs), config=trace.config)
+            answer = response.content.strip()
+            
+            if not self._check_confidence(answer, source_docs):
+                return self._unconfident_result(question, category, source_docs, speculation, trace)
+            
+            # Normal RAG cevabı
+            return self._confident_result(query_vector, question, history, answer, source_docs)
+        finally:
+            self.speculation.discard(speculation)
+    
+    def _shortcut(
+        self,
+        query_vector,
+        history: List[Tuple[str, str]],
+        trace: Optional[RequestTrace] = None,
+        use_cache: bool = True
+    ) -> Optional[Dict]:
+        """Kanonik indeks veya önbellekten LLM'siz cevap; yoksa None"""
+        # Takip soruları geçmişe bağlı olduğu için ("peki ücreti ne?") kanonik
+        # eşleşme ve önbellek sadece sohbet geçmişi boşken kullanılır
+        if history:
+            return None
         
-        return overlap_ratio >= 0.20
+        trace = trace or RequestTrace()
+        with trace.stage("shortcut"):
+            canonical_result = self._canonical_lookup(query_vector)
+            if canonical_result is not None:
+                trace.cache_hit("canonical")
+                return canonical_result
+            
+            if self._cache_active() and use_cache:
+                cached = self.response_cache.lookup(query_vector)
+                if cached is not None:
+                    trace.cache_hit("response_cache")
+                return cached
+        
+        return None
     
-    def _general_llm_fallback(self, question: str) -> Dict:
+    def _plan_and_retrieve(
+        self,
+        question: str,
+        category: str,
+        history: List[Tuple[str, str]],
+        trace: Optional[RequestTrace] = None,
+        query_vector=None
+    ) -> Tuple[str, List[Document], str]:
         """
-        YENİ: Genel sorular için güvenli LLM fallback
+        (yoğunlaştırılmış soru, kaynak dokümanlar, kategori) döner.
+        Legacy modda MultiQuery varyant çağrısı "retrieve" aşamasına dahildir.
+        
+        query_vector verilirse plan sorgularından soruyla aynı olan tekrar
+        embed edilmez; sadece ek alt sorgular embed edilir.
         """
-        prompt = PromptTemplate(
-            template=GENERAL_LLM_PROMPT,
-            input_variables=["question"]
-        )
+        trace = trace or RequestTrace()
+        if self.planner is None:
+            with trace.stage("plan"):
+                standalone = self._condense(question, history, trace.config)
+            with trace.stage("retrieve"):
+                source_docs = _unique_union([self.retriever.invoke(standalone, config=trace.config)])
+            return standalone, self._pack_context(source_docs, trace), category
+        
+        with trace.stage("plan"):
+            plan = self.planner.plan(question, history, config=trace.config)
+        with trace.stage("retrieve"):
+            source_docs = self.batch_retriever.retrieve(self._planned_queries(plan), _known_vectors(question, query_vector))
+        return plan["standalone_question"], self._pack_context(source_docs, trace), plan["category"] or category
+    
+    async def _aplan_and_retrieve(
+        self,
+        question: str,
+        category: str,
+        history: List[Tuple[str, str]],
+        trace: Optional[RequestTrace] = None,
+        query_vector=None
+    ) -> Tuple[str, List[Document], str]:
+        trace = trace or RequestTrace()
+        if self.planner is None:
+            with trace.stage("plan"):
+                standalone = await self._acondense(question, history, trace.config)
+            with trace.stage("retrieve"):
+                source_docs = _unique_union([await self.retriever.ainvoke(standalone, config=trace.config)])
+            return standalone, self._pack_context(source_docs, trace), category
         
+        with trace.stage("plan"):
+            plan = await self.planner.aplan(question, history, config=trace.config)
+        with trace.stage("retrieve"):
+            source_docs = await self.batch_retriever.aretrieve(
+                self._planned_queries(plan), _known_vectors(question, query_vector)
+            )
+        return plan["standalone_question"], self._pack_context(source_docs, trace), plan["category"] or category
+    
+    def _pack_context(self, source_docs: List[Document], trace: RequestTrace) -> List[Document]:
+        """
+        Yinelenen dokümanları indirir ve token bütçesine göre keser; cevap
+        prompt'u, güven kontrolü ve dönen kaynaklar paketlenmiş listeyi kullanır.
+        """
+        if self.context_packer is None or not source_docs:
+            return source_docs
+        with trace.stage("pack"):
+            packed, stats = self.context_packer.pack(source_docs)
+        trace.set_context(stats)
+        return packed
+    
+    def _planned_queries(self, plan: Dict) -> List[str]:
+        queries = [plan["standalone_question"]] + plan["queries"]
+        return list(dict.fromkeys(queries))
+    
+    def _condense(self, question: str, history: List[Tuple[str, str]], config: Optional[Dict] = None) -> str:
+        """Geçmiş varsa soruyu tek başına anlaşılır bir arama sorgusuna çevirir"""
+        if not history:
+            return question
+        
+        response = self.llm.invoke(CONDENSE_QUESTION_PROMPT.format(
+            chat_history=format_chat_history(history),
+            question=question
+        ), config=config)
+        return response.content.strip()
+    
+    async def _acondense(self, question: str, history: List[Tuple[str, str]], config: Optional[Dict] = None) -> str:
+        if not history:
+            return question
+        
+        response = await self.llm.ainvoke(CONDENSE_QUESTION_PROMPT.format(
+            chat_history=format_chat_history(history),
+            question=question
+        ), config=config)
+        return response.content.strip()
+    
+    def _format_answer_prompt(self, question: str, source_docs: List[Document]) -> str:
+        context = "\n\n".join(doc.page_content for doc in source_docs)
+        return self.answer_prompt.format(context=context, question=question)
+    
+    def _retrieval_gate(self, source_docs: List[Document]) -> bool:
+        """
+        Üretimden önce, sadece retrieval sonucuna bakarak verilen güven kararı.
+        min_retrieval_score verilirse zaten hesaplanmış benzerlik skorları kullanılır.
+        """
+        return retrieval_confident(source_docs, self.min_retrieval_score)
+    
+    def _confident_result(
+        self,
+        query_vector,
+        question: str,
+        history: List[Tuple[str, str]],
+        answer: str,
+        source_docs: List[Document]
+    ) -> Dict:
+        if self._cache_active() and not history:
+            self.response_cache.store(query_vector, question, answer, source_docs)
+        
+        return {
+            "answer": answer,
+            "source_documents": source_docs
+        }
+    
+    def _unconfident_result(
+        self,
+        question: str,
+        category: str,
+        source_docs: List[Document],
+        speculation=None,
+        trace: Optional[RequestTrace] = None
+    ) -> Dict:
+        trace = trace or RequestTrace()
+        if category == "general_safe":
+            # Spekülasyon kullanılırsa sadece kalan bekleme süresi ölçülür
+            with trace.stage("general_llm"):
+                if speculation is not None:
+                    return self.speculation.take(speculation)
+                return self._general_llm_fallback(question, trace)
+        
+        return {
+            "answer": " Bu konuda veri setimde güvenilir bilgi bulunmuyor.",
+            "source_documents": source_docs
+        }
+    
+    async def _aunconfident_result(
+        self,
+        question: str,
+        category: str,
+        source_docs: List[Document],
+        speculation=None,
+        trace: Optional[RequestTrace] = None
+    ) -> Dict:
+        trace = trace or RequestTrace()
+        if category == "general_safe":
+            with trace.stage("general_llm"):
+                if speculation is not None:
+                    return await self.speculation.atake(speculation)
+                return await self._ageneral_llm_fallback(question, trace)
+        
+        return {
+            "answer": " Bu konuda veri setimde güvenilir bilgi bulunmuyor.",
+            "source_documents": source_docs
+        }
+    
+    def _canonical_lookup(self, query_vector) -> Optional[Dict]:
+        """
+        Soru bilinen bir SSS kümesine yeterince yakınsa kanonik cevabı
+        LLM çağrısı yapmadan döner, değilse None
+        """
+        if self.canonical_index is None:
+            return None
+        
+        match = self.canonical_index.match(query_vector, self.canonical_threshold)
+        if match is None:
+            with self._stats_lock:
+                self.canonical_misses += 1
+            return None
+        
+        with self._stats_lock:
+            self.canonical_hits += 1
+        answer = match["canonical_answer"]
+        
+        return {
+            "answer": answer,
+            "source_documents": [Document(
+                page_content=f"Soru: {match['canonical_question']}\nCevap: {answer}",
+                metadata={"source": CANONICAL_INDEX_DIRNAME, "score": match["score"]}
+            )]
+        }
+    
+    def _check_confidence(self, answer: str, source_docs: List) -> bool:
+        """
+        Cevabın güvenilir olup olmadığını kontrol eder
+        """
+        return is_grounded(answer, source_docs)
+    
+    def _general_llm_fallback(self, question: str, trace: Optional[RequestTrace] = None) -> Dict:
+        """
+        YENİ: Genel sorular için güvenli LLM fallback
+        """
         try:
-            formatted_prompt = prompt.format(question=question)
-            response = self.llm_general.invoke(formatted_prompt)
+            formatted_prompt = self.general_prompt.format(question=question)
+            response = self.llm_general.invoke(formatted_prompt, config=trace.config if trace else None)
             answer = response.content.strip()
             
             return {
                 "answer": answer,
                 "source_documents": []
             }
-        except Exception as e:
+        except Exception:
+            return {
+                "answer": "⚠️ Bu konuda size yardımcı olamıyorum.",
+                "source_documents": []
+            }
+    
+    async def _ageneral_llm_fallback(self, question: str, trace: Optional[RequestTrace] = None) -> Dict:
+        try:
+            response = await self.llm_general.ainvoke(
+                self.general_prompt.format(question=question),
+                config=trace.config if trace else None
+            )
+            
+            return {
+                "answer": response.content.strip(),
+                "source_documents": []
+            }
+        except Exception:
             return {
                 "answer": "⚠️ Bu konuda size yardımcı olamıyorum.",
                 "source_documents": []
             }
     
-    def clear_memory(self):
-        """Sohbet geçmişini temizler"""
-        self.memory.clear()
+    def clear_memory(self, session_id: str = DEFAULT_SESSION_ID):
+        """Oturumun sohbet geçmişini temizler"""
+        self.sessions.clear(session_id)
     
     def get_stats(self) -> Dict:
         """Pipeline istatistiklerini döner"""
         return {
             "llm_model": self.llm_model_name,
             "embedding_model": self.embedding_model_name,
+            "embedding_backend": self.embedding_backend,
+            "embedding_drift": self.embedding_drift,
             "temperature": self.temperature,
             "collection_name": self.collection_name,
             "db_path": self.db_path,
-            "mode": "Hibrit (RAG + Güvenli LLM Fallback)"
+            "index_version": self.index_version,
+            "vector_backend": self.vector_backend,
+            "mode": "Hibrit (RAG + Güvenli LLM Fallback)",
+            "canonical_threshold": self.canonical_threshold,
+            "canonical_clusters": len(self.canonical_index) if self.canonical_index else 0,
+            "canonical_hits": self.canonical_hits,
+            "canonical_misses": self.canonical_misses,
+            "routes": dict(self.route_counts),
+            "response_cache": self.response_cache.get_stats() if self.response_cache else None,
+            "sessions": self.sessions.get_stats(),
+            "query_planner": self.query_planner_mode,
+            "lexical_documents": len(self.lexical_index) if self.lexical_index else 0,
+            "embedding_cache": self.embeddings.get_stats() if isinstance(self.embeddings, CachedEmbeddings) else None,
+            "speculation": self.speculation.get_stats(),
+            "context_token_budget": self.context_token_budget,
+            "metrics": self.metrics.snapshot(),
+            "llm_gateway": self.llm_gateway.get_stats(),
+            "startup": self.startup.to_dict()
         }
+    
+    def get_prometheus_metrics(self) -> str:
+        """Aşama gecikmeleri ve sayaçlar, Prometheus metin formatında"""
+        return self.metrics.prometheus() + self.llm_gateway.prometheus()
 
 
 
@@ -312,22 +1231,10 @@ def validate_answer(answer: str, source_docs: List) -> str:
     if not source_docs:
         return " Bu konuda veri setimde güvenilir bilgi bulunmuyor."
     
-    answer_lower = answer.lower()
-    
-    no_info_keywords = ["veri setimde", "bilgi bulunmuyor", "bilgim yok"]
-    if any(keyword in answer_lower for keyword in no_info_keywords):
+    if has_no_info(answer):
         return answer
     
-    answer_words = set([w for w in answer_lower.split() if len(w) > 3])
-    source_text = " ".join([doc.page_content.lower() for doc in source_docs])
-    
-    if not answer_words:
-        return answer
-    
-    matched_words = [w for w in answer_words if w in source_text]
-    overlap_ratio = len(matched_words) / len(answer_words)
-    
-    if overlap_ratio < 0.20:
+    if overlap_ratio(answer, source_docs) < MIN_OVERLAP_RATIO:
         return " Bu konuda veri setimde güvenilir bilgi bulunmuyor."
     
     return answer
@@ -336,6 +1243,9 @@ def validate_answer(answer: str, source_docs: List) -> str:
 def preprocess_query(query: str) -> str:
     """
     Sorguya anahtar kelime zenginleştirmesi ve normalizasyon yapar
+    
+    Not: RAGPipeline artık bu fonksiyonu kullanmaz; eş anlamlılar
+    HybridRetriever içinde ağırlıklı BM25 terimleri olarak uygulanır.
     """
     query_normalized = query.lower()
     
@@ -346,33 +1256,17 @@ def preprocess_query(query: str) -> str:
     for upper, lower in turkish_chars.items():
         query_normalized = query_normalized.replace(upper, lower)
     
-    keyword_map = {
-        "katılım": ["iştirak", "katılım oranı", "yoklama", "attendance", "devam"],
-        "canlı yayın": ["webinar", "web semineri", "youtube", "yayın", "live", "stream"],
-        "sertifika": ["certificate", "belge", "sertifikadaki", "diploma", "sertifikası"],
-        "bootcamp": ["eğitim", "kurs", "program", "kampı", "camp", "training"],
-        "süre": ["zaman", "gün", "hafta", "ne kadar", "kaç", "duration"],
-        "mentor": ["danışman", "eğitmen", "mentör", "öğretmen"],
-        "proje": ["ödev", "task", "görev", "assignment", "project", "tamamlama"],
-        "github": ["git", "repo", "repository", "kod yükleme", "arayüz"],
-        "grup": ["ekip", "takım", "team", "bireysel", "tek kişi", "iki kişi"],
-        "iş": ["staj", "kariyer", "fırsat", "employment", "job"],
-        "arşiv": ["kayıt", "video", "recording", "kaydediliyor"],
-        "duyuru": ["announcement", "bildirim", "haber", "kanal", "zulip"],
-        "takvim": ["tarih", "gün", "program", "schedule", "zamanlama"],
-        "toplantı": ["meeting", "buluşma", "görüşme", "saat", "zaman"]
-    }
     
     words = query_normalized.split()
     if len(words) <= 2:
         for word in words:
-            for keyword, synonyms in keyword_map.items():
+            for keyword, synonyms in KEYWORD_MAP.items():
                 if keyword in word or word in keyword:
                     query_normalized += " " + keyword + " " + " ".join(synonyms)
                     break
     
     enriched_query = query_normalized
-    for keyword, synonyms in keyword_map.items():
+    for keyword, synonyms in KEYWORD_MAP.items():
         if keyword in query_normalized:
             enriched_query += " " + " ".join(synonyms)
     
@@ -0,0 +1,72 @@
+"""
+Gemini kotaları için thread-safe istek hızı sınırlayıcı
+
+Token bucket: kova dakikada `requests_per_minute` hızla dolar, en fazla
+`burst` izin biriktirir. acquire() izin yoksa bir sonraki izin oluşana
+kadar bekler; requests_per_minute verilmezse sınırlama yapılmaz.
+Kova thread'ler ve olay döngüleri arasında paylaşılabilir.
+"""
+
+import time
+import asyncio
+import threading
+from typing import Optional
+
+
+class RateLimiter:
+    """Dakika başına istek sınırı uygulayan token bucket"""
+
+    def __init__(self, requests_per_minute: Optional[float] = None, burst: int = 1):
+        if requests_per_minute is not None and requests_per_minute <= 0:
+            raise ValueError("requests_per_minute pozitif olmalı")
+
+        self.requests_per_minute = requests_per_minute
+        self.capacity = max(1, burst)
+        self._tokens = float(self.capacity)
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def _refill(self, now: float):
+        rate = self.requests_per_minute / 60.0
+        self._tokens = min(self.capacity, self._tokens + (now - self._updated) * rate)
+        self._updated = now
+
+    def try_acquire(self) -> float:
+        """İzin alınabildiyse 0, alınamadıysa beklenmesi gereken süre (s)"""
+        if self.requests_per_minute is None:
+            return 0.0
+
+        with self._lock:
+            self._refill(time.monotonic())
+            if self._tokens >= 1:
+                self._tokens -= 1
+                return 0.0
+            return (1 - self._tokens) * 60.0 / self.requests_per_minute
+
+    def acquire(self, timeout: Optional[float] = None) -> bool:
+        """İzin alınana kadar bekler; timeout dolarsa False döner"""
+        deadline = None if timeout is None else time.monotonic() + timeout
+        while True:
+            wait = self.try_acquire()
+            if wait <= 0:
+                return True
+            if deadline is not None:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    return False
+                wait = min(wait, remaining)
+            time.sleep(wait)
+
+    async def aacquire(self, timeout: Optional[float] = None) -> bool:
+        """acquire'ın olay döngüsünü bloklamayan karşılığı"""
+        deadline = None if timeout is None else time.monotonic() + timeout
+        while True:
+            wait = self.try_acquire()
+            if wait <= 0:
+                return True
+            if deadline is not None:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    return False
+                wait = min(wait, remaining)
+            await asyncio.sleep(wait)
@@ -0,0 +1,279 @@
+"""
+Semantik cevap önbelleği
+
+Sorgu embedding'ine göre anahtarlanan, LRU boyut sınırı ve TTL'i olan
+bir cevap önbelleği. İsteğe bağlı SQLite arka ucu sayesinde kayıtlar
+uygulama yeniden başlatıldığında da korunur. Önbellek, vektör
+veritabanının sürümü değiştiğinde kendiliğinden temizlenir.
+"""
+
+import os
+import json
+import time
+import uuid
+import sqlite3
+import threading
+from collections import OrderedDict
+from typing import Dict, List, Optional
+
+import numpy as np
+from langchain_core.documents import Document
+
+
+INDEX_VERSION_FILENAME = "index_version"
+
+
+def write_index_version(db_path: str) -> str:
+    """Veritabanı her yeniden oluşturulduğunda yeni bir sürüm kimliği yazar"""
+    version = uuid.uuid4().hex
+    os.makedirs(db_path, exist_ok=True)
+    with open(os.path.join(db_path, INDEX_VERSION_FILENAME), 'w', encoding='utf-8') as f:
+        f.write(version)
+    return version
+
+
+def read_index_version(db_path: str) -> str:
+    """Sürüm dosyası yoksa boş string döner"""
+    try:
+        with open(os.path.join(db_path, INDEX_VERSION_FILENAME), 'r', encoding='utf-8') as f:
+            return f.read().strip()
+    except OSError:
+        return ""
+
+
+def _serialize_documents(documents: List[Document]) -> str:
+    return json.dumps(
+        [{"page_content": d.page_content, "metadata": d.metadata} for d in documents],
+        ensure_ascii=False
+    )
+
+
+def _deserialize_documents(payload: str) -> List[Document]:
+    return [Document(page_content=d["page_content"], metadata=d["metadata"]) for d in json.loads(payload)]
+
+
+class SemanticCache:
+    """
+    Embedding benzerliğine dayalı TTL/LRU cevap önbelleği.
+
+    Normalize vektörler önceden ayrılmış (max_size x boyut) bir matriste
+    tutulur; ilk `len(self)` satır doludur. Ekleme boş satıra yazar, silme
+    son satırı silinenin yerine taşır; böylece arama tek bir matris-vektör
+    çarpımıdır.
+    """
+
+    def __init__(
+        self,
+        threshold: float = 0.95,
+        max_size: int = 512,
+        ttl_seconds: float = 3600,
+        sqlite_path: Optional[str] = None,
+        index_version: str = ""
+    ):
+        self.threshold = threshold
+        self.max_size = max_size
+        self.ttl_seconds = ttl_seconds
+        self.sqlite_path = sqlite_path
+        self.index_version = index_version
+
+        self.hits = 0
+        self.misses = 0
+
+        self._entries: "OrderedDict[str, Dict]" = OrderedDict()
+        self._matrix: Optional[np.ndarray] = None
+        self._row_ids: List[str] = []
+        self._lock = threading.Lock()
+        self._conn = None
+
+        if sqlite_path:
+            self._open_sqlite()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def _open_sqlite(self):
+        directory = os.path.dirname(self.sqlite_path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+
+        self._conn = sqlite3.connect(self.sqlite_path, check_same_thread=False)
+        self._conn.execute("""
+            CREATE TABLE IF NOT EXISTS response_cache (
+                id TEXT PRIMARY KEY,
+                index_version TEXT NOT NULL,
+                question TEXT NOT NULL,
+                vector BLOB NOT NULL,
+                answer TEXT NOT NULL,
+                source_documents TEXT NOT NULL,
+                created_at REAL NOT NULL,
+                last_access REAL NOT NULL
+            )
+        """)
+        self._conn.commit()
+        self._load_from_sqlite()
+
+    def _load_from_sqlite(self):
+        now = time.time()
+        self._conn.execute(
+            "DELETE FROM response_cache WHERE index_version != ? OR created_at < ?",
+            (self.index_version, now - self.ttl_seconds)
+        )
+        self._conn.commit()
+
+        rows = self._conn.execute(
+            "SELECT id, question, vector, answer, source_documents, created_at "
+            "FROM response_cache ORDER BY last_access DESC LIMIT ?",
+            (self.max_size,)
+        ).fetchall()
+
+        for entry_id, question, vector, answer, source_documents, created_at in reversed(rows):
+            self._insert(entry_id, np.frombuffer(vector, dtype=np.float32), {
+                "question": question,
+                "answer": answer,
+                "source_documents": source_documents,
+                "created_at": created_at
+            })
+
+    def _normalize(self, vector) -> Optional[np.ndarray]:
+        vector = np.asarray(vector, dtype=np.float32)
+        norm = np.linalg.norm(vector)
+        if norm == 0:
+            return None
+        return vector / norm
+
+    def _evict_expired(self, now: float):
+        expired = [k for k, e in self._entries.items() if now - e["created_at"] > self.ttl_seconds]
+        for entry_id in expired:
+            self._delete(entry_id)
+
+    def _insert(self, entry_id: str, vector: np.ndarray, entry: Dict):
+        """Kaydı LRU sonuna, vektörünü matrisin ilk boş satırına yazar"""
+        if self._matrix is None:
+            self._matrix = np.zeros((self.max_size, vector.shape[0]), dtype=np.float32)
+        row = len(self._row_ids)
+        self._matrix[row] = vector
+        self._row_ids.append(entry_id)
+        self._entries[entry_id] = {**entry, "row": row}
+
+    def _delete(self, entry_id: str):
+        entry = self._entries.pop(entry_id, None)
+        if entry is not None:
+            # Son satır boşalan satıra taşınır; dolu satırlar bitişik kalır
+            last_id = self._row_ids.pop()
+            if last_id != entry_id:
+                row = entry["row"]
+                self._matrix[row] = self._matrix[len(self._row_ids)]
+                self._row_ids[row] = last_id
+                self._entries[last_id]["row"] = row
+        self._execute("DELETE FROM response_cache WHERE id = ?", (entry_id,))
+
+    def _reset(self):
+        self._entries.clear()
+        self._row_ids.clear()
+        self._execute("DELETE FROM response_cache")
+
+    def _execute(self, statement: str, params: tuple = ()):
+        """SQLite arka ucu varsa ifadeyi çalıştırır; kalıcılaşması için _commit gerekir"""
+        if self._conn is not None:
+            self._conn.execute(statement, params)
+
+    def _commit(self):
+        """Bekleyen ekleme/silme/erişim güncellemelerini SQLite'a yazar"""
+        if self._conn is not None:
+            self._conn.commit()
+
+    def set_index_version(self, index_version: str):
+        """Vektör veritabanı sürümü değiştiyse tüm önbelleği geçersiz kılar"""
+        with self._lock:
+            if index_version == self.index_version:
+                return
+            self.index_version = index_version
+            self._reset()
+            self._commit()
+
+    def _match(self, query: np.ndarray) -> Optional[Dict]:
+        """Süresi dolanları çıkarıp eşik üstündeki en benzer kaydı döner (kilit altında)"""
+        now = time.time()
+        self._evict_expired(now)
+        if not self._entries:
+            return None
+
+        scores = self._matrix[:len(self._row_ids)] @ query
+        best = int(np.argmax(scores))
+        if scores[best] < self.threshold:
+            return None
+
+        entry_id = self._row_ids[best]
+        self._entries.move_to_end(entry_id)
+        self._execute("UPDATE response_cache SET last_access = ? WHERE id = ?", (now, entry_id))
+        return self._entries[entry_id]
+
+    def lookup(self, query_vector) -> Optional[Dict]:
+        """
+        Eşik üstündeki en benzer kaydı döner.
+        Dönen sözlük: {"answer": str, "source_documents": List[Document]}
+        """
+        query = self._normalize(query_vector)
+        if query is None:
+            return None
+
+        with self._lock:
+            entry = self._match(query)
+            # Süresi dolan kayıtların silinmesi ıskalamada da kalıcılaşır
+            self._commit()
+            if entry is None:
+                self.misses += 1
+                return None
+
+            self.hits += 1
+            answer = entry["answer"]
+            source_documents = entry["source_documents"]
+
+        return {
+            "answer": answer,
+            "source_documents": _deserialize_documents(source_documents)
+        }
+
+    def store(self, query_vector, question: str, answer: str, source_documents: List[Document]):
+        """Cevabı ve kaynak dokümanları önbelleğe ekler"""
+        vector = self._normalize(query_vector)
+        if vector is None or self.max_size <= 0:
+            return
+
+        entry_id = uuid.uuid4().hex
+        payload = _serialize_documents(source_documents)
+        now = time.time()
+
+        with self._lock:
+            # Matris max_size satırdır: yer açmak için önce en eski kayıt çıkar
+            while len(self._entries) >= self.max_size:
+                oldest_id = next(iter(self._entries))
+                self._delete(oldest_id)
+
+            self._insert(entry_id, vector, {
+                "question": question,
+                "answer": answer,
+                "source_documents": payload,
+                "created_at": now
+            })
+            self._execute(
+                "INSERT INTO response_cache VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+                (entry_id, self.index_version, question, vector.tobytes(), answer, payload, now, now)
+            )
+            self._commit()
+
+    def clear(self):
+        with self._lock:
+            self._reset()
+            self._commit()
+
+    def get_stats(self) -> Dict:
+        return {
+            "size": len(self._entries),
+            "max_size": self.max_size,
+            "ttl_seconds": self.ttl_seconds,
+            "threshold": self.threshold,
+            "hits": self.hits,
+            "misses": self.misses,
+            "persistent": self._conn is not None
+        }
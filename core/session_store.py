@@ -0,0 +1,76 @@
+"""
+Oturum bazlı sohbet geçmişi
+
+Paylaşılan tek bir RAGPipeline'ın birden fazla kullanıcıya hizmet
+verebilmesi için sohbet geçmişleri oturum kimliğine göre ayrı tutulur.
+Boşta kalan oturumlar süre dolunca, toplam oturum sayısı sınırı
+aşılınca da en uzun süredir kullanılmayanlar silinir.
+"""
+
+import time
+import threading
+from collections import OrderedDict, deque
+from typing import Dict, List, Tuple
+
+
+DEFAULT_SESSION_ID = "default"
+
+
+class SessionStore:
+    """Oturum kimliğine göre (soru, cevap) geçmişi tutan thread-safe depo"""
+
+    def __init__(self, window: int = 5, idle_ttl: float = 1800, max_sessions: int = 1000):
+        self.window = window
+        self.idle_ttl = idle_ttl
+        self.max_sessions = max_sessions
+
+        self._sessions: "OrderedDict[str, Dict]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return len(self._sessions)
+
+    def _evict(self, now: float):
+        idle = [sid for sid, s in self._sessions.items() if now - s["last_access"] > self.idle_ttl]
+        for session_id in idle:
+            del self._sessions[session_id]
+
+        while len(self._sessions) > self.max_sessions:
+            self._sessions.popitem(last=False)
+
+    def get_history(self, session_id: str) -> List[Tuple[str, str]]:
+        """Oturumun son `window` turunu (soru, cevap) listesi olarak döner"""
+        with self._lock:
+            session = self._sessions.get(session_id)
+            if session is None:
+                return []
+            session["last_access"] = time.time()
+            self._sessions.move_to_end(session_id)
+            return list(session["turns"])
+
+    def append(self, session_id: str, question: str, answer: str):
+        with self._lock:
+            now = time.time()
+            session = self._sessions.get(session_id)
+            if session is None:
+                session = {"turns": deque(maxlen=self.window), "last_access": now}
+                self._sessions[session_id] = session
+
+            session["turns"].append((question, answer))
+            session["last_access"] = now
+            self._sessions.move_to_end(session_id)
+            self._evict(now)
+
+    def clear(self, session_id: str):
+        with self._lock:
+            self._sessions.pop(session_id, None)
+
+    def get_stats(self) -> Dict:
+        with self._lock:
+            self._evict(time.time())
+            return {
+                "active_sessions": len(self._sessions),
+                "max_sessions": self.max_sessions,
+                "window": self.window,
+                "idle_ttl": self.idle_ttl
+            }
@@ -0,0 +1,106 @@
+"""
+Genel LLM fallback'inin spekülatif çalıştırılması
+
+general_safe sorularda RAG cevabı güven kontrolünden geçemezse genel
+LLM çağrılır; kullanıcı iki tam LLM turunu art arda bekler. Spekülatif
+modda genel LLM çağrısı RAG ile aynı anda başlatılır: RAG cevabı kabul
+edilirse spekülasyon iptal edilir/atılır, edilmezse hazır cevap
+kullanılır. Hangi kategorilerde spekülasyon yapılacağı ayarlanabilir;
+boşa giden spekülasyon oranı Gemini maliyeti ile gecikme arasındaki
+dengeyi izlemek için sayılır.
+"""
+
+import asyncio
+import threading
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Any, Awaitable, Callable, Dict, Iterable, Optional, Union
+
+
+class Speculation:
+    """Başlatılmış tek bir spekülatif çağrı (Future veya asyncio.Task)"""
+
+    def __init__(self, category: str, handle: Union[Future, "asyncio.Task"]):
+        self.category = category
+        self.handle = handle
+        self.resolved = False
+
+
+class SpeculativeFallback:
+    """Kategori politikasına göre spekülatif çağrıları başlatır ve sayar"""
+
+    def __init__(self, categories: Iterable[str] = ("general_safe",), max_workers: int = 4):
+        self.categories = frozenset(categories)
+        self.max_workers = max_workers
+        self._executor: Optional[ThreadPoolExecutor] = None
+        self._lock = threading.Lock()
+        self._counts: Dict[str, Dict[str, int]] = {}
+
+    def enabled_for(self, category: str) -> bool:
+        return category in self.categories
+
+    def _count(self, category: str, event: str):
+        with self._lock:
+            counts = self._counts.setdefault(category, {"started": 0, "used": 0, "wasted": 0, "cancelled": 0})
+            counts[event] += 1
+
+    def start(self, category: str, fn: Callable[..., Any], *args) -> Optional[Speculation]:
+        """Politika izin veriyorsa fn'i arka planda başlatır, yoksa None"""
+        if not self.enabled_for(category):
+            return None
+
+        with self._lock:
+            if self._executor is None:
+                self._executor = ThreadPoolExecutor(
+                    max_workers=self.max_workers,
+                    thread_name_prefix="speculative-fallback"
+                )
+        self._count(category, "started")
+        return Speculation(category, self._executor.submit(fn, *args))
+
+    def astart(self, category: str, coro_fn: Callable[..., Awaitable[Any]], *args) -> Optional[Speculation]:
+        """start'ın asenkron karşılığı; çağrı aynı olay döngüsünde task olarak çalışır"""
+        if not self.enabled_for(category):
+            return None
+
+        self._count(category, "started")
+        return Speculation(category, asyncio.ensure_future(coro_fn(*args)))
+
+    def take(self, speculation: Speculation) -> Any:
+        """Spekülatif sonucu kullanır (gerekirse bitmesini bekler)"""
+        speculation.resolved = True
+        self._count(speculation.category, "used")
+        return speculation.handle.result()
+
+    async def atake(self, speculation: Speculation) -> Any:
+        speculation.resolved = True
+        self._count(speculation.category, "used")
+        return await speculation.handle
+
+    def discard(self, speculation: Optional[Speculation]):
+        """
+        Kullanılmayan spekülasyonu iptal eder; çalışmaya başlamış senkron
+        çağrılar iptal edilemez, sonuçları atılır. take sonrası etkisizdir.
+        """
+        if speculation is None or speculation.resolved:
+            return
+
+        speculation.resolved = True
+        self._count(speculation.category, "wasted")
+        if not speculation.handle.done() and speculation.handle.cancel():
+            self._count(speculation.category, "cancelled")
+
+    def get_stats(self) -> Dict:
+        with self._lock:
+            by_category = {c: dict(counts) for c, counts in self._counts.items()}
+
+        started = sum(c["started"] for c in by_category.values())
+        wasted = sum(c["wasted"] for c in by_category.values())
+        return {
+            "categories": sorted(self.categories),
+            "started": started,
+            "used": sum(c["used"] for c in by_category.values()),
+            "wasted": wasted,
+            "cancelled": sum(c["cancelled"] for c in by_category.values()),
+            "waste_rate": round(wasted / started, 3) if started else 0.0,
+            "by_category": by_category
+        }
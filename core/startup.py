@@ -0,0 +1,138 @@
+"""
+Soğuk başlangıç ölçümü ve hazır olma (readiness) durumu
+
+Ağır kütüphaneler (langchain, chromadb, torch, sentence-transformers)
+ilk kullanıldıkları yerde import edilir; pipeline arka plan thread'inde
+kurulup ısıtılırken arayüz çalışmaya devam eder. StartupReport her
+başlangıç aşamasının süresini, o andaki RSS'i ve tepe RSS'i kaydeder ve
+aynı zamanda hazır olma bayrağını ve ilerlemeyi tutar.
+"""
+
+import os
+import sys
+import time
+import threading
+from contextlib import contextmanager
+from typing import Dict, List, Optional, Sequence
+
+
+STARTUP_PHASES = ("import", "llm", "embeddings", "response_cache", "index", "warmup_encode", "warmup_index")
+
+
+def current_rss_mb() -> Optional[float]:
+    """Anlık RSS (MB); /proc olmayan sistemlerde None"""
+    try:
+        with open("/proc/self/statm", 'r') as f:
+            pages = int(f.read().split()[1])
+        return pages * os.sysconf("SC_PAGE_SIZE") / 2 ** 20
+    except (OSError, ValueError, AttributeError):
+        return None
+
+
+def peak_rss_mb() -> Optional[float]:
+    """Sürecin tepe RSS'i (MB); resource modülü yoksa (Windows) None"""
+    try:
+        import resource
+    except ImportError:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Linux KB, macOS byte cinsinden verir
+    return peak / 2 ** 20 if sys.platform == "darwin" else peak / 1024
+
+
+def _round(value: Optional[float]) -> Optional[float]:
+    return None if value is None else round(value, 1)
+
+
+class StartupReport:
+    """Başlangıç aşamalarının süresi/belleği ve hazır olma durumu (thread-safe)"""
+
+    def __init__(self, expected_phases: Sequence[str] = STARTUP_PHASES):
+        self.expected_phases = list(expected_phases)
+        self.started = time.perf_counter()
+        self.phases: List[Dict] = []
+        self.current: Optional[str] = None
+        self.state = "starting"
+        self.error: Optional[str] = None
+        self.ready_after: Optional[float] = None
+        self._ready = threading.Event()
+        self._lock = threading.Lock()
+
+    @contextmanager
+    def phase(self, name: str):
+        """Aşamanın süresini ve bellek etkisini kaydeder"""
+        with self._lock:
+            self.current = name
+        rss_before = current_rss_mb()
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            seconds = time.perf_counter() - start
+            rss = current_rss_mb()
+            with self._lock:
+                self.phases.append({
+                    "name": name,
+                    "ms": round(seconds * 1000, 1),
+                    "rss_mb": _round(rss),
+                    "rss_delta_mb": _round(rss - rss_before) if rss is not None and rss_before is not None else None,
+                    "peak_rss_mb": _round(peak_rss_mb())
+                })
+                self.current = None
+
+    @property
+    def ready(self) -> bool:
+        return self._ready.is_set()
+
+    @property
+    def progress(self) -> float:
+        """Beklenen aşamalardan tamamlananların oranı (0-1)"""
+        if self.ready:
+            return 1.0
+        with self._lock:
+            done = {phase["name"] for phase in self.phases}
+        return min(0.99, len(done & set(self.expected_phases)) / max(1, len(self.expected_phases)))
+
+    def mark_ready(self):
+        with self._lock:
+            self.state = "ready"
+            self.ready_after = time.perf_counter() - self.started
+        self._ready.set()
+
+    def mark_failed(self, error: BaseException):
+        with self._lock:
+            self.state = "failed"
+            self.error = f"{type(error).__name__}: {error}"
+            self.current = None
+
+    def wait(self, timeout: Optional[float] = None) -> bool:
+        return self._ready.wait(timeout)
+
+    def to_dict(self) -> Dict:
+        with self._lock:
+            return {
+                "state": self.state,
+                "current_phase": self.current,
+                "error": self.error,
+                "ready_after_ms": round(self.ready_after * 1000, 1) if self.ready_after is not None else None,
+                "peak_rss_mb": _round(peak_rss_mb()),
+                "phases": [dict(phase) for phase in self.phases]
+            }
+
+    def format(self) -> str:
+        """Konsol için aşama tablosu"""
+        report = self.to_dict()
+        lines = [f"{'aşama':<16}{'süre ms':>10}{'RSS MB':>10}{'Δ MB':>9}{'tepe MB':>10}"]
+        for phase in report["phases"]:
+            lines.append(
+                f"{phase['name']:<16}{phase['ms']:>10.1f}"
+                + "".join(
+                    f"{value:>{width}.1f}" if value is not None else f"{'-':>{width}}"
+                    for value, width in ((phase["rss_mb"], 10), (phase["rss_delta_mb"], 9), (phase["peak_rss_mb"], 10))
+                )
+            )
+        if report["ready_after_ms"] is not None:
+            lines.append(f"hazır: {report['ready_after_ms']:.1f} ms, tepe RSS: {report['peak_rss_mb']} MB")
+        elif report["error"]:
+            lines.append(f"başarısız: {report['error']}")
+        return "\n".join(lines)
@@ -0,0 +1,62 @@
+"""
+Türkçe metin normalizasyonu ve tokenizasyon
+
+Sözcüksel indeks ve metin karşılaştırmaları için ortak yardımcılar:
+Türkçe'ye uygun küçük harfe çevirme (İ/I), aksan katlama
+(ş→s, ı→i ...) ve eklemeli yapıya uygun önek kökleme (ilk 5 harf).
+"""
+
+import re
+from typing import List, Set
+
+
+# str.translate ASCII dışı eşlemelerde karakter başına yavaş çalıştığı
+# için zincirleme str.replace kullanılır
+_DIACRITICS = (
+    ("ç", "c"), ("ğ", "g"), ("ı", "i"), ("ö", "o"), ("ş", "s"), ("ü", "u"),
+    ("â", "a"), ("î", "i"), ("û", "u"), ("̇", "")
+)
+_TOKEN_PATTERN = re.compile(r"\w+", re.UNICODE)
+
+STEM_LENGTH = 5
+
+STOPWORDS = {
+    "acaba", "ama", "ancak", "bir", "biz", "bu", "da", "de", "daha", "diye",
+    "en", "gibi", "hem", "her", "icin", "ile", "ise", "kadar", "ki", "mi",
+    "mu", "ne", "neden", "o", "olan", "olarak", "sen", "siz", "su", "ve",
+    "veya", "ya", "yani"
+}
+
+
+def turkish_lower(text: str) -> str:
+    """Türkçe kurallarına göre küçük harfe çevirir ("İ" → "i", "I" → "ı")"""
+    return text.replace("İ", "i").replace("I", "ı").lower()
+
+
+def normalize_turkish(text: str) -> str:
+    """Küçük harf + aksan katlama; "Katılım" ve "katilim" aynı metne dönüşür"""
+    text = turkish_lower(text)
+    for source, target in _DIACRITICS:
+        text = text.replace(source, target)
+    return text
+
+
+def stem(token: str) -> str:
+    """Eklemeli Türkçe için basit önek kökleme ("sertifikası" → "serti")"""
+    return token[:STEM_LENGTH]
+
+
+def tokenize(text: str, remove_stopwords: bool = True) -> List[str]:
+    """Normalize edilmiş ve köklenmiş token listesi döner"""
+    tokens = _TOKEN_PATTERN.findall(normalize_turkish(text))
+    if remove_stopwords:
+        tokens = [t for t in tokens if t not in STOPWORDS]
+    return [stem(t) for t in tokens]
+
+
+def token_set(text: str, min_length: int = 4) -> Set[str]:
+    """En az min_length harfli, stopword olmayan kelimelerin kök kümesi"""
+    return {
+        stem(t) for t in _TOKEN_PATTERN.findall(normalize_turkish(text))
+        if len(t) >= min_length and t not in STOPWORDS
+    }
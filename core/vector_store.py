@@ -0,0 +1,40 @@
+"""
+Vektör deposu seçimi
+
+"chroma": langchain_chroma üzerinden kalıcı ChromaDB koleksiyonu
+"numpy":  süreç içi, bellek eşlemeli NumPy deposu (bkz. numpy_store)
+
+Her iki depo da aynı doc_id'leri ve Chroma.get uyumlu arayüzü
+kullandığından indeksleyici ve retriever'lar ikisiyle de çalışır.
+chromadb sadece "chroma" seçildiğinde import edilir.
+"""
+
+from langchain_core.embeddings import Embeddings
+
+from .numpy_store import NumpyVectorStore
+
+
+VECTOR_BACKENDS = ("chroma", "numpy")
+
+# Arama sonuçlarına benzerlik skorunu (metadata["retrieval_score"]) yazan
+# depolar; Chroma'nın MMR araması skor döndürmez
+SCORING_BACKENDS = ("numpy",)
+
+
+def create_vector_store(backend: str, db_path: str, embeddings: Embeddings, collection_name: str):
+    """Seçilen arka uç için vektör deposunu açar (yoksa boş oluşturur)"""
+    if backend == "chroma":
+        from langchain_chroma import Chroma
+        
+        return Chroma(
+            persist_directory=db_path,
+            embedding_function=embeddings,
+            collection_name=collection_name
+        )
+    if backend == "numpy":
+        return NumpyVectorStore(
+            persist_directory=db_path,
+            embedding_function=embeddings,
+            collection_name=collection_name
+        )
+    raise ValueError(f"Bilinmeyen vektör deposu: {backend} (seçenekler: {', '.join(VECTOR_BACKENDS)})")
@@ -0,0 +1,378 @@
+"""
+MentorMate HTTP servisi (ASGI)
+
+Süreç başına tek bir paylaşılan pipeline yüklenir (bkz. service.py);
+Streamlit'ten bağımsız olarak yük dengeleyici arkasında veya bot
+entegrasyonlarından çağrılabilir.
+
+    POST   /query               {"question", "session_id"?, "stream"?} → JSON veya SSE
+    POST   /batch               {"questions": [...], "max_concurrency"?} → sonuç listesi
+    DELETE /sessions/{id}       oturumun sohbet geçmişini siler
+    POST   /index/refresh       yayınlanan yeni indeks sürümüne arka planda geçer
+    GET    /health              hazır olma durumu (hazır değilse 503)
+    GET    /stats               pipeline istatistikleri
+    GET    /metrics             Prometheus metinleri
+
+Pipeline çağrıları olay döngüsünü bloklamasın diye sınırlı bir thread
+havuzunda çalışır (SERVICE_WORKERS); havuz ve kuyruk doluysa
+(SERVICE_MAX_PENDING) istek beklemeden 503 ile reddedilir. /batch
+soruları kendi thread'lerinde çalışsa da her iş adımı havuzun paylaşılan
+worker semaforunu tutar; böylece aynı anda çalışan pipeline işi toplamda
+SERVICE_WORKERS'ı aşmaz. Akış (SSE) sırasında istemci
+bağlantıyı koparırsa üretim iptal edilir ve oturum geçmişine yazılmaz.
+Gemini kota/kapasite hataları (LLMGatewayError) 503 + Retry-After döner.
+
+Çalıştırma:
+    uvicorn server:app --host 0.0.0.0 --port 8000
+"""
+
+import os
+import json
+import uuid
+import asyncio
+import threading
+import functools
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import asynccontextmanager, contextmanager
+from typing import AsyncIterator, Dict, List, Optional
+
+from fastapi import FastAPI, HTTPException, Request
+from fastapi.responses import JSONResponse, PlainTextResponse, StreamingResponse
+from pydantic import BaseModel, Field
+
+from core.llm_gateway import LLMGatewayError
+from service import PipelineService
+
+
+SERVICE_WORKERS = int(os.getenv("SERVICE_WORKERS", "8"))
+SERVICE_MAX_PENDING = int(os.getenv("SERVICE_MAX_PENDING", "64"))
+BATCH_MAX_QUESTIONS = int(os.getenv("BATCH_MAX_QUESTIONS", "500"))
+RETRY_AFTER_SECONDS = 5
+
+
+class QueryRequest(BaseModel):
+    question: str = Field(min_length=1)
+    session_id: Optional[str] = None
+    stream: bool = False
+
+
+class BatchRequest(BaseModel):
+    questions: List[str]
+    max_concurrency: int = Field(default=4, ge=1, le=32)
+    use_response_cache: bool = False
+
+
+class ServiceBusy(Exception):
+    """Thread havuzu ve bekleme kuyruğu dolu"""
+
+
+def serialize_result(result: Dict) -> Dict:
+    """Pipeline sonucunu JSON'a çevirir (Document → {"content", "metadata"})"""
+    return {
+        **result,
+        "source_documents": [
+            {"content": doc.page_content, "metadata": doc.metadata}
+            for doc in result.get("source_documents", [])
+        ]
+    }
+
+
+def _stream_event(event: Dict, session_id: str) -> Dict:
+    if event["type"] == "final":
+        return {**event, "result": serialize_result(event["result"]), "session_id": session_id}
+    return event
+
+
+class WorkerPool:
+    """
+    Sınırlı thread havuzu: en fazla `workers` iş çalışır, `max_pending`
+    kadarı bekler; fazlası ServiceBusy ile hemen reddedilir. Çalışma
+    sınırı paylaşılan bir semafordur (slot()); toplu işlerin kendi
+    thread'leri de aynı semaforu tuttuğu için sınır onlar için de geçerlidir.
+    """
+
+    def __init__(self, workers: int, max_pending: int):
+        self.executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="pipeline")
+        self.workers = workers
+        self.max_pending = max_pending
+        self.in_flight = 0
+        self.rejected = 0
+        self._lock = threading.Lock()
+        self._slots = threading.BoundedSemaphore(workers)
+
+    def _acquire(self):
+        """İsteği kabul eder; çalışan ve bekleyen iş sınırı doluysa reddeder"""
+        with self._lock:
+            if self.in_flight >= self.workers + self.max_pending:
+                self.rejected += 1
+                raise ServiceBusy()
+            self.in_flight += 1
+
+    def _release(self):
+        with self._lock:
+            self.in_flight -= 1
+
+    @contextmanager
+    def slot(self):
+        """Pipeline işi süresince paylaşılan worker slotlarından birini tutar"""
+        with self._slots:
+            yield
+
+    def _run_in_slot(self, func, *args):
+        with self.slot():
+            return func(*args)
+
+    async def run(self, func, *args):
+        """func(*args)'ı havuzda bir worker slotu tutarak çalıştırıp sonucunu bekler"""
+        self._acquire()
+        try:
+            return await asyncio.get_running_loop().run_in_executor(self.executor, self._run_in_slot, func, *args)
+        finally:
+            self._release()
+
+    async def run_batch(self, func, max_concurrency: int):
+        """
+        func(concurrency, slot)'u havuzda çalıştırır. func'ın açtığı
+        thread'ler her iş adımında slot()'u tutmalıdır; koordinasyon
+        thread'i beklerken slot tutmaz. concurrency en fazla worker
+        sayısıdır, fazlası zaten semaforda bekleyecektir.
+        """
+        self._acquire()
+        try:
+            return await asyncio.get_running_loop().run_in_executor(
+                self.executor, func, max(1, min(max_concurrency, self.workers)), self.slot
+            )
+        finally:
+            self._release()
+
+    async def stream(self, events: AsyncIterator[Dict]) -> AsyncIterator[Dict]:
+        """
+        Asenkron olay üretecini havuzdaki bir thread'de kendi olay döngüsüyle
+        çalıştırır; olaylar sunucunun döngüsüne kuyrukla aktarılır. Bu
+        üreteç kapatılırsa (istemci koptu) üretim görevi iptal edilir.
+        """
+        self._acquire()
+        loop = asyncio.get_running_loop()
+        queue: asyncio.Queue = asyncio.Queue()
+        done = object()
+        cancelled = threading.Event()
+        producer = {}
+
+        def cancel():
+            cancelled.set()
+            task = producer.get("task")
+            if task is not None:
+                try:
+                    task.get_loop().call_soon_threadsafe(task.cancel)
+                except RuntimeError:
+                    pass  # üretim zaten bitti, döngü kapandı
+
+        def produce():
+            async def consume():
+                # cancel() görevi ya burada görür ya da bayrağı görür
+                producer["task"] = asyncio.current_task()
+                if cancelled.is_set():
+                    return
+                async for event in events:
+                    loop.call_soon_threadsafe(queue.put_nowait, event)
+
+            try:
+                with self.slot():
+                    asyncio.run(consume())
+            except BaseException as e:
+                loop.call_soon_threadsafe(queue.put_nowait, e)
+            finally:
+                loop.call_soon_threadsafe(queue.put_nowait, done)
+                self._release()
+
+        try:
+            self.executor.submit(produce)
+        except BaseException:
+            self._release()
+            raise
+
+        try:
+            while True:
+                item = await queue.get()
+                if item is done:
+                    return
+                if isinstance(item, BaseException):
+                    raise item
+                yield item
+        finally:
+            cancel()
+
+    def get_stats(self) -> Dict:
+        return {
+            "workers": self.workers,
+            "max_pending": self.max_pending,
+            "in_flight": self.in_flight,
+            "rejected": self.rejected
+        }
+
+    def shutdown(self):
+        self.executor.shutdown(wait=False, cancel_futures=True)
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    app.state.service = PipelineService().start(background=True)
+    app.state.pool = WorkerPool(SERVICE_WORKERS, SERVICE_MAX_PENDING)
+    yield
+    app.state.pool.shutdown()
+    app.state.service.stop()
+
+
+app = FastAPI(title="MentorMate", lifespan=lifespan)
+
+
+@app.exception_handler(LLMGatewayError)
+async def gateway_error_handler(request: Request, error: LLMGatewayError):
+    return JSONResponse(
+        status_code=503,
+        content={"detail": str(error) or "LLM kotası dolu", "busy": True},
+        headers={"Retry-After": str(RETRY_AFTER_SECONDS)}
+    )
+
+
+@app.exception_handler(ServiceBusy)
+async def busy_handler(request: Request, error: ServiceBusy):
+    return JSONResponse(
+        status_code=503,
+        content={"detail": "Servis çok yoğun", "busy": True},
+        headers={"Retry-After": str(RETRY_AFTER_SECONDS)}
+    )
+
+
+def _pipeline(request: Request):
+    """Etkin sürümün pipeline'ı; istek boyunca aynı nesne kullanılır"""
+    pipeline = request.app.state.service.pipeline
+    if pipeline is None:
+        raise HTTPException(status_code=503, detail="Pipeline hazırlanıyor", headers={"Retry-After": str(RETRY_AFTER_SECONDS)})
+    return pipeline
+
+
+def _sse(event: Dict) -> str:
+    return f"event: {event['type']}\ndata: {json.dumps(event, ensure_ascii=False)}\n\n"
+
+
+@app.post("/query")
+async def query(body: QueryRequest, request: Request):
+    """
+    Soruyu oturum geçmişiyle cevaplar. stream=true veya
+    "Accept: text/event-stream" ile cevap SSE olarak akıtılır:
+        event: token   data: {"type": "token", "content": str}
+        event: retract data: {"type": "retract"}
+        event: final   data: {"type": "final", "result": {...}}
+        event: error   data: {"type": "error", "detail": str, "busy": bool}
+    """
+    pipeline = _pipeline(request)
+    pool: WorkerPool = request.app.state.pool
+    session_id = body.session_id or uuid.uuid4().hex
+
+    if body.stream or "text/event-stream" in request.headers.get("accept", ""):
+        events = pool.stream(pipeline.astream_query(body.question, session_id=session_id))
+        # İlk olay beklenir: havuz doluysa veya kota hatası üretimden önce
+        # geldiyse akış başlamadan 503 dönülür
+        try:
+            first = await events.__anext__()
+        except StopAsyncIteration:
+            first = None
+
+        async def sse() -> AsyncIterator[str]:
+            try:
+                if first is not None:
+                    yield _sse(_stream_event(first, session_id))
+                async for event in events:
+                    # Kopan istemci için üretime devam edilmez (geçmiş de yazılmaz)
+                    if await request.is_disconnected():
+                        break
+                    yield _sse(_stream_event(event, session_id))
+            except LLMGatewayError as e:
+                yield _sse({"type": "error", "detail": str(e) or "LLM kotası dolu", "busy": True})
+            except Exception as e:
+                yield _sse({"type": "error", "detail": str(e), "busy": False})
+            finally:
+                await events.aclose()
+
+        return StreamingResponse(
+            sse(),
+            media_type="text/event-stream",
+            headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+        )
+
+    result = await pool.run(functools.partial(pipeline.query, body.question, session_id=session_id))
+    return {"session_id": session_id, **serialize_result(result)}
+
+
+@app.post("/batch")
+async def batch(body: BatchRequest, request: Request):
+    """
+    Soruları durumsuz cevaplar (query_batch); sonuçlar soru sırasıyla döner.
+    Her soru adımı havuzun worker slotlarından birini tutar; toplam
+    eşzamanlılık SERVICE_WORKERS'ı aşmaz.
+    """
+    if len(body.questions) > BATCH_MAX_QUESTIONS:
+        raise HTTPException(status_code=413, detail=f"En fazla {BATCH_MAX_QUESTIONS} soru gönderilebilir")
+    pipeline = _pipeline(request)
+
+    def run(concurrency: int, slot) -> List[Dict]:
+        items = list(pipeline.query_batch(
+            body.questions,
+            max_concurrency=concurrency,
+            use_response_cache=body.use_response_cache,
+            work_slot=slot
+        ))
+        items.sort(key=lambda item: item["index"])
+        return [
+            {**item, "result": serialize_result(item["result"])} if "result" in item else item
+            for item in items
+        ]
+
+    return {"results": await request.app.state.pool.run_batch(run, body.max_concurrency)}
+
+
+@app.delete("/sessions/{session_id}")
+async def clear_session(session_id: str, request: Request):
+    _pipeline(request).clear_memory(session_id)
+    return {"session_id": session_id, "cleared": True}
+
+
+@app.post("/index/refresh")
+async def refresh_index(request: Request):
+    return {"started": request.app.state.service.refresh_index()}
+
+
+@app.get("/health")
+async def health(request: Request):
+    """Yük dengeleyici için: pipeline hazırsa 200, hazırlanıyor/başarısızsa 503"""
+    status = request.app.state.service.status()
+    return JSONResponse(status_code=200 if status["ready"] else 503, content=status)
+
+
+@app.get("/stats")
+async def stats(request: Request):
+    return {**request.app.state.service.get_stats(), "workers": request.app.state.pool.get_stats()}
+
+
+@app.get("/metrics", response_class=PlainTextResponse)
+async def metrics(request: Request):
+    pool: WorkerPool = request.app.state.pool
+    text = (
+        "# TYPE mentormate_service_in_flight gauge\n"
+        f"mentormate_service_in_flight {pool.in_flight}\n"
+        "# TYPE mentormate_service_rejected_total counter\n"
+        f"mentormate_service_rejected_total {pool.rejected}\n"
+        "# TYPE mentormate_service_ready gauge\n"
+        f"mentormate_service_ready {int(request.app.state.service.status()['ready'])}\n"
+    )
+    pipeline = request.app.state.service.pipeline
+    if pipeline is not None:
+        text = pipeline.get_prometheus_metrics() + text
+    return PlainTextResponse(text, media_type="text/plain; version=0.0.4")
+
+
+if __name__ == "__main__":
+    import uvicorn
+
+    uvicorn.run(app, host=os.getenv("SERVICE_HOST", "0.0.0.0"), port=int(os.getenv("SERVICE_PORT", "8000")))
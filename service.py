@@ -0,0 +1,219 @@
+"""
+Paylaşılan pipeline çalışma zamanı
+
+Streamlit arayüzü (app.py) ve HTTP servisi (server.py) aynı yapılandırmayı
+ve başlangıç akışını kullanır: yayınlanmış indeks sürümü HotSwapIndex ile
+salt okunur yüklenir (hazır sürüm yoksa ilk sürüm kurulur), pipeline arka
+planda ısıtılır ve yeni sürümler izlenir.
+"""
+
+import os
+import threading
+import functools
+from typing import Dict
+from dotenv import load_dotenv
+
+# Ağır kütüphaneler (langchain, chromadb, torch) arka plandaki başlangıç
+# thread'inde, ilk kullanıldıkları yerde import edilir
+from core.indexer import build_index
+from core.embedding_cache import CachedEmbeddings
+from core.vector_store import create_vector_store
+from core.ingestion import iter_documents
+from core.artifacts import HotSwapIndex, publish_artifact
+from core.startup import StartupReport
+from core.embedding_backends import create_embeddings, cache_model_name, DEFAULT_EMBEDDING_BACKEND
+
+
+load_dotenv()
+
+PROJECT_ROOT = os.path.dirname(os.path.abspath(__file__))
+DB_PATH = os.path.join(PROJECT_ROOT, "chroma_db")
+COLLECTION_NAME = "mentormate_faq"
+EMBEDDING_MODEL = "sentence-transformers/paraphrase-multilingual-MiniLM-L12-v2"
+GOOGLE_API_KEY = os.getenv("GOOGLE_API_KEY")
+EMBEDDING_BACKEND = os.getenv("EMBEDDING_BACKEND", "")
+EMBEDDING_THREADS = int(os.getenv("EMBEDDING_THREADS")) if os.getenv("EMBEDDING_THREADS") else None
+ONNX_MODEL_DIR = os.getenv("ONNX_MODEL_DIR", os.path.join(PROJECT_ROOT, "cache", "onnx"))
+EMBEDDING_CACHE_DIR = os.getenv("EMBEDDING_CACHE_DIR", os.path.join(PROJECT_ROOT, "cache", "embeddings"))
+CANONICAL_THRESHOLD = float(os.getenv("CANONICAL_THRESHOLD", "0.90"))
+CACHE_DB_PATH = os.getenv("CACHE_DB_PATH", os.path.join(PROJECT_ROOT, "cache", "response_cache.sqlite3"))
+CACHE_TTL = float(os.getenv("CACHE_TTL", "3600"))
+CACHE_SIZE = int(os.getenv("CACHE_SIZE", "512"))
+QUERY_PLANNER = os.getenv("QUERY_PLANNER", "single_call")
+INDEX_CLUSTERING = os.getenv("INDEX_CLUSTERING", "1") == "1"
+VECTOR_BACKEND = os.getenv("VECTOR_BACKEND", "chroma")
+MIN_RETRIEVAL_SCORE = float(os.getenv("MIN_RETRIEVAL_SCORE")) if os.getenv("MIN_RETRIEVAL_SCORE") else None
+INTENT_ROUTER_THRESHOLD = float(os.getenv("INTENT_ROUTER_THRESHOLD", "0.60"))
+INTENT_ROUTER_MARGIN = float(os.getenv("INTENT_ROUTER_MARGIN", "0.05"))
+LLM_REQUESTS_PER_MINUTE = float(os.getenv("LLM_REQUESTS_PER_MINUTE")) if os.getenv("LLM_REQUESTS_PER_MINUTE") else None
+LLM_MAX_CONCURRENCY = int(os.getenv("LLM_MAX_CONCURRENCY", "8"))
+BACKGROUND_WARMUP = os.getenv("BACKGROUND_WARMUP", "1") == "1"
+INDEX_POLL_INTERVAL = float(os.getenv("INDEX_POLL_INTERVAL", "30"))
+CONTEXT_TOKEN_BUDGET = int(os.getenv("CONTEXT_TOKEN_BUDGET", "600"))
+SPECULATIVE_CATEGORIES = tuple(c.strip() for c in os.getenv("SPECULATIVE_CATEGORIES", "general_safe").split(",") if c.strip())
+
+DATA_FILES = [
+    os.path.join(PROJECT_ROOT, "data", "enriched_dataset.jsonl"),
+    os.path.join(PROJECT_ROOT, "data", "generated_data_google.jsonl")
+]
+CANONICAL_DATA_FILE = os.path.join(PROJECT_ROOT, "data", "enriched_dataset.jsonl")
+
+
+def create_database_runtime():
+    """Hazır indeks yoksa ilk sürümü kurup yayınlar (arka plan thread'inde çalışır)"""
+    if not any(os.path.exists(path) for path in DATA_FILES):
+        raise Exception("Veri dosyaları yüklenemedi!")
+
+    embedding_backend = EMBEDDING_BACKEND or DEFAULT_EMBEDDING_BACKEND
+    embeddings = create_embeddings(embedding_backend, EMBEDDING_MODEL, onnx_dir=ONNX_MODEL_DIR, threads=EMBEDDING_THREADS)
+    if EMBEDDING_CACHE_DIR:
+        embeddings = CachedEmbeddings(
+            embeddings,
+            model_name=cache_model_name(EMBEDDING_MODEL, embedding_backend),
+            cache_dir=EMBEDDING_CACHE_DIR
+        )
+
+    def build(path: str) -> dict:
+        vectordb = create_vector_store(VECTOR_BACKEND, path, embeddings, COLLECTION_NAME)
+        return build_index(
+            vectordb=vectordb,
+            embeddings=embeddings,
+            db_path=path,
+            collection_name=COLLECTION_NAME,
+            embedding_model=EMBEDDING_MODEL,
+            data_files=DATA_FILES,
+            canonical_data_file=CANONICAL_DATA_FILE,
+            load_documents=iter_documents,
+            cluster=INDEX_CLUSTERING,
+            vector_backend=VECTOR_BACKEND,
+            embedding_backend=embedding_backend
+        )
+
+    return publish_artifact(DB_PATH, build, incremental=False, log=print)
+
+
+def load_pipeline(path: str, manifest: dict, previous, startup: StartupReport = None):
+    """
+    Bir indeks sürümü için ısıtılmış pipeline. Önceki pipeline varsa LLM,
+    embedding, oturum ve önbellekleri paylaşan bir kopyası yeni indekse bağlanır.
+    """
+    if manifest.get("embedding_model") not in (None, EMBEDDING_MODEL):
+        raise ValueError(f"İndeks farklı bir embedding modeliyle kurulmuş: {manifest['embedding_model']}")
+    index_options = manifest.get("index_options", {})
+    backend = index_options.get("vector_backend", VECTOR_BACKEND)
+
+    if previous is not None:
+        pipeline = previous.with_index(path, vector_backend=backend)
+        pipeline.warm_up()
+        return pipeline
+
+    startup = startup or StartupReport()
+    with startup.phase("import"):
+        from core.rag_pipeline import RAGPipeline
+
+    pipeline = RAGPipeline(
+        google_api_key=GOOGLE_API_KEY,
+        db_path=path,
+        collection_name=COLLECTION_NAME,
+        embedding_model=EMBEDDING_MODEL,
+        llm_model="gemini-2.0-flash",
+        temperature=0.01,
+        canonical_threshold=CANONICAL_THRESHOLD,
+        cache_size=CACHE_SIZE,
+        cache_ttl=CACHE_TTL,
+        cache_db_path=CACHE_DB_PATH or None,
+        query_planner=QUERY_PLANNER,
+        embedding_cache_dir=EMBEDDING_CACHE_DIR or None,
+        vector_backend=backend,
+        # Belirtilmezse indeksi kuran embedding arka ucu kullanılır
+        embedding_backend=EMBEDDING_BACKEND or index_options.get("embedding_backend", DEFAULT_EMBEDDING_BACKEND),
+        embedding_threads=EMBEDDING_THREADS,
+        onnx_model_dir=ONNX_MODEL_DIR,
+        context_token_budget=CONTEXT_TOKEN_BUDGET or None,
+        speculative_categories=SPECULATIVE_CATEGORIES,
+        min_retrieval_score=MIN_RETRIEVAL_SCORE,
+        intent_router_threshold=INTENT_ROUTER_THRESHOLD,
+        intent_router_margin=INTENT_ROUTER_MARGIN,
+        llm_requests_per_minute=LLM_REQUESTS_PER_MINUTE,
+        llm_max_concurrency=LLM_MAX_CONCURRENCY,
+        startup_report=startup
+    )
+    pipeline.warm_up()
+    return pipeline
+
+
+def start_up(index: HotSwapIndex, startup: StartupReport):
+    """İlk indeks sürümünü yükleyip ısıtır; hazır sürüm yoksa önce kurar"""
+    try:
+        if not index.refresh():
+            if index.last_error:
+                raise RuntimeError(index.last_error)
+            startup.expected_phases.insert(0, "initial_build")
+            with startup.phase("initial_build"):
+                create_database_runtime()
+            if not index.refresh():
+                raise RuntimeError(index.last_error or "İndeks sürümü bulunamadı")
+        print(startup.format())
+    except Exception as e:
+        startup.mark_failed(e)
+    index.start_polling()
+
+
+class PipelineService:
+    """
+    Süreç başına tek, sürümü değişebilen pipeline.
+
+    `pipeline` istek başında bir kez okunur ve istek boyunca o nesne
+    kullanılır; yeni indeks sürümü sonraki isteklere yansır. Sohbet
+    geçmişi, önbellekler ve LLM kotası sürümler arasında paylaşılır.
+    """
+
+    def __init__(self, poll_interval: float = INDEX_POLL_INTERVAL):
+        self.startup = StartupReport()
+        self.index = HotSwapIndex(
+            DB_PATH,
+            load=functools.partial(load_pipeline, startup=self.startup),
+            poll_interval=poll_interval,
+            log=print
+        )
+
+    def start(self, background: bool = BACKGROUND_WARMUP) -> "PipelineService":
+        """Kurulum ve ısınmayı başlatır; background=False ise bitmesini bekler"""
+        if not GOOGLE_API_KEY:
+            raise RuntimeError("Google API anahtarı bulunamadı (GOOGLE_API_KEY)")
+        if background:
+            threading.Thread(target=start_up, args=(self.index, self.startup), name="startup", daemon=True).start()
+        else:
+            start_up(self.index, self.startup)
+        return self
+
+    @property
+    def pipeline(self):
+        """Etkin sürümün pipeline'ı; henüz yüklenmediyse None"""
+        return self.index.current
+
+    def status(self) -> Dict:
+        """Hazır olma durumu; ilk sürüm yüklendikten sonra her zaman hazırdır"""
+        report = self.startup.to_dict()
+        ready = self.index.current is not None
+        return {
+            "ready": ready,
+            "state": "ready" if ready else report["state"],
+            "current_phase": report["current_phase"],
+            "progress": 1.0 if ready else self.startup.progress,
+            "error": report["error"] or self.index.last_error,
+            "index_version": self.index.version
+        }
+
+    def get_stats(self) -> Dict:
+        """Pipeline istatistikleri + indeks sürümü ve başlangıç raporu"""
+        pipeline = self.pipeline
+        stats = pipeline.get_stats() if pipeline is not None else {}
+        return {**stats, "index": self.index.get_stats(), "startup": self.startup.to_dict()}
+
+    def refresh_index(self) -> bool:
+        """Yayınlanan yeni sürüme arka planda geçer; yükleme sürüyorsa False"""
+        return self.index.refresh_async()
+
+    def stop(self):
+        self.index.stop()
@@ -2,145 +2,223 @@
 
 """
 Kullanım:
-    python setup_database.py
+    python setup_database.py            # artımlı güncelleme (veri değişmediyse işlem yapmaz)
+    python setup_database.py --rebuild  # tüm dokümanları yeniden embed eder
+    python setup_database.py --no-cluster  # parafraz kümelemesi olmadan indeksler
+    python setup_database.py --backend numpy  # ChromaDB yerine süreç içi NumPy deposu
+    python setup_database.py --workers 4 --batch-size 512  # büyük korpuslar
+    python setup_database.py --embedding-backend onnx-int8 --threads 4  # kuantize ONNX ile
+
+İndeks chroma_db/versions/<sürüm>/ altına yeni, değişmez bir sürüm olarak
+kurulur (etkin sürümün kopyasından artımlı) ve tamamlanınca chroma_db/CURRENT
+atomik olarak yeni sürüme çevrilir; çalışan uygulama yeni sürüme arka planda
+geçer. Dokümanlar akış halinde okunup gruplar halinde yazılır; kesilen bir
+kurulum aynı komutla tekrar çalıştırıldığında kaldığı yerden devam eder.
+
+Çıkış kodu 0 ise indeks güncel veya yeni sürüm yayınlandı (veri
+değişmediyse işlem yapılmaz), 1 ise kurulum başarısız oldu.
 """
 
 import os
-import json
-from langchain_huggingface import HuggingFaceEmbeddings
-from langchain_chroma import Chroma
-from langchain.docstore.document import Document
+import sys
+import argparse
+import functools
+
+from core.indexer import build_index
+from core.embedding_cache import CachedEmbeddings
+from core.vector_store import create_vector_store, VECTOR_BACKENDS
+from core.ingestion import iter_documents, ProcessPoolEmbeddings, INGEST_BATCH_SIZE
+from core.artifacts import publish_artifact, resolve_artifact, KEEP_VERSIONS
+from core.embedding_backends import (
+    create_embeddings as create_backend_embeddings, ensure_onnx_model, cache_model_name,
+    EMBEDDING_BACKENDS, DEFAULT_EMBEDDING_BACKEND
+)
 
 
 PROJECT_ROOT = os.path.dirname(os.path.abspath(__file__))
 DB_PATH = os.path.join(PROJECT_ROOT, "chroma_db")
 COLLECTION_NAME = "mentormate_faq"
 EMBEDDING_MODEL = "sentence-transformers/paraphrase-multilingual-MiniLM-L12-v2"
+EMBEDDING_CACHE_DIR = os.path.join(PROJECT_ROOT, "cache", "embeddings")
+ONNX_MODEL_DIR = os.path.join(PROJECT_ROOT, "cache", "onnx")
 
 DATA_FILES = [
     os.path.join(PROJECT_ROOT, "data", "enriched_dataset.jsonl"),
     os.path.join(PROJECT_ROOT, "data", "generated_data_google.jsonl")
 ]
 
+CANONICAL_DATA_FILE = os.path.join(PROJECT_ROOT, "data", "enriched_dataset.jsonl")
 
-def load_data_from_jsonl(file_path: str) -> list:
-    documents = []
-    
-    if not os.path.exists(file_path):
-        print(f" Dosya bulunamadı: {file_path}")
-        return documents
-    
-    print(f"Yükleniyor: {os.path.basename(file_path)}")
-    
-    with open(file_path, 'r', encoding='utf-8') as f:
-        for i, line in enumerate(f, 1):
-            try:
-                data = json.loads(line)
-                question = data.get("question", "")
-                answer = data.get("answer", "")
-                
-                if question and answer:
-                    page_content = f"Soru: {question}\nCevap: {answer}"
-                    doc = Document(
-                        page_content=page_content,
-                        metadata={"source": os.path.basename(file_path)}
-                    )
-                    documents.append(doc)
-            except json.JSONDecodeError:
-                print(f"  Satır {i} atlandı (JSON hatası)")
-                continue
-
-    print(f"  {len(documents)} doküman yüklendi\n")
-    return documents
-
-
-def create_database():
+
+def create_embeddings(embedding_backend: str = DEFAULT_EMBEDDING_BACKEND, threads: int = None):
+    """Embedding modeli (ProcessPoolEmbeddings her süreçte bunu çağırır)"""
+    return create_backend_embeddings(embedding_backend, EMBEDDING_MODEL, onnx_dir=ONNX_MODEL_DIR, threads=threads)
+
+
+def load_all_documents(data_files: list):
+    """Veri dosyalarındaki dokümanları akış halinde üretir"""
+    return iter_documents(data_files, log=lambda message: print(f"   {message}"))
+
+
+def create_database(
+    rebuild: bool = False,
+    cluster: bool = True,
+    backend: str = "chroma",
+    batch_size: int = INGEST_BATCH_SIZE,
+    workers: int = 0,
+    keep: int = KEEP_VERSIONS,
+    embedding_backend: str = DEFAULT_EMBEDDING_BACKEND,
+    threads: int = None
+) -> bool:
+    """Başarılıysa (değişiklik olmasa da) True, kurulum yapılamadıysa False döner"""
 
     print("="*70)
     print(" MentorMate - ChromaDB Kurulum Scripti")
     print("="*70)
     print()
     
-    if os.path.exists(DB_PATH):
-        response = input(f"  '{DB_PATH}' zaten mevcut. Yeniden oluşturulsun mu? (y/n): ")
-        if response.lower() != 'y':
-            print(" İşlem iptal edildi.")
-            return
-        
-        print("  Mevcut veritabanı siliniyor...")
-        import shutil
-        shutil.rmtree(DB_PATH)
-        print("  Silindi\n")
-    
-    print(" Veri dosyaları yükleniyor...")
-    all_documents = []
-    
-    for file_path in DATA_FILES:
-        docs = load_data_from_jsonl(file_path)
-        all_documents.extend(docs)
-    
-    if not all_documents:
+    missing_files = [f for f in DATA_FILES if not os.path.exists(f)]
+    if len(missing_files) == len(DATA_FILES):
         print(" HATA: Hiçbir veri yüklenemedi!")
         print("   Lütfen data/ klasöründe şu dosyaların olduğundan emin olun:")
         for f in DATA_FILES:
             print(f"   - {os.path.basename(f)}")
-        return
-    
-    print(f" Toplam {len(all_documents)} doküman yüklendi")
-    print()
+        return False
     
     print(" Embedding modeli yükleniyor...")
-    print(f"   Model: {EMBEDDING_MODEL}")
-    embeddings = HuggingFaceEmbeddings(
-        model_name=EMBEDDING_MODEL,
-        model_kwargs={'device': 'cpu'},
-        encode_kwargs={'batch_size': 32}
+    print(f"   Model: {EMBEDDING_MODEL} ({embedding_backend})")
+    if embedding_backend != DEFAULT_EMBEDDING_BACKEND:
+        # Süreçler aynı anda dışa aktarmasın diye ONNX modeli önce hazırlanır
+        ensure_onnx_model(EMBEDDING_MODEL, embedding_backend, ONNX_MODEL_DIR)
+    factory = functools.partial(create_embeddings, embedding_backend, threads)
+    if workers > 1:
+        print(f"   {workers} süreçte paralel embedding")
+        base_embeddings = ProcessPoolEmbeddings(factory, workers=workers)
+    else:
+        base_embeddings = factory()
+    embeddings = CachedEmbeddings(
+        base_embeddings,
+        model_name=cache_model_name(EMBEDDING_MODEL, embedding_backend),
+        cache_dir=EMBEDDING_CACHE_DIR
     )
     print("   Model yüklendi\n")
     
-    print("  ChromaDB veritabanı oluşturuluyor...")
-    print("   (Bu işlem birkaç dakika sürebilir...)")
+    # Arka uç değiştiyse etkin sürümün kopyası işe yaramaz, sürüm boş kurulur
+    current = resolve_artifact(DB_PATH)
+    incremental = (
+        not rebuild
+        and current is not None
+        and current[0] != "legacy"
+        and current[2].get("index_options", {}).get("vector_backend") == backend
+    )
+    
+    print(f"  Yeni indeks sürümü kuruluyor ({backend})...")
+    if incremental:
+        print(f"   (Etkin sürüm {current[0]} temel alınır, sadece yeni veya değişen dokümanlar embed edilir)")
     
     try:
-        vectordb = Chroma.from_documents(
-            documents=all_documents,
-            embedding=embeddings,
-            persist_directory=DB_PATH,
-            collection_name=COLLECTION_NAME
-        )
+        def build(path: str) -> dict:
+            """Sürüm klasörünü kurar ve yayınlanmadan önce doğrular"""
+            vectordb = create_vector_store(backend, path, embeddings, COLLECTION_NAME)
+            stats = build_index(
+                vectordb=vectordb,
+                embeddings=embeddings,
+                db_path=path,
+                collection_name=COLLECTION_NAME,
+                embedding_model=EMBEDDING_MODEL,
+                data_files=DATA_FILES,
+                canonical_data_file=CANONICAL_DATA_FILE,
+                load_documents=load_all_documents,
+                force=rebuild,
+                batch_size=batch_size,
+                cluster=cluster,
+                vector_backend=backend,
+                embedding_backend=embedding_backend,
+                log=lambda message: print(f"   {message}")
+            )
+            if not stats["changed"]:
+                return stats
+            
+            print("\n Yeni sürüm doğrulanıyor...")
+            collection_count = len(vectordb.get(include=[])["ids"])
+            print(f"  {collection_count} doküman veritabanında")
+            if collection_count == 0:
+                raise RuntimeError("İndeks boş, sürüm yayınlanmadı")
+            
+            print("\n Test sorgusu yapılıyor...")
+            results = vectordb.similarity_search("bootcamp sertifika", k=1)
+            if results:
+                print("   Test başarılı!")
+                print(f"  İlk sonuç: {results[0].page_content[:100]}...\n")
+            return stats
         
-        print("  Veritabanı oluşturuldu\n")
+        result = publish_artifact(
+            DB_PATH,
+            build,
+            incremental=incremental,
+            keep=keep,
+            log=lambda message: print(f"   {message}")
+        )
+        stats = result["stats"]
         
-
-        print(" Veritabanı doğrulanıyor...")
-        collection_count = vectordb._collection.count()
-        print(f"  {collection_count} doküman veritabanında")
+        if stats.get("resumed"):
+            print("  Önceki yarım kalan kurulum tamamlandı")
+        print(f"  {stats['added']} eklendi, {stats['deleted']} silindi")
+        cache_stats = embeddings.get_stats()
+        print(f"  Embedding önbelleği: {cache_stats['hits']} isabet, {cache_stats['misses']} yeni hesaplama\n")
         
-        print("\n Test sorgusu yapılıyor...")
-        results = vectordb.similarity_search("bootcamp sertifika", k=1)
-        if results:
-            print("   Test başarılı!")
-            print(f"  İlk sonuç: {results[0].page_content[:100]}...")
+        if result["published"]:
+            print(f"  Etkin sürüm: {result['version']}")
         
     except Exception as e:
         print(f" HATA: {e}")
-        return
+        print("   Komutu tekrar çalıştırırsanız indeksleme kaldığı yerden devam eder.")
+        return False
+    finally:
+        if isinstance(base_embeddings, ProcessPoolEmbeddings):
+            base_embeddings.close()
     
     print()
     print("="*70)
     print(" KURULUM TAMAMLANDI!")
     print("="*70)
     print()
-    print("Şimdi uygulamayı çalıştırabilirsiniz:")
+    print("Şimdi uygulamayı çalıştırabilirsiniz (çalışıyorsa yeni sürüme kendisi geçer):")
     print("  streamlit run app.py")
     print()
+    return True
 
 
 
 if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="MentorMate ChromaDB kurulumu")
+    parser.add_argument("--rebuild", action="store_true", help="Tüm dokümanları yeniden embed et")
+    parser.add_argument("--no-cluster", action="store_true", help="Parafraz kümelemesini kapat, tüm dokümanları indeksle")
+    parser.add_argument("--backend", choices=VECTOR_BACKENDS, default="chroma", help="Vektör deposu arka ucu")
+    parser.add_argument("--batch-size", type=int, default=INGEST_BATCH_SIZE, help="Embed edilip birlikte yazılan doküman sayısı")
+    parser.add_argument("--workers", type=int, default=0, help="Embedding için süreç sayısı (0/1 = tek süreç)")
+    parser.add_argument("--keep", type=int, default=KEEP_VERSIONS, help="Saklanacak indeks sürümü sayısı")
+    parser.add_argument("--embedding-backend", choices=EMBEDDING_BACKENDS, default=DEFAULT_EMBEDDING_BACKEND,
+                        help="Embedding arka ucu (onnx-int8 = kuantize ONNX Runtime)")
+    parser.add_argument("--threads", type=int, default=None, help="Embedding için CPU thread sayısı")
+    args = parser.parse_args()
+    
     try:
-        create_database()
+        success = create_database(
+            rebuild=args.rebuild,
+            cluster=not args.no_cluster,
+            backend=args.backend,
+            batch_size=args.batch_size,
+            workers=args.workers,
+            keep=args.keep,
+            embedding_backend=args.embedding_backend,
+            threads=args.threads
+        )
     except KeyboardInterrupt:
         print("\n\n İşlem kullanıcı tarafından iptal edildi.")
+        sys.exit(130)
     except Exception as e:
-        print(f"\n Beklenmeyen hata: {e}")
\ No newline at end of file
+        print(f"\n Beklenmeyen hata: {e}")
+        sys.exit(1)
+    
+    sys.exit(0 if success else 1)
\ No newline at end of file
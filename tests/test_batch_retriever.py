@@ -0,0 +1,50 @@
+from langchain_core.embeddings import Embeddings
+
+from core.batch_retriever import BatchedMultiQueryRetriever
+from core.numpy_store import NumpyVectorStore
+
+
+class _CountingEmbeddings(Embeddings):
+    """d<i> biçimli metni i. eksene yerleştirir ve embed edilen metinleri kaydeder"""
+    def __init__(self):
+        self.embedded = []
+
+    def embed_documents(self, texts):
+        self.embedded.extend(texts)
+        return [self._vector(t) for t in texts]
+
+    def embed_query(self, text):
+        return self.embed_documents([text])[0]
+
+    def _vector(self, text):
+        vector = [0.0] * 8
+        vector[int(text.split()[0][1:]) % 8] = 1.0
+        return vector
+
+
+def _retriever(tmp_path):
+    embeddings = _CountingEmbeddings()
+    store = NumpyVectorStore(str(tmp_path), embeddings, "test")
+    store.add_texts([f"d{i}" for i in range(8)], ids=[f"id{i}" for i in range(8)])
+    embeddings.embedded.clear()
+    return BatchedMultiQueryRetriever(vectordb=store, embeddings=embeddings, k=4, per_query_k=2), embeddings
+
+
+def test_known_vectors_are_not_embedded_again(tmp_path):
+    retriever, embeddings = _retriever(tmp_path)
+    question_vector = embeddings.embed_query("d1")
+    embeddings.embedded.clear()
+
+    docs = retriever.retrieve(["d1", "d2 alt sorgu"], {"d1": question_vector})
+
+    assert embeddings.embedded == ["d2 alt sorgu"]
+    assert {"d1", "d2"} <= {doc.page_content for doc in docs}
+
+
+def test_retrieve_many_embeds_only_missing_queries_once(tmp_path):
+    retriever, embeddings = _retriever(tmp_path)
+
+    results = retriever.retrieve_many([["d1", "d3"], ["d3", "d5"]], {"d5": embeddings._vector("d5")})
+
+    assert embeddings.embedded == ["d1", "d3"]
+    assert len(results) == 2
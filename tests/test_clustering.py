@@ -0,0 +1,75 @@
+from langchain_core.documents import Document
+
+from core.clustering import cluster_documents, iter_clustered_documents, split_qa
+from core.indexer import document_id
+
+
+class _KeywordEmbeddings:
+    """Soruda "sertifika" veya "ücret" geçmesine göre vektör üretir"""
+
+    def embed_documents(self, texts):
+        texts = [t.lower() for t in texts]
+        return [[float("sertifika" in t), float("ücret" in t), float(len(t) % 3 == 0) * 0.01] for t in texts]
+
+
+def _doc(question, answer, **metadata):
+    return Document(page_content=f"Soru: {question}\nCevap: {answer}", metadata={"source": "test.jsonl", **metadata})
+
+
+def test_every_paraphrase_is_kept_with_cluster_answer():
+    documents = [
+        _doc("Sertifika veriliyor mu?", "Evet, bitirenlere sertifika verilir.",
+             canonical_question="Sertifika veriliyor mu?", canonical_answer="Evet, bitirenlere sertifika verilir."),
+        _doc("Sertifika alabilir miyim?", "Evet."),
+        _doc("Sonunda sertifika var mı?", "Bitirince sertifika alırsınız."),
+        _doc("Sertifika alabilir miyim?", "Evet."),
+        _doc("Ücret ödenecek mi?", "Hayır, program ücretsizdir."),
+    ]
+
+    clustered = cluster_documents(documents, _KeywordEmbeddings())
+
+    questions = [split_qa(doc.page_content)[0] for doc in clustered]
+    assert questions == ["Sertifika veriliyor mu?", "Sertifika alabilir miyim?", "Sonunda sertifika var mı?", "Ücret ödenecek mi?"]
+
+    certificate = clustered[:3]
+    assert {split_qa(doc.page_content)[1] for doc in certificate} == {"Evet, bitirenlere sertifika verilir."}
+    assert {doc.metadata["canonical_question"] for doc in certificate} == {"Sertifika veriliyor mu?"}
+    assert len({doc.metadata["cluster_id"] for doc in certificate}) == 1
+
+    assert clustered[3].metadata["cluster_id"] != certificate[0].metadata["cluster_id"]
+    assert "canonical_question" not in clustered[3].metadata
+
+
+def test_clustering_reads_source_lazily():
+    documents = [
+        _doc("Sertifika veriliyor mu?", "Evet.", canonical_question="Sertifika veriliyor mu?"),
+        _doc("Sertifika alabilir miyim?", "Evet.")
+    ]
+    loads = []
+
+    def load():
+        loads.append(1)
+        yield from documents
+
+    clustered = iter_clustered_documents(load, _KeywordEmbeddings(), batch_size=1)
+    assert loads == []
+    assert [split_qa(doc.page_content)[0] for doc in clustered] == ["Sertifika veriliyor mu?", "Sertifika alabilir miyim?"]
+    assert len(loads) == 3
+
+
+def test_document_id_uses_content_and_stable_keys():
+    a = _doc("Soru?", "Cevap.", cluster_id="c1")
+    assert document_id(a) == document_id(_doc("Soru?", "Cevap.", cluster_id="c1", canonical_question="Soru?"))
+    assert document_id(a) != document_id(_doc("Soru?", "Cevap.", cluster_id="c2"))
+    assert document_id(a) != document_id(Document(page_content=a.page_content, metadata={"source": "b.jsonl", "cluster_id": "c1"}))
+    assert document_id(a) != document_id(_doc("Soru?", "Başka cevap.", cluster_id="c1"))
+
+
+def test_new_paraphrase_keeps_cluster_ids():
+    documents = [
+        _doc("Sertifika veriliyor mu?", "Evet.", canonical_question="Sertifika veriliyor mu?"),
+        _doc("Sertifika alabilir miyim?", "Evet.")
+    ]
+    before = {document_id(doc) for doc in cluster_documents(documents, _KeywordEmbeddings())}
+    after = {document_id(doc) for doc in cluster_documents(documents + [_doc("Sertifika var mı?", "Evet.")], _KeywordEmbeddings())}
+    assert before < after
@@ -0,0 +1,20 @@
+import pytest
+from langchain_core.documents import Document
+
+from core.confidence import retrieval_confident
+from core.rag_pipeline import RAGPipeline
+
+
+def _doc(score):
+    return Document(page_content="x", metadata={"retrieval_score": score})
+
+
+def test_retrieval_gate_uses_best_score():
+    assert retrieval_confident([_doc(0.2), _doc(0.5)], 0.4)
+    assert not retrieval_confident([_doc(0.2), _doc(0.3)], 0.4)
+    assert not retrieval_confident([], None)
+
+
+def test_min_score_rejected_for_backend_without_scores(tmp_path):
+    with pytest.raises(ValueError, match="chroma"):
+        RAGPipeline(google_api_key="", db_path=str(tmp_path), vector_backend="chroma", min_retrieval_score=0.3)
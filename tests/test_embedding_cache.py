@@ -0,0 +1,74 @@
+import os
+
+import numpy as np
+from langchain_core.embeddings import Embeddings
+
+from core.embedding_cache import CachedEmbeddings
+
+
+class _TextEmbeddings(Embeddings):
+    """Metne özgü, tekrarlanabilir vektörler; çağrılan metinleri kaydeder"""
+
+    def __init__(self):
+        self.calls = []
+
+    def embed_documents(self, texts):
+        self.calls.extend(texts)
+        return [[float(len(t)), float(sum(map(ord, t)) % 97), 1.0] for t in texts]
+
+    def embed_query(self, text):
+        return self.embed_documents([text])[0]
+
+
+def _cached(cache_dir):
+    base = _TextEmbeddings()
+    return CachedEmbeddings(base, model_name="test-model", cache_dir=str(cache_dir)), base
+
+
+def test_vectors_persist_across_instances(tmp_path):
+    first, _ = _cached(tmp_path)
+    expected = first.embed_documents(["sertifika", "ücret"])
+
+    second, base = _cached(tmp_path)
+    assert second.embed_documents(["sertifika", "ücret"]) == expected
+    assert base.calls == []
+    assert second.get_stats()["hits"] == 2
+
+
+def test_two_writers_share_one_directory(tmp_path):
+    a, _ = _cached(tmp_path)
+    b, _ = _cached(tmp_path)
+
+    # İkisi de diğerinin yazdıklarını bilmeden ekler; "ortak" iki kez hesaplanır
+    a.embed_documents(["a1", "ortak", "a2"])
+    b.embed_documents(["b1", "ortak"])
+    a.embed_documents(["a3"])
+    b.embed_documents(["b2", "b3"])
+
+    texts = ["a1", "a2", "a3", "b1", "b2", "b3", "ortak"]
+    reader, base = _cached(tmp_path)
+    assert reader.embed_documents(texts) == _TextEmbeddings().embed_documents(texts)
+    assert base.calls == []
+
+    # Yinelenen anahtar diske ikinci kez yazılmaz
+    assert reader.get_stats()["disk_entries"] == len(texts)
+    assert os.path.getsize(tmp_path / "test-model.f32") == len(texts) * 3 * 4
+
+
+def test_partial_writes_are_ignored(tmp_path):
+    writer, _ = _cached(tmp_path)
+    writer.embed_documents(["tam"])
+
+    # Kesilen bir yazma: yarım vektör satırı ve sonlanmamış indeks satırı
+    with open(tmp_path / "test-model.f32", "ab") as f:
+        f.write(np.zeros(2, dtype=np.float32).tobytes())
+    with open(tmp_path / "test-model.idx", "ab") as f:
+        f.write(b"yarim")
+
+    recovered, base = _cached(tmp_path)
+    recovered.embed_documents(["tam", "yeni"])
+    assert base.calls == ["yeni"]
+
+    reader, base = _cached(tmp_path)
+    assert reader.embed_documents(["tam", "yeni"]) == _TextEmbeddings().embed_documents(["tam", "yeni"])
+    assert base.calls == []
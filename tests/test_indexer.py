@@ -0,0 +1,13 @@
+from core.embedding_backends import cache_model_name
+from core.indexer import build_index_options
+
+
+def test_only_quantized_embedding_backend_is_recorded():
+    torch = build_index_options(True, 0.92, "numpy", "torch")
+    assert build_index_options(True, 0.92, "numpy", "onnx") == torch
+    assert build_index_options(True, 0.92, "numpy", "onnx-int8") == {**torch, "embedding_backend": "onnx-int8"}
+
+
+def test_cache_key_matches_index_options():
+    assert cache_model_name("m", "onnx") == cache_model_name("m", "torch") == "m"
+    assert cache_model_name("m", "onnx-int8") != "m"
@@ -0,0 +1,48 @@
+import json
+
+import numpy as np
+from langchain_core.embeddings import Embeddings
+
+from core.intent_router import IntentRouter, GREETING_EXAMPLES, GENERAL_EXAMPLES
+
+
+class _HashEmbeddings(Embeddings):
+    """Metinden türetilen sabit rastgele vektör"""
+    def embed_documents(self, texts):
+        return [self.embed_query(t) for t in texts]
+
+    def embed_query(self, text):
+        seed = int.from_bytes(text.encode("utf-8")[:8].ljust(8, b"\0"), "little")
+        return np.random.default_rng(seed).normal(size=16).tolist()
+
+
+def test_every_route_uses_group_centroids(tmp_path):
+    dataset = tmp_path / "data.jsonl"
+    rows = [
+        {"question": "Sertifika ne zaman verilir?", "canonical_question": "sertifika", "category": "Sertifika"},
+        {"question": "Sertifikam ne zaman gelir?", "canonical_question": "sertifika", "category": "Sertifika"},
+        {"question": "Proje grupla mı yapılır?", "category": "Proje"}
+    ]
+    dataset.write_text("\n".join(json.dumps(row, ensure_ascii=False) for row in rows), encoding="utf-8")
+
+    router = IntentRouter.build(str(dataset), _HashEmbeddings())
+
+    routes = [label["route"] for label in router.labels]
+    assert routes.count("bootcamp_specific") == 2
+    assert routes.count("greeting") == len(GREETING_EXAMPLES)
+    assert routes.count("general_safe") == len(GENERAL_EXAMPLES)
+
+
+def test_low_margin_defers_to_heuristic():
+    vectors = np.asarray([[1.0, 0.0], [0.0, 1.0]], dtype=np.float32)
+    labels = [
+        {"route": "bootcamp_specific", "category": "Genel", "intent": ""},
+        {"route": "general_safe", "category": "", "intent": ""}
+    ]
+    router = IntentRouter(vectors, labels)
+    ambiguous = [1.0, 0.95]
+
+    assert router.route(ambiguous)["route"] == "bootcamp_specific"
+    assert router.route(ambiguous, min_confidence=0.6, min_margin=0.05) is None
+    assert router.route([1.0, 0.5], min_confidence=0.6, min_margin=0.05)["route"] == "bootcamp_specific"
+    assert router.route([0.5, 0.5], min_confidence=0.8) is None
@@ -0,0 +1,88 @@
+import asyncio
+import threading
+
+import pytest
+
+from core.llm_gateway import LLMGateway
+
+
+class _Abort(BaseException):
+    """Lider thread'in upstream sonucu olmadan bırakması"""
+
+
+def test_cancelled_leader_hands_over_to_follower():
+    async def scenario():
+        gateway = LLMGateway()
+        calls = []
+
+        async def upstream():
+            calls.append(1)
+            await asyncio.sleep(0.05)
+            return "cevap"
+
+        leader = asyncio.create_task(gateway.acall("k", upstream))
+        await asyncio.sleep(0.01)
+        follower = asyncio.create_task(gateway.acall("k", upstream))
+        await asyncio.sleep(0.01)
+        leader.cancel()
+
+        assert await follower == "cevap"
+        with pytest.raises(asyncio.CancelledError):
+            await leader
+        return gateway, calls
+
+    gateway, calls = asyncio.run(scenario())
+    assert len(calls) == 2
+    assert gateway.get_stats()["in_flight_prompts"] == 0
+
+
+def test_cancelled_follower_does_not_affect_others():
+    async def scenario():
+        gateway = LLMGateway()
+
+        async def upstream():
+            await asyncio.sleep(0.03)
+            return "cevap"
+
+        leader = asyncio.create_task(gateway.acall("k", upstream))
+        await asyncio.sleep(0.01)
+        followers = [asyncio.create_task(gateway.acall("k", upstream)) for _ in range(2)]
+        await asyncio.sleep(0.005)
+        followers[0].cancel()
+        return await leader, await followers[1]
+
+    assert asyncio.run(scenario()) == ("cevap", "cevap")
+
+
+def test_aborted_sync_leader_hands_over_to_follower():
+    gateway = LLMGateway()
+    leader_started = threading.Event()
+    release = threading.Event()
+    results = []
+
+    def aborting():
+        leader_started.set()
+        release.wait()
+        raise _Abort()
+
+    def leader():
+        try:
+            gateway.call("k", aborting)
+        except _Abort:
+            results.append("iptal")
+
+    def follower():
+        results.append(gateway.call("k", lambda: "cevap"))
+
+    threads = [threading.Thread(target=leader)]
+    threads[0].start()
+    leader_started.wait()
+    threads.append(threading.Thread(target=follower))
+    threads[1].start()
+    while gateway.get_stats()["coalesced"] == 0:
+        pass
+    release.set()
+    for thread in threads:
+        thread.join(timeout=5)
+
+    assert sorted(results) == ["cevap", "iptal"]
@@ -0,0 +1,51 @@
+import os
+
+from langchain_core.embeddings import Embeddings
+
+from core.numpy_store import NumpyVectorStore, NUMPY_STORE_DIRNAME, VECTORS_FILENAME
+
+
+class _AxisEmbeddings(Embeddings):
+    """d<i> biçimli metni i. eksene (mod 8) yerleştirir"""
+    def embed_documents(self, texts):
+        return [self.embed_query(t) for t in texts]
+
+    def embed_query(self, text):
+        vector = [0.0] * 8
+        vector[int(text.split()[0][1:]) % 8] = 1.0
+        return vector
+
+
+def _top(store, text):
+    return store.similarity_search(text, k=1)[0].metadata["doc_id"]
+
+
+def test_add_replace_delete_keep_rows_consistent(tmp_path):
+    store = NumpyVectorStore(str(tmp_path), _AxisEmbeddings(), "test")
+    store.add_texts([f"d{i}" for i in range(6)], ids=[f"id{i}" for i in range(6)])
+    store.delete(["id1", "id3", "missing"])
+    store.add_texts(["d4 yeni", "d7"], ids=["id4", "id7"])
+
+    assert sorted(store.get(include=[])["ids"]) == ["id0", "id2", "id4", "id5", "id7"]
+    assert _top(store, "d5") == "id5"
+    assert _top(store, "d7") == "id7"
+    assert store.similarity_search("d4", k=1)[0].page_content == "d4 yeni"
+
+
+def test_writes_reach_disk_only_on_flush(tmp_path):
+    store = NumpyVectorStore(str(tmp_path), _AxisEmbeddings(), "test")
+    for i in range(300):
+        store.add_texts([f"d{i}"], ids=[f"id{i}"])
+    assert not os.path.exists(tmp_path / NUMPY_STORE_DIRNAME / "test" / VECTORS_FILENAME)
+
+    store.delete(["id0"])
+    store.flush()
+
+    reopened = NumpyVectorStore(str(tmp_path), _AxisEmbeddings(), "test")
+    assert len(reopened) == 299
+    assert _top(reopened, "d2") in {f"id{i}" for i in range(2, 300, 8)}
+
+    # Salt okunur açılan depoya yazmak önce belleğe kopyalar
+    reopened.add_texts(["d0"], ids=["id0"])
+    reopened.flush()
+    assert len(NumpyVectorStore(str(tmp_path), _AxisEmbeddings(), "test")) == 300
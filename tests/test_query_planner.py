@@ -0,0 +1,53 @@
+import json
+
+from core.query_planner import QueryPlanner
+
+
+class _Response:
+    def __init__(self, content):
+        self.content = content
+
+
+class _StaticLLM:
+    def __init__(self, payload):
+        self.content = payload if isinstance(payload, str) else json.dumps(payload, ensure_ascii=False)
+
+    def invoke(self, prompt, config=None):
+        return _Response(self.content)
+
+
+HISTORY = [("Bootcamp ne zaman başlıyor?", "Eylülde başlıyor.")]
+
+
+def test_first_turn_skips_llm():
+    plan = QueryPlanner(llm=None).plan("Sertifika var mı?", [])
+    assert plan == {"standalone_question": "Sertifika var mı?", "queries": [], "category": None, "llm_used": False}
+
+
+def test_parses_plan_with_turkish_lowercase():
+    planner = QueryPlanner(_StaticLLM({
+        "standalone_question": "İSTANBUL bootcamp KATILIM şartı",
+        "queries": ["İştirak koşulları", "  ", "Katılım şartları", "Başvuru", "fazla"],
+        "category": "bootcamp_specific"
+    }))
+
+    plan = planner.plan("peki şartı ne?", HISTORY)
+
+    assert plan["standalone_question"] == "istanbul bootcamp katılım şartı"
+    assert plan["queries"] == ["iştirak koşulları", "katılım şartları", "başvuru"]
+    assert plan["category"] == "bootcamp_specific"
+
+
+def test_rejects_string_queries_and_unknown_category():
+    planner = QueryPlanner(_StaticLLM({"standalone_question": "ücret", "queries": "ücret ne kadar", "category": "other"}))
+
+    plan = planner.plan("ücreti?", HISTORY)
+
+    assert plan["queries"] == []
+    assert plan["category"] is None
+
+
+def test_broken_json_falls_back_to_question():
+    plan = QueryPlanner(_StaticLLM("bilmiyorum")).plan("Peki SÜRESİ?", HISTORY)
+    assert plan["standalone_question"] == "peki süresi?"
+    assert plan["queries"] == []
@@ -0,0 +1,91 @@
+import numpy as np
+from langchain_core.documents import Document
+
+from core.semantic_cache import SemanticCache
+
+
+def _vector(*values):
+    return np.array(values, dtype=np.float32)
+
+
+def test_hit_returns_stored_answer():
+    cache = SemanticCache(threshold=0.95)
+    cache.store(_vector(1, 0, 0), "Bootcamp ücretli mi?", "Hayır, ücretsiz.", [Document(page_content="Soru: ...", metadata={"id": 1})])
+
+    result = cache.lookup(_vector(0.99, 0.05, 0))
+
+    assert result["answer"] == "Hayır, ücretsiz."
+    assert result["source_documents"][0].metadata == {"id": 1}
+    assert cache.get_stats()["hits"] == 1
+
+
+def test_miss_below_threshold():
+    cache = SemanticCache(threshold=0.95)
+    cache.store(_vector(1, 0, 0), "Bootcamp ücretli mi?", "Hayır, ücretsiz.", [])
+
+    assert cache.lookup(_vector(0, 1, 0)) is None
+    assert SemanticCache().lookup(_vector(1, 0, 0)) is None
+    assert cache.get_stats()["misses"] == 1
+
+
+def test_lru_eviction_keeps_matrix_consistent():
+    cache = SemanticCache(threshold=0.95, max_size=2)
+    cache.store(_vector(1, 0, 0), "a", "A", [])
+    cache.store(_vector(0, 1, 0), "b", "B", [])
+    # a son kullanılan olur; c eklenince b çıkar
+    assert cache.lookup(_vector(1, 0, 0))["answer"] == "A"
+    cache.store(_vector(0, 0, 1), "c", "C", [])
+
+    assert len(cache) == 2
+    assert cache.lookup(_vector(0, 1, 0)) is None
+    assert cache.lookup(_vector(1, 0, 0))["answer"] == "A"
+    assert cache.lookup(_vector(0, 0, 1))["answer"] == "C"
+
+    # İlk satırdaki a çıkarken son satır (c) onun yerine taşınır
+    cache.store(_vector(0, 1, 1), "d", "D", [])
+    assert cache.lookup(_vector(1, 0, 0)) is None
+    assert cache.lookup(_vector(0, 0, 1))["answer"] == "C"
+    assert cache.lookup(_vector(0, 1, 1))["answer"] == "D"
+
+
+def test_ttl_expiry_and_clear(monkeypatch):
+    now = [1000.0]
+    monkeypatch.setattr("core.semantic_cache.time.time", lambda: now[0])
+    cache = SemanticCache(threshold=0.95, ttl_seconds=10)
+    cache.store(_vector(1, 0, 0), "a", "A", [])
+    cache.store(_vector(0, 1, 0), "b", "B", [])
+
+    now[0] += 11
+    assert cache.lookup(_vector(1, 0, 0)) is None
+    assert len(cache) == 0
+
+    cache.store(_vector(0, 0, 1), "c", "C", [])
+    cache.clear()
+    assert cache.lookup(_vector(0, 0, 1)) is None
+
+
+def test_sqlite_entries_survive_restart(tmp_path):
+    path = str(tmp_path / "cache.sqlite3")
+    cache = SemanticCache(threshold=0.95, sqlite_path=path, index_version="v1")
+    cache.store(_vector(1, 0, 0), "a", "A", [])
+    cache.store(_vector(0, 1, 0), "b", "B", [])
+
+    reopened = SemanticCache(threshold=0.95, sqlite_path=path, index_version="v1")
+    assert reopened.lookup(_vector(0, 1, 0))["answer"] == "B"
+
+    assert SemanticCache(threshold=0.95, sqlite_path=path, index_version="v2").lookup(_vector(1, 0, 0)) is None
+
+
+def test_expiry_on_miss_is_persisted(tmp_path, monkeypatch):
+    now = [1000.0]
+    monkeypatch.setattr("core.semantic_cache.time.time", lambda: now[0])
+    path = str(tmp_path / "cache.sqlite3")
+    cache = SemanticCache(threshold=0.95, ttl_seconds=10, sqlite_path=path)
+    cache.store(_vector(1, 0, 0), "a", "A", [])
+
+    now[0] += 11
+    assert cache.lookup(_vector(0, 1, 0)) is None
+
+    # Saat geri alınsa bile silinen kayıt yeniden yüklenmez
+    now[0] = 1000.0
+    assert len(SemanticCache(threshold=0.95, ttl_seconds=10, sqlite_path=path)) == 0
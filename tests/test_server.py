@@ -0,0 +1,97 @@
+import json
+import asyncio
+import threading
+
+from benchmarks.fake_llm import FakeChatModel, HashingEmbeddings
+from core.indexer import build_index
+from core.ingestion import iter_documents
+from core.rag_pipeline import RAGPipeline
+from core.vector_store import create_vector_store
+from server import WorkerPool
+
+
+class _Concurrency:
+    """Aynı anda süren LLM çağrılarının en yüksek sayısı"""
+    def __init__(self):
+        self.active = 0
+        self.peak = 0
+        self.lock = threading.Lock()
+
+    def enter(self):
+        with self.lock:
+            self.active += 1
+            self.peak = max(self.peak, self.active)
+
+    def exit(self):
+        with self.lock:
+            self.active -= 1
+
+
+class _TrackedChatModel(FakeChatModel):
+    tracker: _Concurrency = None
+
+    def _generate(self, messages, stop=None, run_manager=None, **kwargs):
+        self.tracker.enter()
+        try:
+            return super()._generate(messages, stop=stop, run_manager=run_manager, **kwargs)
+        finally:
+            self.tracker.exit()
+
+
+def _pipeline(tmp_path, tracker):
+    dataset = tmp_path / "data.jsonl"
+    rows = [
+        {"question": f"Konu {i} hakkında soru?", "answer": f"Konu {i} cevabı.",
+            "canonical_question": f"Konu {i}?", "canonical_answer": f"Konu {i} cevabı.", "category": "Genel"}
+        for i in range(12)
+    ]
+    dataset.write_text("\n".join(json.dumps(row, ensure_ascii=False) for row in rows), encoding="utf-8")
+
+    db_path = str(tmp_path / "db")
+    embeddings = HashingEmbeddings()
+    build_index(
+        vectordb=create_vector_store("numpy", db_path, embeddings, "test"),
+        embeddings=embeddings,
+        db_path=db_path,
+        collection_name="test",
+        embedding_model="hashing",
+        data_files=[str(dataset)],
+        canonical_data_file=str(dataset),
+        load_documents=iter_documents,
+        cluster=False,
+        vector_backend="numpy"
+    )
+    return RAGPipeline(
+        google_api_key="offline",
+        db_path=db_path,
+        collection_name="test",
+        vector_backend="numpy",
+        cache_size=0,
+        speculative_categories=(),
+        llm=_TrackedChatModel(latency=0.05, tracker=tracker),
+        llm_general=_TrackedChatModel(latency=0.05, tracker=tracker),
+        embeddings=embeddings
+    )
+
+
+def test_batch_items_share_the_worker_limit(tmp_path):
+    tracker = _Concurrency()
+    pipeline = _pipeline(tmp_path, tracker)
+    pool = WorkerPool(2, 10)
+    questions = [f"Toplu soru {i} nedir?" for i in range(8)]
+
+    def batch(concurrency, slot):
+        return list(pipeline.query_batch(questions, max_concurrency=concurrency, work_slot=slot))
+
+    async def scenario():
+        return await asyncio.gather(
+            pool.run_batch(batch, 8),
+            *[pool.run(pipeline.query, f"Tekil soru {i} nedir?", f"s{i}") for i in range(3)]
+        )
+
+    items, *singles = asyncio.run(scenario())
+    pool.shutdown()
+
+    assert all("result" in item for item in items) and len(items) == len(questions)
+    assert len(singles) == 3
+    assert 0 < tracker.peak <= 2